@@ -0,0 +1,97 @@
+"""
+Limpieza de un árbol sintético: recorrido antiguo (os.walk + isfile + listdir, borrado en serie)
+frente a CleanEngine (os.scandir + pool con robo de trabajo) con distintos topes de hilos.
+
+Uso (desde src/):
+    python -m benchmarks.bench_clean_engine [--files 200000] [--fanout 20] [--workers 1 2 4 8] [--dir /ruta]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from core.cleaner import Cleaner
+from core.clean_engine import CleanEngine
+
+
+def build_tree(root: str, files: int, fanout: int, seed: int = 0) -> None:
+    """files archivos pequeños repartidos en directorios de fanout entradas, con algunos excluidos."""
+    rng = random.Random(seed)
+    extensions = [".txt", ".cache", ".json", ".png", ".log", ".tmp"]
+    dirs = [root]
+    created = 0
+    while created < files:
+        parent = dirs[len(dirs) // fanout] if len(dirs) > fanout else root
+        path = os.path.join(parent, f"d{len(dirs)}")
+        os.makedirs(path, exist_ok=True)
+        dirs.append(path)
+        for _ in range(min(fanout, files - created)):
+            with open(os.path.join(path, f"f{created}{rng.choice(extensions)}"), "wb") as f:
+                f.write(b"x" * rng.randint(0, 4096))
+            created += 1
+
+
+def legacy_clean(cleaner: Cleaner, dir_path: str) -> int:
+    """Recorrido anterior a CleanEngine (os.walk de abajo arriba, isfile y listdir por directorio)."""
+    deleted = 0
+    for root, dirs, files in os.walk(dir_path, topdown=False):
+        dirs[:] = [d for d in dirs if not cleaner.should_skip(os.path.join(root, d), d)]
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not cleaner.should_skip(file_path, name):
+                try:
+                    os.remove(file_path)
+                    deleted += 1
+                except OSError:
+                    pass
+        for name in dirs:
+            path = os.path.join(root, name)
+            try:
+                if not os.listdir(path):
+                    shutil.rmtree(path)
+                    deleted += 1
+            except OSError:
+                pass
+    return deleted
+
+
+def survivors(root: str) -> set:
+    return {os.path.relpath(os.path.join(r, name), root) for r, ds, fs in os.walk(root) for name in ds + fs}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--fanout", type=int, default=20, help="Entradas por directorio")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--dir", default=None, help="Carpeta donde crear el árbol (por defecto, la temporal)")
+    args = parser.parse_args()
+
+    cleaner = Cleaner()
+    expected = None
+    runs = [("antiguo", None)] + [(f"motor x{w}", w) for w in args.workers]
+    print(f"{args.files} archivos, {os.cpu_count()} CPU")
+    for label, workers in runs:
+        root = tempfile.mkdtemp(prefix="bench_clean_", dir=args.dir)
+        try:
+            build_tree(root, args.files, args.fanout)
+            start = time.perf_counter()
+            if workers is None:
+                deleted = legacy_clean(cleaner, root)
+                bytes_freed = None
+            else:
+                report = CleanEngine(cleaner.matcher, workers, is_locked=cleaner.is_file_locked).run(root)
+                deleted, bytes_freed = report.deleted, report.bytes_freed
+            seconds = time.perf_counter() - start
+            left = survivors(root)
+            same = "" if expected is None or left == expected else "  ¡quedan otras entradas!"
+            expected = left if expected is None else expected
+            freed = "" if bytes_freed is None else f"  {bytes_freed / 2 ** 20:7.1f} MB liberados"
+            print(f"{label:10} {seconds:6.2f} s  {deleted / seconds:9.0f} entradas/s  {deleted} borradas{freed}{same}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
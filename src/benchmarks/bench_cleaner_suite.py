@@ -0,0 +1,313 @@
+"""
+Banco de pruebas reproducible de Cleaner sobre árboles temporales sintéticos, con resultados en JSON para comparar commits.
+
+Genera (con semilla fija) árboles de profundidad, ramificación, número de archivos, proporción
+de archivos excluidos y de directorios vacíos configurables bajo una carpeta de trabajo, y mide
+clean_temp_files, clean_directory y should_skip: tiempo, archivos/s, llamadas al sistema por
+archivo y memoria pico. Cada punto de entrada se ejecuta dos veces sobre árboles idénticos:
+una limpia para el tiempo y otra instrumentada para las llamadas y la memoria.
+
+Las llamadas al sistema se cuentan envolviendo las funciones de os (scandir, stat, lstat,
+unlink, rmdir, listdir, open, readlink...) y el primer DirEntry.stat() de cada entrada
+(los siguientes salen de la caché de la entrada).
+
+Uso (desde src/):
+    python -m benchmarks.bench_cleaner_suite [--files 10000 100000] [--depth 3] [--fanout 8]
+        [--excluded 0.2] [--empty 0.1] [--entries clean_temp_files clean_directory should_skip]
+        [--out resultados.json] [--compare anterior.json] [--dir /ruta]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+from core.cleaner import Cleaner
+
+ENTRIES = ["clean_temp_files", "clean_directory", "should_skip"]
+_COUNTED = ["scandir", "stat", "lstat", "unlink", "remove", "rmdir", "listdir", "open", "readlink",
+            "mkdir", "rename", "replace"]
+_CLEAN_EXTENSIONS = [".txt", ".cache", ".json", ".png", ".tmpfile", ".bak"]
+
+
+# ========== ÁRBOLES SINTÉTICOS ==========
+def build_tree(root: str, files: int, depth: int, fanout: int, excluded: float, empty: float,
+               excluded_extensions: List[str], max_bytes: int = 512, seed: int = 0) -> Dict[str, int]:
+    """
+    Árbol de depth niveles con fanout subdirectorios por directorio, files archivos repartidos
+    por todos los directorios (una fracción excluded con extensiones excluidas) y, además,
+    una fracción empty de directorios vacíos. Misma semilla, mismo árbol.
+    """
+    rng = random.Random(seed)
+    dirs, level = [], [root]
+    for _ in range(depth):
+        level = [os.path.join(parent, f"d{i}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for path in dirs:
+        os.makedirs(path)
+    empties = int(len(dirs) * empty)
+    for i in range(empties):
+        os.mkdir(os.path.join(rng.choice(dirs), f"vacio{i}"))
+    targets = dirs or [root]
+    excluded_files = 0
+    for i in range(files):
+        if rng.random() < excluded:
+            extension = rng.choice(excluded_extensions)
+            excluded_files += 1
+        else:
+            extension = rng.choice(_CLEAN_EXTENSIONS)
+        with open(os.path.join(targets[i % len(targets)], f"f{i}{extension}"), "wb") as f:
+            f.write(b"x" * rng.randint(0, max_bytes))
+    return {"dirs": len(dirs), "empty_dirs": empties, "files": files, "excluded_files": excluded_files}
+
+
+# ========== INSTRUMENTACIÓN ==========
+class _CountingEntry:
+    """DirEntry que cuenta su primera llamada a stat() (las demás salen de caché)."""
+    __slots__ = ("_entry", "_counts", "_statted", "name", "path")
+
+    def __init__(self, entry, counts: Dict[str, int]):
+        self._entry = entry
+        self._counts = counts
+        self._statted = False
+        self.name = entry.name
+        self.path = entry.path
+
+    def stat(self, *, follow_symlinks: bool = True):
+        if not self._statted:
+            self._statted = True
+            self._counts["entry.stat"] = self._counts.get("entry.stat", 0) + 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self) -> bool:
+        return self._entry.is_symlink()
+
+    def inode(self) -> int:
+        return self._entry.inode()
+
+    def __fspath__(self) -> str:
+        return self.path
+
+
+class _CountingScandir:
+    def __init__(self, iterator, counts: Dict[str, int]):
+        self._iterator = iterator
+        self._counts = counts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> _CountingEntry:
+        return _CountingEntry(next(self._iterator), self._counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._iterator.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+@contextlib.contextmanager
+def count_syscalls():
+    """Sustituye las funciones de os por contadores mientras dura el bloque."""
+    counts: Dict[str, int] = {}
+    originals = {name: getattr(os, name) for name in _COUNTED}
+
+    def wrap(name: str, function: Callable):
+        def counted(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            result = function(*args, **kwargs)
+            return _CountingScandir(result, counts) if name == "scandir" else result
+        return counted
+
+    for name, function in originals.items():
+        setattr(os, name, wrap(name, function))
+    try:
+        yield counts
+    finally:
+        for name, function in originals.items():
+            setattr(os, name, function)
+
+
+def _reset_peak_rss() -> bool:
+    """Reinicia el pico de RSS del proceso (Linux); False si no se puede."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silencia los print y la barra de tqdm, y la pausa final de clean_temp_files (no es trabajo)."""
+    sleep = time.sleep
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        time.sleep = lambda seconds: None
+        try:
+            yield
+        finally:
+            time.sleep = sleep
+
+
+# ========== PUNTOS DE ENTRADA ==========
+def _prepare(entry: str, cleaner: Cleaner, root: str) -> Callable[[], int]:
+    """
+    Prepara un punto de entrada sobre root: devuelve la función a medir, que a su vez
+    devuelve cuántos archivos procesó (lo previo, como listar el árbol, no se mide)
+    """
+    if entry == "clean_temp_files":
+        def run() -> int:
+            previous = tempfile.tempdir
+            tempfile.tempdir = root
+            try:
+                cleaner.clean_temp_files()
+            finally:
+                tempfile.tempdir = previous
+            return cleaner.last_report.files + cleaner.last_report.skipped
+        return run
+    if entry == "clean_directory":
+        def run() -> int:
+            cleaner.clean_directory(root)
+            return cleaner.last_report.files + cleaner.last_report.skipped
+        return run
+    if entry == "should_skip":
+        names = [(os.path.join(r, name), name) for r, ds, fs in os.walk(root) for name in fs]
+
+        def run() -> int:
+            for path, name in names:
+                cleaner.should_skip(path, name)
+            return len(names)
+        return run
+    raise ValueError(f"Punto de entrada desconocido: {entry}")
+
+
+def measure(entry: str, tree: Callable[[str], Dict[str, int]], scratch: Optional[str]) -> Dict:
+    """Mide un punto de entrada: pasada limpia (tiempo) y pasada instrumentada (llamadas y memoria)."""
+    result: Dict = {"entry": entry}
+    for instrumented in (False, True):
+        root = tempfile.mkdtemp(prefix="bench_suite_", dir=scratch)
+        try:
+            result["tree"] = tree(root)
+            run = _prepare(entry, Cleaner(), root)
+            with _quiet():
+                if not instrumented:
+                    start = time.perf_counter()
+                    files = run()
+                    seconds = time.perf_counter() - start
+                    result.update(files=files, seconds=round(seconds, 4),
+                                  files_per_s=round(files / seconds if seconds else 0.0, 1))
+                    continue
+                rss = _reset_peak_rss()
+                tracemalloc.start()
+                with count_syscalls() as counts:
+                    files = run()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            total = sum(counts.values())
+            result.update(syscalls=dict(sorted(counts.items())),
+                          syscalls_per_file=round(total / files, 3) if files else None,
+                          peak_traced_kb=peak // 1024,
+                          peak_rss_kb=_peak_rss_kb() if rss else None)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return result
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, previous: Dict) -> None:
+    """Imprime la variación de cada resultado frente a un JSON anterior."""
+    old = {(r["entry"], r["tree"]["files"]): r for r in previous["results"]}
+    print(f"\nFrente a {previous.get('commit') or 'el JSON anterior'}:")
+    for r in current["results"]:
+        before = old.get((r["entry"], r["tree"]["files"]))
+        if before is None:
+            continue
+        change = (r["seconds"] / before["seconds"] - 1) * 100 if before["seconds"] else 0.0
+        print(f"{r['entry']:17} {r['tree']['files']:>8}  tiempo {change:+6.1f}%  "
+              f"llamadas/archivo {before['syscalls_per_file']} -> {r['syscalls_per_file']}  "
+              f"memoria {before['peak_traced_kb']} -> {r['peak_traced_kb']} KB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=8, help="Subdirectorios por directorio")
+    parser.add_argument("--excluded", type=float, default=0.2, help="Fracción de archivos con patrones excluidos")
+    parser.add_argument("--empty", type=float, default=0.1, help="Directorios vacíos extra por directorio")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--entries", nargs="+", default=ENTRIES, choices=ENTRIES)
+    parser.add_argument("--out", default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--compare", default=None, help="JSON de una ejecución anterior")
+    parser.add_argument("--dir", default=None, help="Carpeta de trabajo (por defecto, la temporal)")
+    args = parser.parse_args()
+
+    extensions = [pattern[1:] for pattern in Cleaner().excluded_patterns if pattern.startswith("*.")]
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "dir")},
+        "results": [],
+    }
+    for files in args.files:
+        def tree(root: str, files=files) -> Dict[str, int]:
+            return build_tree(root, files, args.depth, args.fanout, args.excluded, args.empty,
+                              extensions, seed=args.seed)
+
+        for entry in args.entries:
+            result = measure(entry, tree, args.dir)
+            report["results"].append(result)
+            print(f"{entry:17} {files:>8} archivos  {result['seconds']:7.3f} s  {result['files_per_s']:>10.0f} archivos/s  "
+                  f"{result['syscalls_per_file']} llamadas/archivo  {result['peak_traced_kb']} KB pico"
+                  + (f" ({result['peak_rss_kb']} KB RSS)" if result["peak_rss_kb"] else ""))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Coste del recolector sin interfaz: CPU y memoria residente de python -m core.collector muestreando a un ritmo fijo.
+
+Lanza el recolector como proceso aparte (en una carpeta temporal, con su propia base)
+con y sin modelo predictivo y, pasado el arranque, mide cada segundo su tiempo de CPU y su
+RSS. También mide en este proceso cuánto tarda un paso (muestra, reglas y guardado).
+
+Uso (desde src/):
+    python -m benchmarks.bench_collector [--rate 1.0] [--duration 60] [--warmup 5] [--steps 200]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import psutil
+from core.collector import Collector
+from core.db_manager import DataBase
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_process(rate: float, duration: float, warmup: float, model: bool) -> dict:
+    """CPU (% de un núcleo) y RSS del recolector tras warmup segundos de arranque."""
+    workdir = tempfile.mkdtemp(prefix="bench_collector_")
+    command = [sys.executable, "-m", "core.collector", "--db", os.path.join(workdir, "collector.db"),
+               "--rate", str(rate), "--duration", str(warmup + duration + 5)]
+    if not model:
+        command.append("--no-model")
+    env = {**os.environ, "PYTHONPATH": SRC}
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True)
+    try:
+        process.stdout.readline()  # Línea de arranque: imports y modelo ya cargados
+        proc = psutil.Process(process.pid)
+        startup_rss = proc.memory_info().rss
+        time.sleep(warmup)
+        cpu_start = sum(proc.cpu_times()[:2])
+        wall_start = time.monotonic()
+        rss = []
+        while time.monotonic() - wall_start < duration:
+            time.sleep(1)
+            rss.append(proc.memory_info().rss)
+        cpu = sum(proc.cpu_times()[:2]) - cpu_start
+        wall = time.monotonic() - wall_start
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"cpu_percent": cpu / wall * 100, "cpu_ms_per_sample": cpu / (wall * rate) * 1000,
+            "rss_mb": np.mean(rss) / 2 ** 20, "rss_max_mb": max(rss) / 2 ** 20,
+            "startup_rss_mb": startup_rss / 2 ** 20}
+
+
+def measure_steps(steps: int) -> np.ndarray:
+    """Duración (ms) de cada paso del recolector sin modelo, en este proceso."""
+    workdir = tempfile.mkdtemp(prefix="bench_collector_")
+    db = DataBase(os.path.join(workdir, "collector.db"), write_behind=True)
+    try:
+        collector = Collector(db)
+        times = []
+        for _ in range(steps):
+            start = time.perf_counter()
+            collector.step()
+            times.append((time.perf_counter() - start) * 1000)
+        return np.array(times)
+    finally:
+        db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rate", type=float, default=1.0, help="Muestras por segundo")
+    parser.add_argument("--duration", type=float, default=60, help="Segundos medidos por configuración")
+    parser.add_argument("--warmup", type=float, default=5, help="Segundos de arranque que no se miden")
+    parser.add_argument("--steps", type=int, default=200)
+    args = parser.parse_args()
+
+    times = measure_steps(args.steps)
+    print(f"paso sin modelo: p50 {np.percentile(times, 50):.2f} ms, p99 {np.percentile(times, 99):.2f} ms "
+          f"(antes: cpu_percent(interval=1) bloqueaba 1000 ms por muestra)")
+    for model in (False, True):
+        r = measure_process(args.rate, args.duration, args.warmup, model)
+        print(f"{'con modelo' if model else 'sin modelo':10} a {args.rate:g} Hz: CPU {r['cpu_percent']:.2f}% "
+              f"({r['cpu_ms_per_sample']:.1f} ms por muestra), RSS {r['rss_mb']:.1f} MB "
+              f"(máx. {r['rss_max_mb']:.1f}, al arrancar {r['startup_rss_mb']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Búsqueda de duplicados sobre un árbol sintético lleno de casi-duplicados: pipeline por etapas frente a hashear todo.
+
+Cada original tiene copias exactas, variantes del mismo tamaño que difieren en la cabecera
+(las descarta el hash parcial) y variantes que solo difieren en medio (las descarta el hash
+completo). La referencia hashea entero cada archivo en un solo proceso.
+
+Uso (desde src/):
+    python -m benchmarks.bench_duplicates [--originals 300] [--unique 1000] [--max-kb 1024] [--workers 1 2 4] [--dir /ruta]
+"""
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from core.cleaner import Cleaner
+from core.duplicates import EDGE
+
+
+def build_tree(root: str, originals: int, unique: int, max_kb: int, seed: int = 0) -> int:
+    """Crea originales con copias y casi-duplicados más unique archivos sueltos; devuelve los bytes recuperables esperados."""
+    rng = random.Random(seed)
+    expected = 0
+    for u in range(10):
+        os.makedirs(os.path.join(root, f"usuario{u}"), exist_ok=True)
+    for i in range(originals):
+        folder = os.path.join(root, f"usuario{i % 10}", "Descargas" if i % 2 else "Adjuntos")
+        os.makedirs(folder, exist_ok=True)
+        size = rng.randint(4, max_kb) * 1024
+        data = bytearray(rng.randbytes(size))
+        with open(os.path.join(folder, f"doc{i}.pdf"), "wb") as f:
+            f.write(data)
+        copies = rng.randint(0, 3)
+        for c in range(copies):
+            with open(os.path.join(root, f"usuario{(i + c + 1) % 10}", f"doc{i} ({c + 1}).pdf"), "wb") as f:
+                f.write(data)
+        expected += size * copies
+        # Mismo tamaño, otra cabecera
+        head = bytearray(data)
+        head[0] ^= 0xFF
+        with open(os.path.join(folder, f"doc{i}_v2.pdf"), "wb") as f:
+            f.write(head)
+        if size > 2 * EDGE:
+            # Mismo tamaño, misma cabeza y cola, distinto en medio
+            middle = bytearray(data)
+            middle[size // 2] ^= 0xFF
+            with open(os.path.join(folder, f"doc{i}_v3.pdf"), "wb") as f:
+                f.write(middle)
+    for i in range(unique):
+        # Tamaño en bytes (los originales miden KB exactos): casi siempre único
+        with open(os.path.join(root, f"usuario{i % 10}", f"foto{i}.jpg"), "wb") as f:
+            f.write(rng.randbytes(rng.randint(1, max_kb * 1024)))
+    return expected
+
+
+def naive(root: str) -> int:
+    """Referencia: hash completo de todos los archivos."""
+    groups = {}
+    for r, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(r, name)
+            with open(path, "rb") as f:
+                digest = hashlib.blake2b(f.read(), digest_size=16).digest()
+            groups.setdefault(digest, []).append(os.path.getsize(path))
+    return sum(sizes[0] * (len(sizes) - 1) for sizes in groups.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--originals", type=int, default=300)
+    parser.add_argument("--unique", type=int, default=1000, help="Archivos sin duplicado")
+    parser.add_argument("--max-kb", type=int, default=1024, help="Tamaño máximo de cada original (KB)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--dir", default=None, help="Carpeta donde crear el árbol (por defecto, la temporal)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_dups_", dir=args.dir)
+    try:
+        expected = build_tree(root, args.originals, args.unique, args.max_kb)
+        total = sum(os.path.getsize(os.path.join(r, n)) for r, _, ns in os.walk(root) for n in ns)
+        print(f"{total / 2 ** 20:.1f} MB en el árbol, {expected / 2 ** 20:.1f} MB duplicados, {os.cpu_count()} CPU")
+        start = time.perf_counter()
+        reference = naive(root)
+        seconds = time.perf_counter() - start
+        print(f"{'todo':10} {seconds:6.2f} s  {total / seconds / 2 ** 20:7.1f} MB/s  "
+              f"{reference / 2 ** 20:.1f} MB recuperables")
+        cleaner = Cleaner()
+        for workers in args.workers:
+            report = cleaner.find_duplicates([root], max_workers=workers)
+            ok = "" if report.reclaimable == expected == reference else "  ¡no coincide con la referencia!"
+            print(f"{'etapas x' + str(workers):10} {report.seconds:6.2f} s  {total / report.seconds / 2 ** 20:7.1f} MB/s  "
+                  f"{report.reclaimable / 2 ** 20:.1f} MB recuperables en {len(report.groups)} grupos; "
+                  f"hash parcial {report.partial_hashed} de {report.scanned}, completo {report.full_hashed}, "
+                  f"{report.hashed_bytes / 2 ** 20:.1f} MB leídos{ok}")
+        files, freed, errors = cleaner.delete_duplicates(report)
+        left = cleaner.find_duplicates([root], max_workers=1)
+        print(f"borrado: {files} copias, {freed / 2 ** 20:.1f} MB, {len(errors)} errores; "
+              f"quedan {len(left.groups)} grupos")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
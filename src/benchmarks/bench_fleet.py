@@ -0,0 +1,138 @@
+"""
+Generador de carga para el agregador de flota: simula miles de agentes que suben
+lotes de muestras por TCP y mide filas/s ingeridas y latencia de confirmación (p50/p99).
+El servidor corre en un proceso aparte (python -m core.fleet_server) sobre una base temporal.
+
+Uso (desde src/):
+    python -m benchmarks.bench_fleet [--agents 2000] [--duration 20] [--samples 10] [--interval 1.0]
+    python -m benchmarks.bench_fleet --connect 127.0.0.1:8765   # contra un servidor ya arrancado
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+
+def free_port() -> int:
+    """Puerto TCP libre en localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_upload(host: str, start_ts: int, samples: int, rng: random.Random) -> bytes:
+    """Línea del protocolo con samples muestras consecutivas y, a veces, una alerta."""
+    rows = [[start_ts + i, round(rng.uniform(0, 100), 1), round(rng.uniform(20, 90), 1),
+             round(rng.uniform(40, 60), 1), rng.randint(0, 3)] for i in range(samples)]
+    alerts = [[start_ts, "CPU alta", "HIGH"]] if rng.random() < 0.05 else []
+    return json.dumps({"host": host, "samples": rows, "alerts": alerts}).encode() + b"\n"
+
+
+async def agent(name: str, address: Tuple[str, int], args, deadline: float,
+                latencies: List[float], counters: Dict[str, int]) -> None:
+    """Un agente: conexión persistente, una subida cada interval segundos (con desfase inicial)."""
+    rng = random.Random(name)
+    await asyncio.sleep(rng.uniform(0, args.interval))
+    try:
+        reader, writer = await asyncio.open_connection(*address)
+    except OSError:
+        counters["connect_errors"] += 1
+        return
+    ts = int(time.time()) - 10 ** 6
+    try:
+        while time.monotonic() < deadline:
+            line = make_upload(name, ts, args.samples, rng)
+            started = time.perf_counter()
+            writer.write(line)
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            if response.get("ok"):
+                latencies.append(time.perf_counter() - started)
+                counters["rows"] += response["rows"]
+                ts += args.samples
+                await asyncio.sleep(args.interval)
+            elif response.get("error") == "overloaded":
+                counters["rejected"] += 1
+                await asyncio.sleep(response.get("retry_after", 0.5))
+            else:
+                counters["errors"] += 1
+                break
+    except (ConnectionError, json.JSONDecodeError):
+        counters["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(address: Tuple[str, int], args) -> Dict[str, float]:
+    latencies: List[float] = []
+    counters = {"rows": 0, "rejected": 0, "errors": 0, "connect_errors": 0}
+    start = time.monotonic()
+    deadline = start + args.duration
+    await asyncio.gather(*(agent(f"PC-{i:05d}", address, args, deadline, latencies, counters)
+                           for i in range(args.agents)))
+    elapsed = time.monotonic() - start
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else float("nan")
+
+    return {"agents": args.agents, "seconds": round(elapsed, 1), "uploads": len(latencies),
+            "rows_per_s": round(counters["rows"] / elapsed), "p50_ms": round(percentile(0.50), 1),
+            "p99_ms": round(percentile(0.99), 1), "rejected": counters["rejected"],
+            "errors": counters["errors"] + counters["connect_errors"]}
+
+
+def wait_listening(address: Tuple[str, int], timeout: float = 15) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(address, timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"El agregador no escucha en {address}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=20, help="Segundos de carga")
+    parser.add_argument("--samples", type=int, default=10, help="Muestras por subida")
+    parser.add_argument("--interval", type=float, default=1.0, help="Segundos entre subidas de un agente")
+    parser.add_argument("--max-pending", type=int, default=200000, help="Umbral de rechazo del servidor")
+    parser.add_argument("--connect", help="host:puerto de un agregador ya arrancado")
+    args = parser.parse_args()
+
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        result = asyncio.run(run_load((host, int(port)), args))
+        print(json.dumps(result, indent=2))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = ("127.0.0.1", free_port())
+        server = subprocess.Popen(
+            [sys.executable, "-m", "core.fleet_server", "--db", os.path.join(tmp, "fleet.db"),
+             "--host", address[0], "--port", str(address[1]), "--max-pending", str(args.max_pending)],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        try:
+            wait_listening(address)
+            result = asyncio.run(run_load(address, args))
+        finally:
+            server.terminate()
+            output, _ = server.communicate(timeout=30)
+    print(json.dumps(result, indent=2))
+    summary = [line for line in output.splitlines() if line.startswith("Resumen")]
+    if summary:
+        print(summary[-1])
+
+
+if __name__ == "__main__":
+    main()
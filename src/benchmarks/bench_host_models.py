@@ -0,0 +1,106 @@
+"""
+Modelos por host: entrenamiento de una flota sintética en paralelo (ProcessPoolExecutor
+con memoria compartida) frente a un solo proceso, y puntuación con el registro LRU.
+
+Uso (desde src/):
+    python -m benchmarks.bench_host_models [--hosts 40] [--rows 20000] [--groups 4] [--capacity 8]
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from core.compiled_forest import _ARRAYS
+from core.db_manager import DataBase
+from core.host_training import build_matrix, train_host_models
+from core.model_registry import HostModelRegistry, model_key
+
+
+def fill_fleet(db: DataBase, hosts: int, rows: int, groups: int, seed: int = 0) -> None:
+    """Hosts con perfiles de carga distintos por grupo; la mitad de los hosts sin grupo."""
+    rng = np.random.default_rng(seed)
+    start = int(time.time()) - rows
+    for h in range(hosts):
+        group = f"clase-{h % groups}" if h % 2 == 0 else None
+        host_id = db.register_host(f"PC-{h:04d}", group)
+        level = 10 + 70 * rng.random(3)
+        data = np.clip(level + rng.normal(0, 3, (rows, 3)), 0, 100).round(2)
+        errors = rng.poisson(0.1, rows)
+        db.write_host_batch({host_id: [(cpu, ram, disk, int(e), start + i)
+                                       for i, ((cpu, ram, disk), e) in enumerate(zip(data.tolist(), errors))]})
+
+
+def transfer_cost(X: np.ndarray) -> dict:
+    """Copia a memoria compartida frente a serializar la matriz (lo que evita el pool)."""
+    start = time.perf_counter()
+    shm = shared_memory.SharedMemory(create=True, size=X.nbytes)
+    np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[:] = X
+    shm_ms = (time.perf_counter() - start) * 1000
+    shm.close()
+    shm.unlink()
+    start = time.perf_counter()
+    pickle.loads(pickle.dumps(X))
+    pickle_ms = (time.perf_counter() - start) * 1000
+    return {"matrix_mb": round(X.nbytes / 2 ** 20, 2), "shm_ms": round(shm_ms, 2), "pickle_ms": round(pickle_ms, 2)}
+
+
+def score_fleet(db: DataBase, registry: HostModelRegistry, rounds: int, batch: int) -> dict:
+    """Recorre todos los hosts rounds veces puntuando batch muestras de cada uno."""
+    hosts = [(host_id, model_key(name, group)) for host_id, name, group in db.get_hosts()]
+    samples = {host_id: np.random.default_rng(host_id).uniform(0, 100, (batch, 4)) for host_id, _ in hosts}
+    resident = 0
+    scored = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for host_id, key in hosts:
+            model = registry.get(key)
+            if model is None:
+                continue
+            model.predict(samples[host_id])
+            scored += batch
+            resident = max(resident, sum(getattr(m, name).nbytes
+                                         for m in map(registry._models.get, registry.loaded()) if m is not None
+                                         for name in _ARRAYS))
+    elapsed = time.perf_counter() - start
+    lookups = registry.stats["hits"] + registry.stats["misses"]
+    return {"capacity": registry.capacity, "samples_per_s": round(scored / elapsed),
+            "hit_rate": round(registry.stats["hits"] / lookups, 3), "loads": registry.stats["loads"],
+            "resident_models": len(registry.loaded()), "peak_resident_mb": round(resident / 2 ** 20, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hosts", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=20000, help="Muestras por host")
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--sample-size", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--capacity", type=int, default=8, help="Modelos en memoria del registro")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DataBase(os.path.join(tmp, "fleet.db"), layout="compact")
+        fill_fleet(db, args.hosts, args.rows, args.groups)
+        print(f"Flota: {args.hosts} hosts × {args.rows} muestras, {os.cpu_count()} CPU")
+        print("Transferencia de una matriz:", transfer_cost(build_matrix(db, [1], args.sample_size)))
+
+        for workers in sorted({1, args.workers}):
+            registry = HostModelRegistry(os.path.join(tmp, f"models-{workers}"))
+            start = time.perf_counter()
+            results = train_host_models(db, registry, sample_size=args.sample_size, max_workers=workers)
+            elapsed = time.perf_counter() - start
+            trained = sum(1 for summary in results.values() if "fingerprint" in summary)
+            print(f"Entrenamiento con {workers} proceso(s): {trained} modelos en {elapsed:.1f} s "
+                  f"({trained / elapsed:.2f} modelos/s)")
+
+        for capacity in (args.capacity, args.hosts):
+            registry = HostModelRegistry(registry.model_dir, capacity=capacity)
+            print("Puntuación:", score_fleet(db, registry, args.rounds, batch=100))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Detección de archivos en uso: índice de archivos abiertos (OpenFileIndex) frente a abrir un handle por archivo.
+
+Un proceso hijo mantiene abiertos --held archivos del árbol; se mide lo que cuesta construir el
+índice, la consulta por archivo de cada método, si el índice encuentra todos los archivos retenidos
+y si una limpieza real los conserva. El sondeo por archivo es os.open/os.close, lo más parecido
+fuera de Windows a la llamada CreateFileW que hacía is_file_locked.
+
+Uso (desde src/):
+    python -m benchmarks.bench_open_files [--files 100000] [--fanout 20] [--held 300] [--dir /ruta]
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.bench_clean_engine import build_tree
+from core.cleaner import Cleaner
+from core.open_files import OpenFileIndex
+
+# Abre las rutas recibidas por stdin, avisa con una línea y espera hasta que se cierre stdin
+_HOLDER = (
+    "import sys\n"
+    "paths = [line.rstrip('\\n') for line in iter(sys.stdin.readline, '\\n')]\n"
+    "handles = [open(p, 'rb') for p in paths]\n"
+    "print(len(handles), flush=True)\n"
+    "sys.stdin.read()\n"
+)
+
+
+def probe(path: str) -> bool:
+    """Sondeo por archivo: abrir y cerrar un handle."""
+    try:
+        os.close(os.open(path, os.O_RDONLY))
+        return False
+    except OSError:
+        return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--fanout", type=int, default=20, help="Entradas por directorio")
+    parser.add_argument("--held", type=int, default=300, help="Archivos que mantiene abiertos el proceso hijo")
+    parser.add_argument("--dir", default=None, help="Carpeta donde crear el árbol (por defecto, la temporal)")
+    args = parser.parse_args()
+
+    root = os.path.realpath(tempfile.mkdtemp(prefix="bench_open_", dir=args.dir))
+    holder = None
+    try:
+        build_tree(root, args.files, args.fanout)
+        files = [os.path.join(r, name) for r, _, names in os.walk(root) for name in names]
+        # Solo archivos que la limpieza borraría, para que conservarlos dependa del índice
+        cleaner = Cleaner()
+        candidates = [path for path in files if not cleaner.matcher.excluded(path, os.path.basename(path))]
+        held = random.Random(0).sample(candidates, min(args.held, len(candidates)))
+        holder = subprocess.Popen([sys.executable, "-c", _HOLDER], stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE, text=True)
+        holder.stdin.write("\n".join(held) + "\n\n")
+        holder.stdin.flush()
+        holder.stdout.readline()
+
+        index = OpenFileIndex(ttl=60.0)
+        builds = []
+        for _ in range(3):
+            index.refresh(force=True)
+            builds.append(index.build_ms)
+        print(f"{len(files)} archivos, {len(held)} retenidos; índice: {len(index)} rutas abiertas, "
+              f"construcción {min(builds):.1f} ms (mejor de 3)")
+
+        start = time.perf_counter()
+        found = sum(index.is_open(path) for path in files)
+        index_us = (time.perf_counter() - start) / len(files) * 1e6
+        start = time.perf_counter()
+        probed = sum(probe(path) for path in files)
+        probe_us = (time.perf_counter() - start) / len(files) * 1e6
+        recall = sum(index.is_open(path) for path in held) / len(held) if held else 1.0
+        print(f"sondeo por archivo: {probe_us:6.2f} µs/archivo ({probed} en uso detectados)")
+        print(f"índice:             {index_us:6.2f} µs/archivo ({found} en uso detectados), "
+              f"{probe_us / index_us:.0f}x; total con construcción "
+              f"{(index_us * len(files) / 1000 + min(builds)):.0f} ms frente a {probe_us * len(files) / 1000:.0f} ms")
+        print(f"recall de los archivos retenidos: {recall:.1%}")
+
+        report = cleaner._run_engine(root)
+        kept = sum(os.path.exists(path) for path in held)
+        print(f"limpieza: {report.files} archivos borrados en {report.seconds:.2f} s, "
+              f"{kept}/{len(held)} retenidos conservados")
+    finally:
+        if holder is not None:
+            holder.stdin.close()
+            holder.wait()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compara las reglas de exclusión de Cleaner antiguas (subcadena + fnmatch patrón a patrón)
+con PathMatcher (regex única + trie de directorios) sobre una lista sintética de rutas.
+
+Uso (desde src/):
+    python -m benchmarks.bench_path_matcher [--paths 500000] [--repeat 3]
+"""
+import argparse
+import fnmatch
+import os
+import random
+import time
+from core.cleaner import Cleaner
+from core.path_matcher import PathMatcher
+
+
+def legacy_skip(path: str, excluded_dirs, patterns) -> bool:
+    """Reglas de should_skip antes de PathMatcher (sin la comprobación de bloqueo)."""
+    path_lower = path.lower()
+    for excluded_dir in excluded_dirs:
+        if excluded_dir.lower() in path_lower:
+            return True
+    filename = os.path.basename(path)
+    return any(fnmatch.fnmatch(filename.lower(), pattern.lower()) for pattern in patterns)
+
+
+def synthetic_paths(n: int, roots, seed: int = 0):
+    """(ruta, nombre) bajo las raíces dadas, con directorios excluidos y extensiones variadas."""
+    rng = random.Random(seed)
+    dirs = ["cache", "build", "Important", "logs", "session-%d", "tmp%04x", "Prefetch", "Critical", "System32"]
+    extensions = [".txt", ".tmp", ".LOG", ".json", ".js", ".dll", ".bak", ".dat", ".png", "", ".db-wal"]
+    paths = []
+    for _ in range(n):
+        parts = [rng.choice(roots)]
+        for _ in range(rng.randint(0, 4)):
+            name = rng.choice(dirs)
+            parts.append(name % rng.randint(0, 9999) if "%" in name else name)
+        name = f"f{rng.randint(0, 10 ** 6)}{rng.choice(extensions)}"
+        paths.append((os.path.join(*parts, name), name))
+    return paths
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paths", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    cleaner = Cleaner()
+    excluded_dirs, patterns = list(cleaner.excluded_dirs), cleaner.excluded_patterns
+    roots = [os.path.dirname(d) for d in excluded_dirs] + [d for d in excluded_dirs]
+    paths = synthetic_paths(args.paths, roots)
+    only_paths = [path for path, _ in paths]
+
+    start = time.perf_counter()
+    matcher = PathMatcher(excluded_dirs, patterns)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    legacy = [legacy_skip(path, excluded_dirs, patterns) for path in only_paths]
+    compiled = [matcher.excluded(path, name) for path, name in paths]
+    differences = [path for path, old, new in zip(only_paths, legacy, compiled) if old != new]
+
+    results = {
+        "antiguo": timed(lambda: [legacy_skip(p, excluded_dirs, patterns) for p in only_paths], args.repeat),
+        "PathMatcher (ruta)": timed(lambda: [matcher.excluded(p) for p in only_paths], args.repeat),
+        "PathMatcher (ruta, nombre)": timed(lambda: [matcher.excluded(p, n) for p, n in paths], args.repeat),
+    }
+    print(f"{args.paths} rutas, {sum(compiled)} excluidas, compilación {compile_ms:.2f} ms")
+    for label, seconds in results.items():
+        print(f"{label:28} {seconds:7.2f} s  {seconds / args.paths * 1e6:6.2f} µs/ruta  "
+              f"{results['antiguo'] / seconds:5.1f}x")
+    # La subcadena antigua también excluía hermanos con el mismo prefijo (p. ej. "important2")
+    print(f"Decisiones distintas: {len(differences)}")
+    for path in differences[:5]:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
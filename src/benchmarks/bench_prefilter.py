@@ -0,0 +1,87 @@
+"""
+Cascada prefiltro EWMA + IsolationForest: fracción de muestras que no llegan al
+modelo, anomalías conservadas, recall frente a error_count > 0 y coste por muestra.
+
+Uso (desde src/):
+    python -m benchmarks.bench_prefilter [--rows 50000] [--k 3] [--alpha 0.05]
+    python -m benchmarks.bench_prefilter --db ../system_monitor.db   # histórico real
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from core.db_manager import DataBase
+from core.ai_predictive import PredictiveAI
+from core.prefilter import StreamingPrefilter, replay_cascade
+
+
+def synthetic_stream(n: int, interval: int = 60, seed: int = 0) -> np.ndarray:
+    """
+    Muestras (cpu, ram, disk, error_count, ts) de un equipo casi siempre tranquilo:
+    ciclo diario suave, ruido pequeño e incidentes esporádicos con errores.
+    """
+    rng = np.random.default_rng(seed)
+    ts = int(time.time()) - n * interval + np.arange(n) * interval
+    day = np.sin(2 * np.pi * (ts % 86400) / 86400)
+    cpu = 12 + 6 * day + rng.normal(0, 1.5, n)
+    ram = 45 + 3 * day + rng.normal(0, 0.5, n)
+    disk = 50 + np.cumsum(rng.normal(0, 0.001, n))
+    errors = np.zeros(n)
+    for start in rng.choice(n - 30, size=max(1, n // 2000), replace=False):
+        length = rng.integers(3, 30)
+        cpu[start:start + length] = rng.uniform(75, 100, length)
+        ram[start:start + length] += rng.uniform(10, 40, length)
+        errors[start:start + length] = rng.integers(1, 5, length)
+    return np.column_stack([np.clip(cpu, 0, 100), np.clip(ram, 0, 100), np.clip(disk, 0, 100), errors, ts])
+
+
+def per_sample_us(ai: PredictiveAI, X: np.ndarray) -> float:
+    """Coste medio de analyze_predictive por muestra (µs)."""
+    start = time.perf_counter()
+    for cpu, ram, disk, errors in X.tolist():
+        ai.analyze_predictive(cpu, ram, disk, errors)
+    return (time.perf_counter() - start) / len(X) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000, help="Muestras sintéticas")
+    parser.add_argument("--db", help="Reproduce el histórico de esta base en lugar de datos sintéticos")
+    parser.add_argument("--k", type=float, default=3.0, help="Anchura de la envolvente en σ")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Factor de olvido EWMA")
+    parser.add_argument("--timing", type=int, default=5000, help="Muestras para medir el coste")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            db = DataBase(args.db)
+            arrays = db.get_stats_arrays()
+            data = np.column_stack([arrays[name] for name in ("cpu", "ram", "disk", "error_count", "ts")])
+        else:
+            db = DataBase(os.path.join(tmp, "bench.db"), retention={"raw": None})
+            data = synthetic_stream(args.rows)
+            with db.conn:
+                db._write_stats(db.conn, [tuple(row) for row in data.tolist()])
+        ai = PredictiveAI(db.db_path, model_path=os.path.join(tmp, "model.pkl"), db=db)
+        ai.trainer.wait_idle()
+        X = data[:, :4]
+
+        report = replay_cascade(X, ai.predict_batch, StreamingPrefilter(alpha=args.alpha, k=args.k),
+                                truth=X[:, 3] > 0)
+        timing = X[-args.timing:]
+        direct = per_sample_us(ai, timing)
+        ai.prefilter = StreamingPrefilter(alpha=args.alpha, k=args.k)
+        ai.prefilter.filter_batch(X[:-args.timing])  # Envolvente ya formada, como en producción
+        cascaded = per_sample_us(ai, timing)
+        ai.close()
+        db.close()
+
+    for key, value in report.items():
+        print(f"{key:<20}{value:>12.4f}" if isinstance(value, float) else f"{key:<20}{value:>12}")
+    print(f"{'µs/muestra modelo':<20}{direct:>12.1f}")
+    print(f"{'µs/muestra cascada':<20}{cascaded:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Limpiezas repetidas sobre un árbol que apenas cambia: recorrido completo frente al
+índice de escaneo (ScanIndex), que no vuelve a listar los directorios con el mismo mtime.
+
+Uso (desde src/):
+    python -m benchmarks.bench_scan_index [--files 200000] [--fanout 20] [--changes 10] [--rounds 3]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from benchmarks.bench_clean_engine import build_tree
+from core.cleaner import Cleaner
+
+
+def run(cleaner: Cleaner, root: str):
+    start = time.perf_counter()
+    report = cleaner._run_engine(root)
+    return time.perf_counter() - start, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=200000)
+    parser.add_argument("--fanout", type=int, default=20, help="Entradas por directorio")
+    parser.add_argument("--changes", type=int, default=10, help="Archivos nuevos entre pasadas")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--dir", default=None, help="Carpeta donde crear el árbol (por defecto, la temporal)")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_index_", dir=args.dir)
+    index_dir = tempfile.mkdtemp()
+    try:
+        build_tree(root, args.files, args.fanout)
+        full = Cleaner()
+        indexed = Cleaner(scan_index=os.path.join(index_dir, "scan_index.db"))
+        seconds, report = run(indexed, root)
+        print(f"Primera limpieza: {report.files} archivos en {seconds:.2f} s")
+        # Una pasada más para asentar el índice (los directorios recién limpiados se vuelven a listar una vez)
+        run(indexed, root)
+        dirs = [path for path, _, _ in os.walk(root)]
+        rng = random.Random(0)
+        for round_ in range(args.rounds):
+            for i in range(args.changes):
+                with open(os.path.join(rng.choice(dirs), f"nuevo{round_}_{i}.txt"), "wb") as f:
+                    f.write(b"x" * 1024)
+            start = time.perf_counter()
+            preview = indexed.preview(root)
+            preview_s = time.perf_counter() - start
+            indexed_s, indexed_report = run(indexed, root)
+            full_s, _ = run(full, root)  # Ya no queda nada que borrar: mide solo el recorrido
+            print(f"pasada {round_ + 1}: completo {full_s:6.3f} s | con índice {indexed_s:6.3f} s "
+                  f"({full_s / indexed_s:4.1f}x, {indexed_report.files} borrados, "
+                  f"{indexed_report.unchanged} directorios sin listar) | simulación {preview_s:6.3f} s "
+                  f"({len(preview)} candidatos)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Latencia de inferencia de PredictiveAI: fila a fila frente a lotes.
+
+Uso (desde src/):
+    python -m benchmarks.bench_scoring [--rows 20000] [--single 300] [--batch 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from core.db_manager import DataBase
+from core.ai_predictive import PredictiveAI
+from benchmarks.bench_storage import fill
+
+
+def synthetic_samples(n: int, seed: int = 0) -> np.ndarray:
+    """Muestras N×4 (cpu, ram, disk, error_count) con algunos picos."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.uniform(0, 100, n), rng.uniform(20, 90, n),
+                         rng.uniform(40, 60, n), rng.integers(0, 4, n)])
+    return X
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000, help="Filas de entrenamiento")
+    parser.add_argument("--single", type=int, default=300, help="Llamadas fila a fila")
+    parser.add_argument("--batch", type=int, default=10000, help="Tamaño del lote")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DataBase(os.path.join(tmp, "bench.db"), retention={"raw": None})
+        fill(db, args.rows)
+        ai = PredictiveAI(db.db_path, model_path=os.path.join(tmp, "model.pkl"), db=db)
+        ai.trainer.wait_idle()
+        X = synthetic_samples(max(args.batch, args.single))
+
+        # Ruta original: modelo sklearn y un DataFrame de una fila por llamada
+        sklearn_model = joblib.load(ai.model_path)
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for row in X[:args.single]:
+                sklearn_model.predict(pd.DataFrame([row], columns=ai.feature_names))
+        legacy = (time.perf_counter() - start) / args.single
+
+        start = time.perf_counter()
+        for cpu, ram, disk, errors in X[:args.single]:
+            ai.predict_anomaly(cpu, ram, disk, errors)
+        single = (time.perf_counter() - start) / args.single
+
+        start = time.perf_counter()
+        ai.score_batch(X[:args.batch])
+        batch = (time.perf_counter() - start) / args.batch
+        ai.close()
+        db.close()
+
+    print(f"{'ruta':<28}{'µs/muestra':>12}{'muestras/s':>14}")
+    for name, seconds in (("DataFrame por fila", legacy), ("predict_anomaly", single),
+                          (f"score_batch ({args.batch})", batch)):
+        print(f"{name:<28}{seconds * 1e6:>12.1f}{1 / seconds:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
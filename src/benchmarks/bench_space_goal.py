@@ -0,0 +1,69 @@
+"""
+Limpieza con objetivo de espacio: liberar una fracción de los bytes de un árbol con cada política frente a borrarlo todo.
+
+Comprueba además que la selección acotada del montículo coincide con ordenar la lista
+completa de candidatos y cortar donde se cubre el objetivo.
+
+Uso (desde src/):
+    python -m benchmarks.bench_space_goal [--files 100000] [--fanout 20] [--fraction 0.1] [--dir /ruta]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from benchmarks.bench_clean_engine import build_tree
+from core.clean_engine import iter_candidates
+from core.cleaner import Cleaner
+from core.space_goal import POLICIES
+
+
+def sorted_prefix(scores, sizes, target: int):
+    """Referencia: ordena todos los candidatos y devuelve las puntuaciones del prefijo que cubre target."""
+    total, chosen = 0, []
+    for path in sorted(scores, key=scores.get, reverse=True):
+        if total >= target:
+            break
+        chosen.append(scores[path])
+        total += sizes[path]
+    return chosen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--fanout", type=int, default=20, help="Entradas por directorio")
+    parser.add_argument("--fraction", type=float, default=0.1, help="Fracción de los bytes borrables a liberar")
+    parser.add_argument("--dir", default=None, help="Carpeta donde crear el árbol (por defecto, la temporal)")
+    args = parser.parse_args()
+
+    cleaner = Cleaner()
+    print(f"{args.files} archivos, objetivo {args.fraction:.0%} de los bytes borrables")
+    for policy in [None] + list(POLICIES):
+        root = tempfile.mkdtemp(prefix="bench_goal_", dir=args.dir)
+        try:
+            build_tree(root, args.files, args.fanout)
+            if policy is None:
+                report = cleaner._run_engine(root)
+                print(f"{'todo':9} {report.seconds:6.2f} s  {report.bytes_freed / 2 ** 20:7.1f} MB  "
+                      f"{report.bytes_freed / report.seconds / 2 ** 20:7.1f} MB/s  {report.files} archivos")
+                continue
+            # Se compara por puntuación: con empates cualquier archivo del mismo valor vale
+            now = time.time()
+            sizes, scores = {}, {}
+            for path, st in iter_candidates(cleaner.matcher, root):
+                sizes[path] = st.st_size
+                scores[path] = POLICIES[policy](st, now)
+            target = int(sum(sizes.values()) * args.fraction)
+            expected = sorted_prefix(scores, sizes, target)
+            report = cleaner.free_space(root, free_bytes=target, policy=policy)
+            same = sorted(scores[path] for path, _ in report.selected) == sorted(expected)
+            print(f"{policy:9} {report.seconds:6.2f} s  {report.freed / 2 ** 20:7.1f} MB  "
+                  f"{report.bytes_per_s / 2 ** 20:7.1f} MB/s  {report.files} archivos de {report.scanned} "
+                  f"{'(objetivo cumplido)' if report.met else '(objetivo NO cumplido)'}"
+                  f"{'' if same else '  ¡selección distinta de la referencia!'}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Arranque e inferencia: modelo sklearn (.pkl con joblib) frente al bosque exportado (.npz).
+Mide tiempo de importación, de carga del modelo y latencia por muestra, cada ruta
+en un proceso nuevo para que ninguna herede módulos ya importados.
+
+Uso (desde src/):
+    python -m benchmarks.bench_startup [--rows 20000] [--single 500] [--batch 10000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def measure(mode: str, model_path: str, single: int, batch: int) -> dict:
+    """Importa, carga y puntúa con la ruta indicada (se ejecuta en el proceso hijo)."""
+    start = time.perf_counter()
+    if mode == "sklearn":
+        import joblib
+        import sklearn.ensemble  # noqa: F401 (lo que joblib.load necesita para deserializar)
+    else:
+        from core.compiled_forest import CompiledForest
+    import numpy as np
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if mode == "sklearn":
+        model = joblib.load(model_path)
+    else:
+        model = CompiledForest.load(os.path.splitext(model_path)[0] + ".npz")
+    load_s = time.perf_counter() - start
+
+    from benchmarks.bench_scoring import synthetic_samples
+    X = synthetic_samples(max(single, batch), seed=1)
+    latencies = []
+    for row in X[:single]:
+        start = time.perf_counter()
+        model.score_samples(row.reshape(1, -1))
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.score_samples(X[:batch])
+    batch_s = time.perf_counter() - start
+    return {"mode": mode, "import_ms": round(import_s * 1000, 1), "load_ms": round(load_s * 1000, 1),
+            "p50_us": round(float(np.percentile(latencies, 50)) * 1e6, 1),
+            "p99_us": round(float(np.percentile(latencies, 99)) * 1e6, 1),
+            "batch_us": round(batch_s / batch * 1e6, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000, help="Filas de entrenamiento")
+    parser.add_argument("--single", type=int, default=500, help="Llamadas de una fila")
+    parser.add_argument("--batch", type=int, default=10000, help="Tamaño del lote")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args.single, args.batch)))
+        return
+
+    from core.db_manager import DataBase
+    from core.ai_predictive import PredictiveAI
+    from benchmarks.bench_storage import fill
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DataBase(os.path.join(tmp, "bench.db"), retention={"raw": None})
+        fill(db, args.rows)
+        model_path = os.path.join(tmp, "model.pkl")
+        ai = PredictiveAI(db.db_path, model_path=model_path, db=db)
+        ai.trainer.wait_idle()
+        ai.close()
+        db.close()
+        for mode in ("sklearn", "compiled"):
+            out = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", mode, model_path,
+                                  "--single", str(args.single), "--batch", str(args.batch)],
+                                 capture_output=True, text=True, check=True)
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'ruta':<10}{'import ms':>11}{'carga ms':>10}{'p50 µs':>10}{'p99 µs':>10}{'lote µs/m':>11}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['import_ms']:>11}{r['load_ms']:>10}{r['p50_us']:>10}"
+              f"{r['p99_us']:>10}{r['batch_us']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Compara el formato legacy y el compacto de system_stats:
+bytes por fila y tiempo de las consultas por rango.
+
+Uso (desde src/):
+    python -m benchmarks.bench_storage [--rows 200000] [--days 7] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict
+from core.db_manager import DataBase
+
+
+def fill(db: DataBase, rows: int, interval: int = 60) -> None:
+    """Inserta rows muestras sintéticas espaciadas interval segundos hasta ahora."""
+    rng = random.Random(42)
+    start = int(time.time()) - rows * interval
+    batch = []
+    for i in range(rows):
+        batch.append((round(rng.uniform(0, 100), 1), round(rng.uniform(20, 90), 1),
+                      round(rng.uniform(40, 60), 1), rng.randint(0, 3), start + i * interval))
+        if len(batch) == 10000:
+            with db.conn:
+                db._write_stats(db.conn, batch)
+            batch = []
+    if batch:
+        with db.conn:
+            db._write_stats(db.conn, batch)
+
+
+def table_bytes(db_path: str, tables) -> int:
+    """Bytes ocupados por las tablas e índices indicados (dbstat o tamaño de archivo)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        placeholders = ", ".join("?" for _ in tables)
+        names = [row[0] for row in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders})", tuple(tables))]
+        placeholders = ", ".join("?" for _ in names)
+        return conn.execute(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})",
+                            tuple(names)).fetchone()[0]
+    except sqlite3.OperationalError:
+        return os.path.getsize(db_path)
+    finally:
+        conn.close()
+
+
+def timed(fn, repeat: int) -> float:
+    """Mejor tiempo (ms) de repeat ejecuciones."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(rows: int, days: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout, tables in (("legacy", ["system_stats"]), ("compact", ["system_stats_compact"])):
+            path = os.path.join(tmp, f"{layout}.db")
+            db = DataBase(path, layout=layout, retention={"raw": None})
+            fill(db, rows)
+            db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            size = table_bytes(path, tables)
+            results[layout] = {
+                "bytes_per_row": size / rows,
+                "historical_ms": timed(lambda: db.get_historical_stats(days), repeat),
+                "arrays_ms": timed(lambda: db.get_stats_arrays(days), repeat),
+                "full_arrays_ms": timed(lambda: db.get_stats_arrays(), repeat),
+            }
+            db.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.days, args.repeat)
+    legacy, compact = results["legacy"], results["compact"]
+    print(f"{'métrica':<16}{'legacy':>12}{'compact':>12}{'mejora':>10}")
+    for key in legacy:
+        ratio = legacy[key] / compact[key] if compact[key] else float("inf")
+        print(f"{key:<16}{legacy[key]:>12.2f}{compact[key]:>12.2f}{ratio:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compara el entrenamiento con el histórico completo en memoria (fetch_data) frente
+al muestreo reservoir por bloques: memoria pico (RSS) y tiempo de ajuste.
+Cada medición se hace en un proceso hijo para que el pico de RSS sea independiente.
+
+Uso (desde src/):
+    python -m benchmarks.bench_training [--sizes 50000 200000 800000] [--sample-size 50000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from core.db_manager import DataBase
+from benchmarks.bench_storage import fill
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso actual en MB (ru_maxrss está en KB en Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(db_path: str, mode: str, sample_size: int, weighting: str) -> dict:
+    """Entrena una vez en el modo indicado (se ejecuta dentro del proceso hijo)."""
+    import numpy as np
+    from sklearn.ensemble import IsolationForest
+    from core.ai_predictive import PredictiveAI
+
+    db = DataBase(db_path)
+    model_path = os.path.join(os.path.dirname(db_path), f"model-{mode}.pkl")
+    # Sin pasar por __init__: el constructor lanzaría un entrenamiento en segundo plano
+    ai = PredictiveAI.__new__(PredictiveAI)
+    ai.db_path, ai.db, ai.training_days = db_path, db, None
+    ai.sample_size, ai.sample_weighting, ai.half_life_days = sample_size, weighting, 7
+    ai.chunk_size, ai.model_path = 50000, model_path
+    ai.features, ai.feature_names = None, ["cpu", "ram", "disk", "error_count"]
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "full":
+        X = ai.fetch_data()[ai.feature_names].to_numpy(dtype=np.float64)
+    else:
+        X = ai.load_training_sample()
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    IsolationForest(contamination=0.05, n_estimators=100, random_state=42, n_jobs=-1).fit(X)
+    fit_s = time.perf_counter() - start
+    db.close()
+    return {"mode": mode, "train_rows": len(X), "load_s": round(load_s, 3),
+            "fit_s": round(fit_s, 3), "baseline_mb": round(baseline, 1),
+            "peak_mb": round(peak_rss_mb(), 1)}
+
+
+def run_child(db_path: str, mode: str, sample_size: int, weighting: str) -> dict:
+    """Lanza measure en un proceso nuevo y devuelve su resultado."""
+    out = subprocess.run([sys.executable, "-m", "benchmarks.bench_training", "--child", db_path, mode,
+                          "--sample-size", str(sample_size), "--weighting", weighting],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50000, 200000, 800000])
+    parser.add_argument("--sample-size", type=int, default=50000)
+    parser.add_argument("--weighting", choices=["uniform", "time"], default="uniform")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados como JSON")
+    parser.add_argument("--child", nargs=2, metavar=("DB", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args.sample_size, args.weighting)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            db_path = os.path.join(tmp, f"stats-{rows}.db")
+            db = DataBase(db_path, retention={"raw": None, "1m": None, "1h": None, "1d": None})
+            fill(db, rows)
+            db.close()
+            for mode in ("full", "reservoir"):
+                results.append({"rows": rows, **run_child(db_path, mode, args.sample_size, args.weighting)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'filas':>9} {'modo':>10} {'entreno':>8} {'lectura s':>10} {'ajuste s':>9} {'pico MB':>8}")
+    for r in results:
+        print(f"{r['rows']:>9} {r['mode']:>10} {r['train_rows']:>8} {r['load_s']:>10} "
+              f"{r['fit_s']:>9} {r['peak_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Comprueba que las variables de ventana calculadas en línea (FeaturePipeline.update)
+coinciden con las vectorizadas sobre el histórico (transform_chunks), y mide ambos caminos.
+También compara CompiledForest con sklearn en un modelo degenerado (una muestra por árbol).
+Sale con código 1 si alguna diferencia supera la tolerancia.
+
+Uso (desde src/):
+    python -m benchmarks.check_feature_parity [--rows 100000] [--windows 1 2 10 60] [--chunk 7919]
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from core.compiled_forest import CompiledForest
+from core.features import BASE_FEATURES, FeaturePipeline
+
+
+def random_history(n: int, seed: int = 0) -> dict:
+    """Histórico con tendencias, picos, valores repetidos (empates en el máximo) y errores."""
+    rng = np.random.default_rng(seed)
+    walk = np.clip(50 + np.cumsum(rng.normal(0, 2, (n, 3)), axis=0) % 100, 0, 100)
+    walk[rng.random(n) < 0.05] = 100.0
+    walk = np.round(walk, 1)
+    return {"cpu": walk[:, 0], "ram": walk[:, 1], "disk": walk[:, 2],
+            "error_count": rng.integers(0, 3, n).astype(np.float64)}
+
+
+def check(history: dict, window: int, chunk: int, tolerance: float) -> float:
+    """Máxima diferencia absoluta entre los dos caminos para una ventana."""
+    pipeline = FeaturePipeline(window)
+    n = len(history["cpu"])
+    chunks = ({name: column[i:i + chunk] for name, column in history.items()} for i in range(0, n, chunk))
+    start = time.perf_counter()
+    offline = np.vstack([pipeline.matrix(part) for part in pipeline.transform_chunks(chunks)])
+    offline_s = time.perf_counter() - start
+
+    raw = np.column_stack([history[name] for name in BASE_FEATURES])
+    start = time.perf_counter()
+    online = np.vstack([pipeline.update(row) for row in raw])
+    online_s = time.perf_counter() - start
+
+    error = float(np.abs(online - offline).max())
+    status = "OK" if error <= tolerance else "FALLO"
+    print(f"ventana {window:>4}: error máx {error:.2e}  en línea {online_s / n * 1e6:6.1f} µs/muestra  "
+          f"vectorizado {offline_s / n * 1e6:6.2f} µs/muestra  {status}")
+    return error
+
+
+def check_degenerate_forest(history: dict, tolerance: float) -> float:
+    """
+    Máxima diferencia de score (y etiquetas distintas) entre sklearn y CompiledForest con
+    max_samples=1, donde la normalización de la longitud de camino es 0.
+    """
+    from sklearn.ensemble import IsolationForest
+    X = np.column_stack([history[name] for name in BASE_FEATURES])
+    model = IsolationForest(n_estimators=10, max_samples=1, random_state=0).fit(X[:1000])
+    compiled = CompiledForest.from_sklearn(model)
+    error = float(np.abs(compiled.score_samples(X) - model.score_samples(X)).max())
+    labels = np.where(compiled.score_samples(X) - compiled.offset_ < 0, -1, 1)
+    mismatched = int((labels != model.predict(X)).sum())
+    status = "OK" if error <= tolerance and not mismatched else "FALLO"
+    print(f"bosque degenerado: error máx {error:.2e}  etiquetas distintas {mismatched}  {status}")
+    return error if not mismatched else float("inf")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 2, 10, 60])
+    parser.add_argument("--chunk", type=int, default=7919, help="Tamaño de bloque del camino vectorizado")
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    history = random_history(args.rows)
+    worst = max(check(history, window, args.chunk, args.tolerance) for window in args.windows)
+    worst = max(worst, check_degenerate_forest(history, args.tolerance))
+    sys.exit(0 if worst <= args.tolerance else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,393 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.metrics import precision_score, recall_score  # NEW: Métricas de evaluación
 import os
-import joblib
 import sqlite3
-from typing import List, Dict, Union  # NEW: Tipado para mejor documentación
+import time
+from typing import TYPE_CHECKING, List, Dict, Iterator, Union, Optional, Tuple  # NEW: Tipado para mejor documentación
+from core.compiled_forest import CompiledForest, ks_distance
+from core.db_manager import DataBase
+from core.features import BASE_FEATURES, FeaturePipeline
+from core.model_metrics import MetricsEngine
+from core.model_registry import ModelRegistry, BackgroundTrainer
+from core.prefilter import StreamingPrefilter
+from core.training_data import sample_stream, iter_training_chunks
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# sklearn, pandas y joblib se importan solo al entrenar o leer el .pkl antiguo:
+# arrancar y puntuar con el modelo exportado (.npz) solo necesita numpy
 
 class PredictiveAI:
-    def __init__(self, db_path: str, model_path: str = "model_iforest.pkl", contamination: float = 0.05):
-        """Inicialización con hiperparámetros ajustables (NEW)."""
+    def __init__(self, db_path: str, model_path: str = "model_iforest.pkl", contamination: float = 0.05,
+                 db: Optional[DataBase] = None, training_days: Optional[float] = None,
+                 sample_size: int = 50000, sample_weighting: str = "uniform",
+                 half_life_days: float = 7, chunk_size: int = 50000,
+                 drift_threshold: float = 0.1, drift_window_hours: float = 24,
+                 drift_check_interval: float = 300, prefilter: Optional[StreamingPrefilter] = None,
+                 features: Optional[FeaturePipeline] = None, train_retry_interval: float = 60):
+        """
+        Inicialización con hiperparámetros ajustables (NEW). Si se pasa db, lee desde su pool
+        (y desde su archivo frío); training_days limita la ventana de entrenamiento.
+        El entrenamiento lee el histórico por bloques y ajusta sobre una muestra de
+        sample_size filas ("uniform" o ponderada por recencia con "time").
+        Cambiar la contaminación solo mueve el umbral; se reentrena cuando los scores de
+        las últimas drift_window_hours se alejan (KS > drift_threshold) de los de entrenamiento.
+        Con prefilter, analyze_predictive solo consulta el modelo para muestras fuera de su envolvente.
+        Con features, el modelo usa además variables de ventana (media, máximo, pendiente, variación).
+        Mientras no haya modelo (p. ej. base vacía al arrancar), puntuar vuelve a pedir el
+        entrenamiento como mucho cada train_retry_interval segundos.
+        """
         self.db_path = db_path
+        self.db = db
+        self.training_days = training_days
+        self.sample_size = sample_size
+        self.sample_weighting = sample_weighting
+        self.half_life_days = half_life_days
+        self.chunk_size = chunk_size
+        self.drift_threshold = drift_threshold
+        self.drift_window_hours = drift_window_hours
+        self.drift_check_interval = drift_check_interval
+        self.train_retry_interval = train_retry_interval
+        self._train_requested_at = time.monotonic()
+        self._drift_checked_at: Optional[float] = None
+        self._drifted = False
+        self.prefilter = prefilter
+        self.features = features
         self.model_path = model_path
-        self.model = None
+        self.compiled_path = os.path.splitext(model_path)[0] + ".npz"
         self.contamination = contamination  # NEW: Hiperparámetro configurable
-        self.feature_names = ["cpu", "ram", "disk", "error_count"]
+        self.feature_names = features.feature_names if features is not None else list(BASE_FEATURES)
+        # Modelos versionados y reentrenamiento fuera del hilo de la interfaz
+        self.registry = ModelRegistry()
+        self.metrics = MetricsEngine(db)  # Calidad del modelo acumulada al puntuar
+        self.trainer = BackgroundTrainer(self.train_model)
         self.load_or_train_model()
 
+    @property
+    def model(self) -> Optional[CompiledForest]:
+        """Modelo vivo del registro (None mientras no haya ninguno entrenado)."""
+        current = self.registry.current()
+        return current.model if current else None
+
     # NEW: Método para actualizar hiperparámetros dinámicamente
     def update_hyperparameters(self, contamination: float = None, n_estimators: int = None) -> None:
-        """Actualiza los hiperparámetros del modelo."""
+        """
+        Actualiza la contaminación recalibrando el umbral del modelo vivo. Si no se puede
+        recalibrar pide un reentrenamiento; si se puede, la comprobación de deriva (lectura
+        de la base y puntuación) también va al hilo de entrenamiento, que solo reentrena
+        si los datos han derivado. El hilo de la interfaz nunca espera.
+        """
         if contamination:
             self.contamination = contamination
-        self.train_model()
+        recalibrated = self.recalibrate(self.contamination)
+        self.trainer.request(contamination=self.contamination, only_if_drifted=recalibrated)
+
+    # ========== UMBRAL Y DERIVA ==========
+    def recalibrate(self, contamination: Union[float, str]) -> bool:
+        """
+        Publica el modelo vivo con el umbral de otra contaminación (False si no es posible).
+        Si otro hilo publica un modelo entre la lectura y la publicación (un entrenamiento
+        recién terminado), se recalibra ese en vez de volver a los árboles antiguos.
+        """
+        while True:
+            current = self.registry.current()
+            if current is None or current.model.train_scores is None:
+                return False
+            if current.model.contamination == contamination:
+                return True
+            params = {**current.params, "contamination": contamination, "recalibrated_from": current.version}
+            if self.registry.publish_if_current(current, current.model.with_contamination(contamination), **params):
+                return True
+
+    def recent_samples(self) -> np.ndarray:
+        """Muestras de las últimas drift_window_hours (N×len(feature_names))."""
+        since = int(time.time() - self.drift_window_hours * 3600)
+        if self.db is not None:
+            arrays = self.db.get_stats_arrays(since=since)
+        else:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                rows = conn.execute(
+                    "SELECT cpu, ram, disk, error_count FROM system_stats "
+                    "WHERE timestamp >= datetime(?, 'unixepoch') ORDER BY id", (since,)).fetchall()
+            finally:
+                conn.close()
+            columns = np.asarray(rows, dtype=np.float64).reshape(-1, len(BASE_FEATURES)).T
+            arrays = dict(zip(BASE_FEATURES, columns))
+        return self._feature_matrix(arrays)
+
+    def _feature_matrix(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Matriz de variables del modelo a partir de columnas crudas en orden cronológico."""
+        if self.features is not None:
+            arrays = self.features.transform(arrays)
+        return np.column_stack([np.asarray(arrays[name], dtype=np.float64) for name in self.feature_names])
 
-    def fetch_data(self) -> pd.DataFrame:
+    def has_drifted(self) -> bool:
+        """
+        Compara los scores recientes con los de entrenamiento (distancia KS).
+        El resultado se reutiliza durante drift_check_interval segundos.
+        """
+        now = time.monotonic()
+        if self._drift_checked_at is not None and now - self._drift_checked_at < self.drift_check_interval:
+            return self._drifted
+        model = self.model
+        if model is None or model.train_scores is None:
+            return False
+        recent = self.recent_samples()
+        # Con pocas muestras recientes la distancia KS no es fiable
+        self._drifted = len(recent) >= 100 and \
+            ks_distance(model.train_scores, np.sort(model.score_samples(recent))) > self.drift_threshold
+        self._drift_checked_at = now
+        return self._drifted
+
+    def sweep_contamination(self, grid, samples=None) -> List[Dict[str, float]]:
+        """
+        Anomalías que daría cada contaminación de grid con una sola puntuación:
+        sobre samples (N×4) o, si no se pasa, sobre los datos de entrenamiento.
+        """
+        model = self.model
+        if model is None or model.train_scores is None:
+            return []
+        scores = model.train_scores if samples is None else np.sort(model.score_samples(self._as_matrix(samples)))
+        if not len(scores):
+            return []
+        thresholds = np.array([model.threshold_for(c) for c in grid])
+        # Anomalía: score < umbral, así que el recuento es la posición en la lista ordenada
+        counts = np.searchsorted(scores, thresholds, side='left')
+        return [{"contamination": c, "threshold": float(t), "anomalies": int(n), "rate": float(n / len(scores))}
+                for c, t, n in zip(grid, thresholds, counts)]
+
+    def close(self) -> None:
+        """Detiene el hilo de entrenamiento y guarda las métricas pendientes."""
+        self.trainer.stop()
+        self.metrics.flush()
+
+    def fetch_data(self) -> "pd.DataFrame":
         """Obtiene datos de la base de datos (original mejorado con tipado)."""
+        import pandas as pd
+        if self.db is not None:
+            since = None if self.training_days is None else int(time.time() - self.training_days * 86400)
+            arrays = self.db.get_stats_arrays(since=since)
+            if self.db.archive is not None:
+                # Solo se mapean las particiones frías que caen en la ventana
+                until = int(arrays["ts"][0]) if len(arrays["ts"]) else None
+                cold = self.db.archive.load(since, until, BASE_FEATURES)
+                arrays = {name: np.concatenate([cold[name], arrays[name]]) for name in BASE_FEATURES}
+            return pd.DataFrame(self._feature_matrix(arrays), columns=self.feature_names)
+        query = "SELECT cpu, ram, disk, error_count FROM system_stats ORDER BY id"
         conn = sqlite3.connect(self.db_path)
-        query = "SELECT cpu, ram, disk, error_count FROM system_stats"
         df = pd.read_sql_query(query, conn)
         conn.close()
+        if self.features is not None:
+            df = pd.DataFrame(self._feature_matrix(df), columns=self.feature_names)
         return df
 
-    def train_model(self) -> bool:
-        """Entrena el modelo y evalúa su performance (NEW: métricas)."""
-        df = self.fetch_data()
-        if df.empty:
+    def iter_data_chunks(self) -> Iterator[Dict[str, np.ndarray]]:
+        """Recorre el histórico de entrenamiento por bloques {columna: array}."""
+        if self.db is not None:
+            since = None if self.training_days is None else int(time.time() - self.training_days * 86400)
+            yield from iter_training_chunks(self.db, self.chunk_size, since)
+            return
+        query = ("SELECT CAST(strftime('%s', timestamp) AS INTEGER) AS ts, cpu, ram, disk, error_count "
+                 "FROM system_stats ORDER BY id")
+        import pandas as pd
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for chunk in pd.read_sql_query(query, conn, chunksize=self.chunk_size):
+                yield {name: chunk[name].to_numpy() for name in chunk.columns}
+        finally:
+            conn.close()
+
+    def load_training_sample(self) -> np.ndarray:
+        """Muestra de entrenamiento de tamaño acotado (memoria constante con el histórico)."""
+        chunks = self.iter_data_chunks()
+        if self.features is not None:
+            chunks = self.features.transform_chunks(chunks)
+        sampler = sample_stream(chunks, self.feature_names, self.sample_size,
+                                self.sample_weighting, self.half_life_days * 86400)
+        return sampler.sample()
+
+    def train_model(self, contamination: Optional[float] = None, only_if_drifted: bool = False) -> bool:
+        """
+        Entrena el modelo y evalúa su performance (NEW: métricas).
+        El modelo nuevo solo se publica cuando está completo. Con only_if_drifted no
+        reentrena un modelo vivo calibrado cuyos datos no han derivado.
+        """
+        current = self.model
+        if only_if_drifted and current is not None and current.train_scores is not None \
+                and not self.has_drifted():
+            return False
+        import joblib
+        from sklearn.ensemble import IsolationForest
+        contamination = contamination or self.contamination
+        requested = self.contamination
+        X = self.load_training_sample()
+        if not len(X):
             print("No hay datos suficientes para entrenar el modelo.")
             return False
 
         # NEW: Configuración flexible de hiperparámetros
         model = IsolationForest(
-            contamination=self.contamination,
+            contamination=contamination,
             n_estimators=100,  # NEW: Parametrizado
             random_state=42,
             n_jobs=-1  # NEW: Uso de todos los núcleos
         )
-        model.fit(df[self.feature_names])
-        
-        # NEW: Evaluación del modelo
-        predictions = model.predict(df[self.feature_names])
-        anomalies = df[predictions == -1]
-        print(f"🔍 Modelo entrenado. Anomalías detectadas: {len(anomalies)}/{len(df)}")
+        model.fit(X)  # Sin nombres de columnas: la inferencia usa arrays numpy
+        compiled = CompiledForest.from_sklearn(model)
+        compiled.calibrate(X)
+        if self.contamination != requested:
+            # El usuario movió el control durante el ajuste: basta con mover el umbral
+            contamination = self.contamination
+            compiled = compiled.with_contamination(contamination)
+
+        # NEW: Evaluación del modelo (sobre la muestra de entrenamiento)
+        anomalies = int(np.searchsorted(compiled.train_scores, compiled.offset_, side='left'))
+        print(f"🔍 Modelo entrenado. Anomalías detectadas: {anomalies}/{len(X)}")
         
-        joblib.dump(model, self.model_path)
-        self.model = model
+        # Escritura atómica: el archivo nunca queda a medio guardar
+        tmp_path = f"{self.model_path}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, self.model_path)
+        compiled.save(self.compiled_path)
+        self.registry.publish(compiled, contamination=contamination, rows=len(X))
+        # Si el control se movió justo antes de publicar, el modelo nuevo toma su umbral
+        self.recalibrate(self.contamination)
+        self._drift_checked_at = None  # La deriva se mide contra el modelo nuevo
         return True
 
     def load_or_train_model(self) -> None:
-        """Carga el modelo si existe, de lo contrario lo entrena (original mejorado)."""
+        """Carga el modelo exportado (o el .pkl si no hay exportación); si no hay ninguno, lo entrena."""
+        if os.path.exists(self.compiled_path) and (not os.path.exists(self.model_path) or
+                                                   os.path.getmtime(self.compiled_path) >= os.path.getmtime(self.model_path)):
+            try:
+                model = CompiledForest.load(self.compiled_path)
+                if model.n_features != len(self.feature_names):
+                    print("El modelo guardado usa otras variables; entrenando uno nuevo.")
+                    self.trainer.request(contamination=self.contamination)
+                    return
+                self.registry.publish(model, contamination=model.contamination, source=self.compiled_path)
+                self.recalibrate(self.contamination)  # El archivo guarda el umbral del último entrenamiento
+                print("Modelo predictivo cargado desde archivo.")
+                return
+            except Exception as e:
+                print(f"Error cargando el modelo exportado, probando con {self.model_path}: {str(e)}")
         if os.path.exists(self.model_path):
             try:
-                self.model = joblib.load(self.model_path)
+                import joblib
+                model = CompiledForest.from_sklearn(joblib.load(self.model_path))
+                if model.n_features != len(self.feature_names):
+                    print("El modelo guardado usa otras variables; entrenando uno nuevo.")
+                    self.trainer.request(contamination=self.contamination)
+                    return
+                model.save(self.compiled_path)  # El próximo arranque ya no necesita sklearn
+                self.registry.publish(model, contamination=model.contamination, source=self.model_path)
                 print("Modelo predictivo cargado desde archivo.")
             except Exception as e:
                 print(f"Error cargando el modelo, entrenando nuevo: {str(e)}")
-                self.train_model()
+                self.trainer.request(contamination=self.contamination)
         else:
-            self.train_model()
+            self.trainer.request(contamination=self.contamination)
+
+    # ========== INFERENCIA VECTORIZADA ==========
+    def _as_matrix(self, samples) -> np.ndarray:
+        """Convierte N×4 (o H×N×4 para varios hosts) en una matriz 2D float64."""
+        X = np.asarray(samples, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[-1] != len(self.feature_names):
+            raise ValueError(f"Se esperaban {len(self.feature_names)} columnas: {self.feature_names}")
+        return X.reshape(-1, X.shape[-1])
+
+    def score_batch(self, samples) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Puntúa un lote en una sola llamada vectorizada.
+        Devuelve (scores, labels) con la forma de entrada sin la última dimensión:
+        scores de score_samples (más bajo = más anómalo) y labels 1 normal / -1 anomalía.
+        Mientras no haya modelo, los scores son NaN y todas las muestras se dan por normales.
+        """
+        shape = np.shape(samples)[:-1] or (1,)
+        _, scores, labels = self._score(self._as_matrix(samples))
+        return scores.reshape(shape), labels.reshape(shape)
+
+    def _score(self, X: np.ndarray) -> Tuple[Optional[CompiledForest], np.ndarray, np.ndarray]:
+        """Puntúa una matriz N×4 y devuelve también el modelo que se usó."""
+        model = self.model  # Una sola lectura: la puntuación usa una versión coherente
+        if model is None:
+            self._retry_training()
+            return None, np.full(len(X), np.nan), np.ones(len(X), dtype=int)
+        scores = model.score_samples(X)
+        return model, scores, np.where(scores - model.offset_ < 0, -1, 1)
+
+    def _retry_training(self) -> None:
+        """Vuelve a pedir el primer entrenamiento si el anterior no dejó modelo (sin datos aún)."""
+        now = time.monotonic()
+        if now - self._train_requested_at < self.train_retry_interval or not self.trainer.idle():
+            return
+        self._train_requested_at = now
+        self.trainer.request(contamination=self.contamination)
+
+    def predict_batch(self, samples) -> np.ndarray:
+        """Etiquetas (1 normal / -1 anomalía) para un lote N×4 o H×N×4."""
+        return self.score_batch(samples)[1]
 
     def predict_anomaly(self, cpu: float, ram: float, disk: float, errors: int) -> bool:
-        """Predice si hay anomalía (original con tipado mejorado)."""
-        if self.model is None:
-            self.load_or_train_model()
-        
-        features = pd.DataFrame([[cpu, ram, disk, errors]], columns=self.feature_names)
-        prediction = self.model.predict(features)
-        return prediction[0] == -1
+        """
+        Predice si hay anomalía (original con tipado mejorado).
+        Con variables de ventana, la muestra se incorpora a la ventana en línea.
+        """
+        sample = [cpu, ram, disk, errors]
+        if self.features is not None:
+            sample = self.features.update(sample)
+        return bool(self.predict_batch([sample])[0] == -1)
 
     def analyze_predictive(self, cpu: float, ram: float, disk: float, error_count: int) -> List[str]:
         """Genera alertas predictivas (original mejorado con severidad)."""
-        alerts = []
-        if self.predict_anomaly(cpu, ram, disk, error_count):
-            # NEW: Alertas con niveles de severidad basados en valores
-            severity = "HIGH" if cpu > 90 or ram > 90 else "MEDIUM"
-            alerts.append({
-                "message": "Comportamiento anómalo detectado en el sistema",
-                "severity": severity,  # NEW: Severidad dinámica
-                "values": f"CPU: {cpu}%, RAM: {ram}%"  # NEW: Contexto adicional
-            })
-        return alerts
+        sample = [cpu, ram, disk, error_count]
+        # La ventana ve todas las muestras, también las que el prefiltro no escala
+        vector = self.features.update(sample) if self.features is not None else sample
+        if self.prefilter is not None and not self.prefilter.update(sample):
+            # Dentro de la envolvente del prefiltro: no hace falta el modelo, pero la
+            # muestra cuenta en las métricas como predicción normal
+            model = self.model
+            if model is None:
+                self._retry_training()
+            else:
+                self.metrics.record_prefiltered(model.fingerprint(), error_count > 0)
+            return []
+        return self.analyze_batch([vector])[0]
+
+    def analyze_batch(self, samples) -> List[List[Dict]]:
+        """Genera las alertas predictivas de un lote N×len(feature_names) con una sola puntuación."""
+        X = self._as_matrix(samples)
+        model, scores, labels = self._score(X)
+        if model is not None:
+            # Asumimos errores como anomalías reales
+            self.metrics.record(model.fingerprint(), scores, labels, X[:, 3] > 0)
+        results = []
+        for row, label in zip(X.tolist(), labels.tolist()):
+            cpu, ram = row[0], row[1]
+            alerts = []
+            if label == -1:
+                # NEW: Alertas con niveles de severidad basados en valores
+                severity = "HIGH" if cpu > 90 or ram > 90 else "MEDIUM"
+                alerts.append({
+                    "message": "Comportamiento anómalo detectado en el sistema",
+                    "severity": severity,  # NEW: Severidad dinámica
+                    "values": f"CPU: {cpu}%, RAM: {ram}%"  # NEW: Contexto adicional
+                })
+            results.append(alerts)
+        return results
 
     # NEW: Método para obtener métricas del modelo
     def get_model_metrics(self) -> Dict[str, float]:
-        """Evalúa y devuelve métricas de performance del modelo."""
-        df = self.fetch_data()
-        if df.empty or self.model is None:
+        """
+        Precisión y recall de las muestras analizadas con el modelo vivo, desde los
+        agregados incrementales (coste constante, sin volver a predecir el histórico).
+        """
+        model = self.model
+        if model is None:
             return {}
-        
-        predictions = self.model.predict(df[self.feature_names])
-        true_labels = np.where(df['error_count'] > 0, -1, 1)  # Asumimos errores como anomalías reales
-        
-        return {
-            "precision": precision_score(true_labels, predictions, pos_label=-1),
-            "recall": recall_score(true_labels, predictions, pos_label=-1)
-        }
\ No newline at end of file
+        self.metrics.bind(model.fingerprint())
+        metrics = self.metrics.summary()
+        return metrics if metrics["samples"] else {}
@@ -0,0 +1,147 @@
+import calendar
+import os
+import re
+import shutil
+import time
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# Columnas del archivo y su tipo en disco
+ARCHIVE_COLUMNS = {
+    "ts": np.int64,
+    "cpu": np.float32,
+    "ram": np.float32,
+    "disk": np.float32,
+    "error_count": np.int32,
+}
+
+_DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _day_of(epoch: int) -> str:
+    """Partición (día UTC) a la que pertenece un epoch."""
+    return time.strftime('%Y-%m-%d', time.gmtime(epoch))
+
+
+def _day_start(day: str) -> int:
+    """Epoch UTC del inicio de una partición."""
+    return calendar.timegm(time.strptime(day, '%Y-%m-%d'))
+
+
+class ColumnarArchive:
+    """
+    Archivo frío de muestras históricas en columnas .npy, una carpeta por día UTC:
+    root/AAAA-MM-DD/{ts,cpu,ram,disk,error_count}.npy
+    Las lecturas usan memory-mapping y solo abren las particiones del rango pedido.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def partitions(self) -> List[str]:
+        """Días archivados, en orden cronológico."""
+        return sorted(name for name in os.listdir(self.root)
+                      if _DAY_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name)))
+
+    def partitions_between(self, since: Optional[int] = None, until: Optional[int] = None) -> List[str]:
+        """Particiones que se solapan con el rango since <= ts < until."""
+        days = self.partitions()
+        if since is not None:
+            days = [day for day in days if _day_start(day) + 86400 > since]
+        if until is not None:
+            days = [day for day in days if _day_start(day) < until]
+        return days
+
+    def read_partition(self, day: str, columns: Optional[Sequence[str]] = None,
+                       mmap: bool = True) -> Dict[str, np.ndarray]:
+        """Abre las columnas de una partición como memmap de solo lectura (o las copia en memoria)."""
+        folder = os.path.join(self.root, day)
+        return {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode='r' if mmap else None)
+                for name in (columns or ARCHIVE_COLUMNS)}
+
+    def exported_until(self) -> Optional[int]:
+        """Epoch siguiente a la última muestra archivada (None si el archivo está vacío)."""
+        for day in reversed(self.partitions()):
+            ts = self.read_partition(day, ["ts"], mmap=False)["ts"]
+            if len(ts):
+                return int(ts[-1]) + 1
+        return None
+
+    def iter_partitions(self, since: Optional[int] = None, until: Optional[int] = None,
+                        columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Recorre el rango partición a partición sin cargarlo entero en memoria.
+        Los bordes del rango se recortan con vistas sobre el memmap (sin copia).
+        """
+        columns = list(columns or ARCHIVE_COLUMNS)
+        wanted = columns if "ts" in columns else columns + ["ts"]
+        for day in self.partitions_between(since, until):
+            part = self.read_partition(day, wanted)
+            ts = part["ts"]
+            start = 0 if since is None else int(np.searchsorted(ts, since, side='left'))
+            stop = len(ts) if until is None else int(np.searchsorted(ts, until, side='left'))
+            if start < stop:
+                yield {name: part[name][start:stop] for name in columns}
+
+    def load(self, since: Optional[int] = None, until: Optional[int] = None,
+             columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Concatena el rango pedido (copia solo las filas de esas particiones)."""
+        columns = list(columns or ARCHIVE_COLUMNS)
+        parts = list(self.iter_partitions(since, until, columns))
+        if not parts:
+            return {name: np.empty(0, dtype=ARCHIVE_COLUMNS[name]) for name in columns}
+        return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+    def write_partition(self, day: str, arrays: Dict[str, np.ndarray]) -> int:
+        """
+        Escribe (o añade a la existente) la partición de un día. Todas las filas se
+        conservan, también las que comparten segundo; no volver a exportar un rango ya
+        archivado es cosa de export_from. La nueva versión se prepara aparte y se
+        intercambia con renombrados.
+        """
+        folder = os.path.join(self.root, day)
+        data = {name: np.asarray(arrays[name], dtype=dtype) for name, dtype in ARCHIVE_COLUMNS.items()}
+        if os.path.isdir(folder):
+            # Sin memmap: en Windows no se puede renombrar una carpeta con archivos abiertos
+            current = self.read_partition(day, mmap=False)
+            data = {name: np.concatenate([current[name], data[name]]) for name in ARCHIVE_COLUMNS}
+
+        # Orden cronológico estable (las muestras de un mismo segundo mantienen su orden)
+        order = np.argsort(data["ts"], kind='stable')
+        data = {name: column[order] for name, column in data.items()}
+
+        staging = f"{folder}.tmp-{os.getpid()}"
+        os.makedirs(staging, exist_ok=True)
+        for name, column in data.items():
+            np.save(os.path.join(staging, f"{name}.npy"), column)
+        if os.path.isdir(folder):
+            retired = f"{folder}.old-{os.getpid()}"
+            os.replace(folder, retired)
+            os.replace(staging, folder)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, folder)
+        return len(data["ts"])
+
+    def export_from(self, db, until: int) -> int:
+        """
+        Exporta al archivo las muestras crudas de db anteriores a until, día a día
+        para acotar la memoria. No borra nada de SQLite (eso lo hace la retención).
+        Empieza donde acabó la última exportación: si la retención falló después de
+        exportar, las filas que siguen en SQLite no se archivan dos veces.
+        """
+        bounds = db.get_stats_bounds()
+        if bounds is None or bounds[0] >= until:
+            return 0
+        since = max(bounds[0], self.exported_until() or bounds[0])
+        exported = 0
+        day_start = _day_start(_day_of(since))
+        while day_start < until:
+            day_end = min(day_start + 86400, until)
+            arrays = db.get_stats_arrays(since=max(day_start, since), until=day_end)
+            if len(arrays["ts"]):
+                self.write_partition(_day_of(day_start), arrays)
+                exported += len(arrays["ts"])
+            day_start += 86400
+        return exported
@@ -0,0 +1,317 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Iterator, List, NamedTuple, Optional, Tuple
+from core.path_matcher import PathMatcher
+from core.scan_index import ScanIndex
+
+
+class CleanReport(NamedTuple):
+    """
+    Resultado de una pasada del motor de limpieza. En modo simulación files, dirs y
+    bytes_freed son lo que se habría borrado y manifest lista cada candidato (ruta, bytes).
+    unchanged cuenta los directorios que el índice permitió no volver a listar y
+    scanned las entradas examinadas.
+    """
+    files: int
+    dirs: int
+    bytes_freed: int
+    skipped: int
+    errors: List[str]
+    seconds: float
+    unchanged: int = 0
+    manifest: Optional[List[Tuple[str, int]]] = None
+    scanned: int = 0
+
+    @property
+    def deleted(self) -> int:
+        return self.files + self.dirs
+
+    @property
+    def files_per_s(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+
+class _Dir:
+    """
+    Directorio en recorrido. pending cuenta su propio escaneo más los subdirectorios
+    aún sin terminar; al llegar a cero se sabe si quedó vacío sin volver a listarlo.
+    mtime_ns es el de antes de listarlo y kept las entradas que se conservan.
+    """
+    __slots__ = ("path", "parent", "pending", "keep", "mtime_ns", "kept", "dirty", "listed")
+
+    def __init__(self, path: str, parent: Optional["_Dir"], mtime_ns: Optional[int] = None):
+        self.path = path
+        self.parent = parent
+        self.pending = 1
+        self.keep = False
+        self.mtime_ns = mtime_ns
+        self.kept = 0
+        self.dirty = False
+        self.listed = False
+
+
+class _Worker:
+    __slots__ = ("tasks", "files", "dirs", "bytes_freed", "skipped", "unchanged", "scanned", "errors", "manifest")
+
+    def __init__(self):
+        self.tasks: Deque[_Dir] = deque()
+        self.files = self.dirs = self.bytes_freed = self.skipped = self.unchanged = self.scanned = 0
+        self.errors: List[str] = []
+        self.manifest: List[Tuple[str, int]] = []
+
+
+class CleanEngine:
+    """
+    Motor de limpieza sobre os.scandir: usa los datos de cada DirEntry (tipo y, en
+    Windows, tamaño sin llamadas extra), recorre y borra con un pool de hilos con
+    robo de trabajo y elimina los directorios vacíos de abajo arriba. workers es el
+    tope de hilos haciendo E/S a la vez (más hilos solo castigan el disco).
+    Con index (ScanIndex) los directorios cuyo mtime no cambió desde la última
+    limpieza no se listan; con dry_run no se borra nada y se devuelve el manifiesto.
+    """
+
+    def __init__(self, matcher: PathMatcher, workers: int = 4,
+                 is_locked: Optional[Callable[[str], bool]] = None,
+                 progress: Optional[Callable[[int], None]] = None, max_errors: int = 100,
+                 index: Optional[ScanIndex] = None, dry_run: bool = False,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.matcher = matcher
+        self.workers = max(1, workers)
+        self.is_locked = is_locked
+        self.progress = progress
+        self.max_errors = max_errors
+        self.index = index
+        self.dry_run = dry_run
+        self.on_error = on_error
+        self._start = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+        self._pool: List[_Worker] = []
+
+    def run(self, root: str) -> CleanReport:
+        """Borra lo que no esté excluido bajo root (root se conserva)."""
+        start = self._start = time.perf_counter()
+        self._pool = [_Worker() for _ in range(self.workers)]
+        self._outstanding = 1
+        self._pool[0].tasks.append(_Dir(root, None))
+        threads = [threading.Thread(target=self._work, args=(i,), daemon=True) for i in range(1, self.workers)]
+        for thread in threads:
+            thread.start()
+        self._work(0)
+        for thread in threads:
+            thread.join()
+        if self.index is not None and not self.dry_run:
+            self.index.save()
+        pool = self._pool
+        errors = [message for worker in pool for message in worker.errors][:self.max_errors]
+        manifest = [item for worker in pool for item in worker.manifest] if self.dry_run else None
+        return CleanReport(sum(w.files for w in pool), sum(w.dirs for w in pool),
+                           sum(w.bytes_freed for w in pool), sum(w.skipped for w in pool),
+                           errors, time.perf_counter() - start, sum(w.unchanged for w in pool), manifest,
+                           sum(w.scanned for w in pool))
+
+    def snapshot(self) -> CleanReport:
+        """
+        Contadores acumulados de la pasada en curso, leídos sin bloquear a los hilos
+        (pueden ir un directorio por detrás). errors va vacío: se reciben con on_error.
+        """
+        pool = list(self._pool)
+        elapsed = time.perf_counter() - self._start if self._start is not None else 0.0
+        return CleanReport(sum(w.files for w in pool), sum(w.dirs for w in pool),
+                           sum(w.bytes_freed for w in pool), sum(w.skipped for w in pool),
+                           [], elapsed, sum(w.unchanged for w in pool), None, sum(w.scanned for w in pool))
+
+    # ========== POOL CON ROBO DE TRABAJO ==========
+    def _next(self, me: _Worker) -> Optional[_Dir]:
+        """Tarea propia más reciente (LIFO, en profundidad) o la más antigua de otro hilo."""
+        while True:
+            try:
+                return me.tasks.pop()
+            except IndexError:
+                pass
+            for other in self._pool:
+                try:
+                    return other.tasks.popleft()  # Robar por el otro extremo: directorios más altos
+                except IndexError:
+                    continue
+            with self._idle:
+                if self._outstanding == 0:
+                    return None
+                self._idle.wait(0.05)
+
+    def _work(self, index: int) -> None:
+        me = self._pool[index]
+        while True:
+            node = self._next(me)
+            if node is None:
+                return
+            self._scan(me, node)
+            self._finish(me, node)
+            with self._idle:
+                self._outstanding -= 1
+                if self._outstanding == 0:
+                    self._idle.notify_all()
+
+    # ========== RECORRIDO Y BORRADO ==========
+    def _push(self, me: _Worker, parent: _Dir, path: str, mtime_ns: Optional[int]) -> None:
+        """Encola un subdirectorio en la cola propia."""
+        with self._lock:
+            parent.pending += 1
+            self._outstanding += 1
+            self._idle.notify()
+        me.tasks.append(_Dir(path, parent, mtime_ns))
+
+    def _scan(self, me: _Worker, node: _Dir) -> None:
+        """Borra los archivos de un directorio y encola sus subdirectorios."""
+        index = self.index
+        if index is not None:
+            try:
+                if node.mtime_ns is None:
+                    node.mtime_ns = os.stat(node.path).st_mtime_ns
+            except OSError as e:
+                node.keep = True
+                self._error(me, node.path, e)
+                return
+            record = index.lookup(node.path)
+            if record is not None and not record.dirty and record.mtime_ns == node.mtime_ns:
+                self._descend_unchanged(me, node, record.kept)
+                return
+
+        removed = 0
+        subdirs = []
+        try:
+            with os.scandir(node.path) as entries:
+                for entry in entries:
+                    me.scanned += 1
+                    if self.matcher.excluded(entry.path, entry.name):
+                        node.kept += 1
+                        me.skipped += 1
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            mtime_ns = entry.stat(follow_symlinks=False).st_mtime_ns if index is not None else None
+                            subdirs.append(entry.path)
+                            self._push(me, node, entry.path, mtime_ns)
+                            continue
+                        if self.is_locked is not None and self.is_locked(entry.path):
+                            node.kept += 1
+                            node.dirty = True  # Puede liberarse sin que cambie el mtime
+                            me.skipped += 1
+                            continue
+                        size = entry.stat(follow_symlinks=False).st_size
+                        if self.dry_run:
+                            me.manifest.append((entry.path, size))
+                        else:
+                            os.unlink(entry.path)
+                    except OSError as e:
+                        node.kept += 1
+                        node.dirty = True
+                        self._error(me, entry.path, e)
+                        continue
+                    me.files += 1
+                    me.bytes_freed += size
+                    removed += 1
+            node.listed = True
+        except OSError as e:
+            node.kept += 1
+            self._error(me, node.path, e)
+        if node.kept:
+            node.keep = True
+        if index is not None and node.listed:
+            # Subdirectorios del índice que ya no existen
+            current = set(subdirs)
+            for child in index.children(node.path):
+                if child not in current:
+                    index.forget(child)
+        if removed and self.progress is not None:
+            self.progress(removed)
+
+    def _descend_unchanged(self, me: _Worker, node: _Dir, kept: int) -> None:
+        """Directorio sin cambios: no se lista, solo se baja a sus subdirectorios conocidos."""
+        me.unchanged += 1
+        if kept:
+            node.keep = True
+        for child in self.index.children(node.path):
+            try:
+                mtime_ns = os.lstat(child).st_mtime_ns
+            except OSError:
+                continue
+            self._push(me, node, child, mtime_ns)
+
+    def _finish(self, me: _Worker, node: Optional[_Dir]) -> None:
+        """Cierra el escaneo de node y sube mientras haya directorios completos y vacíos."""
+        while node is not None:
+            with self._lock:
+                node.pending -= 1
+                if node.pending:
+                    return
+            parent = node.parent
+            if parent is not None and not node.keep:
+                try:
+                    if self.dry_run:
+                        me.manifest.append((node.path, 0))
+                    else:
+                        os.rmdir(node.path)
+                        if self.index is not None:
+                            self.index.forget(node.path)
+                    me.dirs += 1
+                except OSError as e:
+                    node.keep = True
+                    self._error(me, node.path, e)
+            if parent is None or node.keep:
+                self._record(node)
+            if parent is None:
+                return  # La raíz se conserva
+            if node.keep:
+                parent.keep = True
+            node = parent
+
+    def _record(self, node: _Dir) -> None:
+        """Guarda en el índice el estado de un directorio listado que se conserva."""
+        if self.index is None or self.dry_run or not node.listed:
+            return
+        try:
+            mtime_ns = os.stat(node.path).st_mtime_ns
+        except OSError:
+            self.index.forget(node.path)
+            return
+        # Si el mtime se movió durante la pasada (borrados propios o cambios ajenos)
+        # no se puede saber si entró algo nuevo: se vuelve a listar la próxima vez
+        dirty = node.dirty or mtime_ns != node.mtime_ns
+        parent = node.parent.path if node.parent is not None else None
+        self.index.update(node.path, parent, mtime_ns, node.kept, dirty)
+
+    def _error(self, me: _Worker, path: str, error: OSError) -> None:
+        if len(me.errors) < self.max_errors:
+            me.errors.append(f"{path}: {error.strerror or error}")
+            if self.on_error is not None:
+                self.on_error(me.errors[-1])
+
+
+def iter_candidates(matcher: PathMatcher, root: str,
+                    is_locked: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Recorre root con os.scandir y va entregando (ruta, stat) de cada archivo que se
+    podría borrar (no excluido ni en uso), sin acumular la lista entera en memoria.
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if matcher.excluded(entry.path, entry.name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        if is_locked is not None and is_locked(entry.path):
+                            continue
+                        yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
@@ -0,0 +1,53 @@
+from typing import NamedTuple, Optional, Union
+from core.clean_engine import CleanReport
+
+
+class CleanProgress(NamedTuple):
+    """
+    Estado acumulado de la limpieza de un objetivo. Se emite como mucho una vez por
+    intervalo, así que consumirlo cuesta lo mismo haya diez archivos o un millón.
+    expected son las entradas que tuvo el objetivo la última vez (None si no se sabe).
+    """
+    target: str
+    scanned: int
+    deleted: int
+    skipped: int
+    errors: int
+    bytes_freed: int
+    elapsed: float
+    rate: float  # Entradas examinadas por segundo
+    eta: Optional[float]  # Segundos restantes estimados
+    expected: Optional[int] = None
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Fracción completada (0-1) si se conoce el tamaño esperado."""
+        if not self.expected:
+            return None
+        return min(1.0, self.scanned / self.expected)
+
+
+class CleanError(NamedTuple):
+    """Un archivo o carpeta que no se pudo limpiar ("ruta: motivo")."""
+    target: str
+    message: str
+
+
+class TargetDone(NamedTuple):
+    """Fin de un objetivo con su informe completo (None si se omitió)."""
+    target: str
+    report: Optional[CleanReport]
+
+
+CleanEvent = Union[CleanProgress, CleanError, TargetDone]
+
+
+def progress_from(target: str, snapshot: CleanReport, errors: int, expected: Optional[int]) -> CleanProgress:
+    """Construye el evento de progreso a partir de una instantánea del motor."""
+    elapsed = snapshot.seconds
+    rate = snapshot.scanned / elapsed if elapsed else 0.0
+    eta = None
+    if expected and rate:
+        eta = max(0, expected - snapshot.scanned) / rate
+    return CleanProgress(target, snapshot.scanned, snapshot.deleted, snapshot.skipped, errors,
+                         snapshot.bytes_freed, elapsed, rate, eta, expected)
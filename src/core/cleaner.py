@@ -1,14 +1,32 @@
 import os
-import shutil
+import queue
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
 from tqdm import tqdm
 import time
-import fnmatch
-import ctypes
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.clean_engine import CleanEngine, CleanReport, iter_candidates
+from core.clean_events import CleanError, CleanEvent, TargetDone, progress_from
+from core.duplicates import DuplicateReport, delete_duplicates, find_duplicates
+from core.open_files import OpenFileIndex
+from core.path_matcher import PathMatcher
+from core.scan_index import ScanIndex
+from core.space_goal import GoalReport, bytes_needed, free_space
 
 class Cleaner:
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, scan_index: Optional[str] = None):
+        # Hilos de E/S del motor de limpieza (tope para no saturar el disco)
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.last_report: Optional[CleanReport] = None
+        self.last_goal: Optional[GoalReport] = None
+        # Entradas examinadas en la última limpieza de cada objetivo (para estimar la ETA)
+        self._expected: Dict[str, int] = {}
+        # Índice de directorios ya limpiados (SQLite) para no volver a listar lo que no cambió
+        self.scan_index_path = scan_index
+        self._index: Optional[ScanIndex] = None
+        # Rutas abiertas por algún proceso, reconstruidas como mucho cada 5 s
+        self.open_files = OpenFileIndex(ttl=5.0)
+
         # Directorios excluidos por seguridad
         self.excluded_dirs = {
             os.path.join(tempfile.gettempdir(), 'important'),
@@ -25,48 +43,24 @@ class Cleaner:
             '*.tmp', '*.log', '*.db', '*.dat',
             '*.mkd', '*.ps1', '*.vbs', '*.js'
         ]
+        self.compile_rules()
+
+    def compile_rules(self) -> None:
+        """Compila las reglas de exclusión (llamar de nuevo si se cambian excluded_dirs o excluded_patterns)"""
+        self.matcher = PathMatcher(self.excluded_dirs, self.excluded_patterns)
 
     def is_file_locked(self, filepath):
-        """Verifica si un archivo está en uso (Windows)"""
-        if os.name != 'nt':
-            return False
-            
-        try:
-            handle = ctypes.windll.kernel32.CreateFileW(
-                filepath,
-                0x80000000,  # GENERIC_READ
-                1,           # FILE_SHARE_READ
-                None,
-                3,           # OPEN_EXISTING
-                0x80,        # FILE_ATTRIBUTE_NORMAL
-                None
-            )
-            
-            if handle == -1:
-                return True
-                
-            ctypes.windll.kernel32.CloseHandle(handle)
-            return False
-        except:
-            return True
+        """Verifica si un archivo está en uso (consulta O(1) al índice de archivos abiertos)"""
+        return self.open_files.is_open(filepath)
 
-    def should_skip(self, path):
-        """Determina si un archivo/directorio debe ser excluido"""
-        path_lower = path.lower()
-        
-        # Verificar directorios excluidos
-        for excluded_dir in self.excluded_dirs:
-            if excluded_dir.lower() in path_lower:
-                return True
-                
-        # Verificar patrones de archivos
-        filename = os.path.basename(path)
-        if any(fnmatch.fnmatch(filename.lower(), pattern.lower()) 
-               for pattern in self.excluded_patterns):
+    def should_skip(self, path, name: Optional[str] = None):
+        """Determina si un archivo/directorio debe ser excluido (name: nombre ya separado de la ruta)"""
+        # Verificar patrones de archivos y directorios excluidos
+        if self.matcher.excluded(path, name):
             return True
             
         # Verificar archivos en uso
-        if os.path.isfile(path) and self.is_file_locked(path):
+        if self.is_file_locked(path):
             return True
             
         return False
@@ -80,62 +74,22 @@ class Cleaner:
             print(f"⚠️ Directorio temporal no encontrado: {temp_dir}")
             return
 
-        files_to_delete = []
-        dirs_to_delete = []
+        # Recorrido y borrado en paralelo; la barra no tiene total porque no se lista antes
+        with tqdm(desc="🧹 Limpiando", ncols=100, unit=" archivos") as pbar:
+            report = self._run_engine(temp_dir, progress=pbar.update)
 
-        # Recopilar archivos y directorios
-        for root, dirs, files in os.walk(temp_dir):
-            # Filtrar directorios excluidos
-            dirs[:] = [d for d in dirs if not self.should_skip(os.path.join(root, d))]
-            
-            for f in files:
-                file_path = os.path.join(root, f)
-                if not self.should_skip(file_path):
-                    files_to_delete.append(file_path)
-                    
-            for d in dirs:
-                dir_path = os.path.join(root, d)
-                if not self.should_skip(dir_path):
-                    dirs_to_delete.append(dir_path)
-
-        total_items = len(files_to_delete) + len(dirs_to_delete)
-        if total_items == 0:
+        if report.deleted == 0:
             print("✅ No hay archivos temporales para limpiar")
             return
-
-        deleted_files = 0
-        deleted_dirs = 0
-
-        # Proceso de limpieza con barra de progreso
-        with tqdm(total=total_items, desc="🧹 Limpiando", ncols=100, 
-                 bar_format="{l_bar}{bar} {n_fmt}/{total_fmt}") as pbar:
-            
-            # Eliminar archivos
-            for file_path in files_to_delete:
-                try:
-                    if not self.should_skip(file_path):
-                        os.remove(file_path)
-                        deleted_files += 1
-                except Exception as e:
-                    print(f"❌ No se pudo eliminar archivo: {file_path} | Error: {e}")
-                finally:
-                    pbar.update(1)
-
-            # Eliminar directorios vacíos
-            for dir_path in dirs_to_delete:
-                try:
-                    if not os.listdir(dir_path):
-                        shutil.rmtree(dir_path)
-                        deleted_dirs += 1
-                except Exception as e:
-                    print(f"❌ No se pudo eliminar carpeta: {dir_path} | Error: {e}")
-                finally:
-                    pbar.update(1)
+        for message in report.errors:
+            print(f"❌ No se pudo eliminar: {message}")
 
         # Resultados
         print("\n✅ Limpieza completada.")
-        print(f"📂 Archivos eliminados: {deleted_files}")
-        print(f"📂 Carpetas eliminadas: {deleted_dirs}")
+        print(f"📂 Archivos eliminados: {report.files}")
+        print(f"📂 Carpetas eliminadas: {report.dirs}")
+        print(f"💾 Espacio liberado: {report.bytes_freed / 2 ** 20:.1f} MB "
+              f"({report.files_per_s:.0f} archivos/s)")
         print("✨ Todos los archivos temporales posibles han sido eliminados.")
         print("🔖 Creado por ISAMEL TRUJILLO\n")
         time.sleep(1)
@@ -157,36 +111,120 @@ class Cleaner:
 
     def _clean_directory(self, dir_path: str) -> int:
         """Lógica interna de limpieza"""
-        deleted = 0
         try:
-            for root, dirs, files in os.walk(dir_path, topdown=False):
-                # Filtrar directorios
-                dirs[:] = [d for d in dirs if not self.should_skip(os.path.join(root, d))]
-                
-                # Eliminar archivos
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if not self.should_skip(file_path):
-                        try:
-                            os.remove(file_path)
-                            deleted += 1
-                        except Exception as e:
-                            print(f"❌ Error eliminando {file_path}: {str(e)}")
-                
-                # Eliminar directorios vacíos
-                for dir in dirs:
-                    dir_path = os.path.join(root, dir)
-                    if not self.should_skip(dir_path):
-                        try:
-                            if not os.listdir(dir_path):
-                                shutil.rmtree(dir_path)
-                                deleted += 1
-                        except Exception as e:
-                            print(f"❌ Error eliminando {dir_path}: {str(e)}")
+            report = self._run_engine(dir_path)
         except Exception as e:
             print(f"❌ Error crítico: {str(e)}")
-        
-        return deleted
+            return 0
+        for message in report.errors:
+            print(f"❌ Error eliminando {message}")
+        return report.deleted
+
+    def iter_clean(self, targets: Iterable[str], interval: float = 0.25) -> Iterator[CleanEvent]:
+        """
+        Limpia targets uno tras otro y va entregando eventos: CleanProgress (contadores,
+        ritmo y ETA) como mucho cada interval segundos, cada CleanError según ocurre y un
+        TargetDone con el informe al terminar cada objetivo. El motor trabaja en otro
+        hilo, así que quien consume solo paga por evento y nunca por archivo.
+        """
+        with ThreadPoolExecutor(1) as executor:
+            for target in targets:
+                if not os.path.exists(target):
+                    yield CleanError(target, f"{target}: ruta no existe")
+                    yield TargetDone(target, None)
+                    continue
+                if self.should_skip(target):
+                    yield CleanError(target, f"{target}: ruta excluida")
+                    yield TargetDone(target, None)
+                    continue
+                errors: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+                engine = self._make_engine(target, on_error=errors.put)
+                expected = self._expected.get(target)
+                future = executor.submit(engine.run, target)
+                reported = 0
+                while True:
+                    done = wait([future], timeout=interval).done
+                    while not errors.empty():
+                        reported += 1
+                        yield CleanError(target, errors.get())
+                    if done:
+                        break
+                    yield progress_from(target, engine.snapshot(), reported, expected)
+                report = self.last_report = future.result()
+                self._expected[target] = report.scanned
+                yield progress_from(target, report, reported, expected)
+                yield TargetDone(target, report)
+
+    def preview(self, target_path: str) -> List[Tuple[str, int]]:
+        """
+        Simulación: devuelve (ruta, bytes) de lo que se borraría, sin borrar nada
+        Los directorios que quedarían vacíos aparecen con 0 bytes
+        """
+        if not os.path.exists(target_path) or self.should_skip(target_path):
+            return []
+        return self._run_engine(target_path, dry_run=True).manifest
+
+    def free_space(self, target_path: str, free_bytes: Optional[int] = None,
+                   max_used_percent: Optional[float] = None, policy: str = "largest",
+                   dry_run: bool = False) -> GoalReport:
+        """
+        Limpieza con objetivo: libera free_bytes (o lo necesario para dejar el disco en
+        max_used_percent de uso) borrando primero lo que prioriza policy
+        ("largest", "oldest" por atime o "weighted") y se detiene al alcanzarlo
+        """
+        target = bytes_needed(target_path, free_bytes, max_used_percent)
+        if not os.path.exists(target_path) or self.should_skip(target_path):
+            return GoalReport(target, 0, 0, 0, [], 0.0, [])
+        candidates = iter_candidates(self.matcher, target_path, self._locked_check(target_path))
+        self.last_goal = free_space(candidates, target, policy, dry_run)
+        return self.last_goal
+
+    def find_duplicates(self, paths: List[str], min_size: int = 1,
+                        max_workers: Optional[int] = None) -> DuplicateReport:
+        """
+        Busca archivos duplicados (descargas, adjuntos...) bajo paths sin borrar nada;
+        report.manifest() lista cada copia recuperable y el original que se conserva
+        """
+        roots = [path for path in paths if os.path.exists(path) and not self.should_skip(path)]
+        is_locked = self._locked_check(roots[0]) if len(roots) == 1 else self.is_file_locked
+        return find_duplicates(roots, self.matcher, min_size, max_workers, is_locked)
+
+    def delete_duplicates(self, report: DuplicateReport) -> Tuple[int, int, List[str]]:
+        """Paso explícito: borra las copias de un informe de find_duplicates (archivos, bytes, errores)"""
+        return delete_duplicates(report)
+
+    def _locked_check(self, root: str):
+        """Comprobación de archivos en uso para una pasada sobre root"""
+        self.open_files.refresh()  # Un conjunto por pasada (o el de hace menos de ttl segundos)
+        real_root = os.path.realpath(root)
+        if real_root == root:
+            return self.is_file_locked
+        # /proc y psutil dan rutas reales: se traduce el prefijo en vez de resolver cada archivo
+        return lambda path: self.open_files.is_open(real_root + path[len(root):])
+
+    def _make_engine(self, root: str, progress=None, dry_run: bool = False, on_error=None) -> CleanEngine:
+        """Motor de limpieza configurado para una pasada sobre root"""
+        return CleanEngine(self.matcher, self.max_workers, is_locked=self._locked_check(root),
+                           progress=progress, index=self._scan_index(), dry_run=dry_run, on_error=on_error)
+
+    def _run_engine(self, root: str, progress=None, dry_run: bool = False) -> CleanReport:
+        """Ejecuta el motor de limpieza sobre root y guarda el informe en last_report"""
+        self.last_report = self._make_engine(root, progress, dry_run).run(root)
+        if not dry_run:
+            self._expected[root] = self.last_report.scanned
+        return self.last_report
+
+    def _scan_index(self) -> Optional[ScanIndex]:
+        """Abre el índice de escaneo (se vacía solo si las reglas cambiaron desde la última vez)"""
+        if self.scan_index_path is None:
+            return None
+        rules = self.matcher.fingerprint()
+        if self._index is None or self._index_rules != rules:
+            if self._index is not None:
+                self._index.close()
+            self._index = ScanIndex(self.scan_index_path, rules)
+            self._index_rules = rules
+        return self._index
 
     def clean_windows_temp(self) -> None:
         """Limpieza específica del directorio Temp de Windows"""
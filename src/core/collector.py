@@ -0,0 +1,181 @@
+"""
+Recolector sin interfaz: muestrea CPU, RAM y disco a un ritmo fijo, aplica las reglas
+de alerta y el modelo predictivo y guarda todo en la base, sin Tkinter. Pensado para
+correr como servicio (systemd en Linux); se detiene limpiamente con SIGTERM o Ctrl+C.
+
+Uso (desde src/):
+    python -m core.collector [--db system_monitor.db] [--rate 1.0] [--duration S] [--no-model] [--notify]
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import psutil
+from core.db_manager import DataBase
+
+# (métrica, umbral, umbral de severidad HIGH, mensaje): las mismas reglas que tenía la interfaz
+ALERT_RULES = [
+    ("cpu", 80, 90, "CPU alta"),
+    ("ram", 85, 90, "RAM alta"),
+    ("disk", 90, 90, "Disco lleno"),
+]
+
+
+class Sample(NamedTuple):
+    ts: float
+    cpu: float
+    ram: float
+    disk: float
+    errors: int
+
+
+def check_thresholds(cpu: float, ram: float, disk: float) -> List[Dict]:
+    """Alertas por umbral ({"message", "severity"}) de una muestra."""
+    values = {"cpu": cpu, "ram": ram, "disk": disk}
+    alerts = []
+    for metric, limit, high, label in ALERT_RULES:
+        value = values[metric]
+        if value > limit:
+            alerts.append({"message": f"{label} ({value:.1f}%)", "severity": "HIGH" if value > high else "MEDIUM"})
+    return alerts
+
+
+class CpuSampler:
+    """
+    Uso de CPU sin bloquear: diferencia entre dos lecturas de psutil.cpu_times() (la
+    anterior y la actual) en vez de dormir un segundo dentro de cpu_percent(interval=1).
+    Lleva su propio estado, así que no interfiere con otras llamadas a cpu_percent.
+    """
+
+    def __init__(self):
+        self._last = self._read()
+
+    @staticmethod
+    def _read() -> Tuple[float, float]:
+        times = psutil.cpu_times()
+        total = sum(times)
+        # En Linux guest y guest_nice ya van incluidos en user y nice
+        total -= getattr(times, "guest", 0.0) + getattr(times, "guest_nice", 0.0)
+        idle = times.idle + getattr(times, "iowait", 0.0)
+        return total, total - idle
+
+    def sample(self) -> float:
+        """Porcentaje de CPU desde la llamada anterior (o desde la creación)."""
+        total, busy = self._read()
+        last_total, last_busy = self._last
+        self._last = (total, busy)
+        elapsed = total - last_total
+        if elapsed <= 0:
+            return 0.0
+        return min(100.0, max(0.0, (busy - last_busy) / elapsed * 100))
+
+
+class Collector:
+    """
+    Una muestra por step(): métricas, alertas por umbral y predictivas, y escritura en db.
+    predictive es opcional (PredictiveAI) y notifier también (cualquier objeto con send_notification).
+    """
+
+    def __init__(self, db: DataBase, predictive=None, notifier=None, disk_path: Optional[str] = None):
+        self.db = db
+        self.predictive = predictive
+        self.notifier = notifier
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self.cpu = CpuSampler()
+        self.samples = 0
+
+    def sample(self) -> Sample:
+        """Lee las métricas actuales (sin esperas)."""
+        return Sample(time.time(), self.cpu.sample(), psutil.virtual_memory().percent,
+                      psutil.disk_usage(self.disk_path).percent, self.db.count_recent_errors())
+
+    def step(self) -> Tuple[Sample, List[Dict]]:
+        """Toma una muestra, la guarda y devuelve sus alertas (también guardadas)."""
+        sample = self.sample()
+        self.db.insert_system_stats(sample.cpu, sample.ram, sample.disk, sample.errors)
+        alerts = check_thresholds(sample.cpu, sample.ram, sample.disk)
+        if self.predictive is not None:
+            alerts.extend(self.predictive.analyze_predictive(sample.cpu, sample.ram, sample.disk, sample.errors))
+        if alerts:
+            self.db.insert_alerts([(a["message"], a.get("severity", "MEDIUM")) for a in alerts])
+            if self.notifier is not None:
+                for alert in alerts:
+                    self.notifier.send_notification("Alerta del Sistema", alert["message"])
+        self.samples += 1
+        return sample, alerts
+
+    def run(self, rate: float = 1.0, duration: Optional[float] = None,
+            stop: Optional[threading.Event] = None, on_alert=None) -> int:
+        """
+        Muestrea rate veces por segundo hasta que se active stop o pase duration.
+        Los instantes se fijan desde el inicio, así que el ritmo no se desvía aunque
+        un paso tarde más de lo normal (si se retrasa un periodo entero, se lo salta).
+        """
+        stop = stop or threading.Event()
+        period = 1.0 / rate
+        start = next_at = time.monotonic()
+        while not stop.is_set():
+            try:
+                sample, alerts = self.step()
+                if alerts and on_alert is not None:
+                    on_alert(sample, alerts)
+            except Exception as e:
+                print(f"❌ Error en la muestra: {str(e)}", flush=True)
+            now = time.monotonic()
+            if duration is not None and now - start >= duration:
+                break
+            next_at += period
+            if next_at < now:
+                next_at = now + period - (now - next_at) % period
+            stop.wait(next_at - now)
+        return self.samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="system_monitor.db")
+    parser.add_argument("--rate", type=float, default=1.0, help="Muestras por segundo")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos de ejecución (por defecto, sin fin)")
+    parser.add_argument("--disk", default=None, help="Ruta cuyo disco se mide (por defecto, la raíz)")
+    parser.add_argument("--no-model", action="store_true", help="Solo reglas de umbral, sin modelo predictivo")
+    parser.add_argument("--notify", action="store_true", help="Notificaciones de escritorio (Windows)")
+    args = parser.parse_args()
+
+    db = DataBase(args.db, write_behind=True)
+    predictive = None
+    if not args.no_model:
+        from core.ai_predictive import PredictiveAI
+        from core.features import FeaturePipeline
+        from core.prefilter import StreamingPrefilter
+
+        predictive = PredictiveAI(db.db_path, db=db, prefilter=StreamingPrefilter(), features=FeaturePipeline())
+    notifier = None
+    if args.notify:
+        from core.notifier import Notifier
+
+        notifier = Notifier()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())  # Parada ordenada como servicio
+
+    def report(sample: Sample, alerts: List[Dict]) -> None:
+        for alert in alerts:
+            print(f"⚠️ [{alert.get('severity', 'MEDIUM')}] {alert['message']}", flush=True)
+
+    collector = Collector(db, predictive, notifier, args.disk)
+    print(f"📈 Recolector a {args.rate:g} Hz (base {args.db}, modelo {'no' if predictive is None else 'sí'})",
+          flush=True)
+    try:
+        collector.run(args.rate, args.duration, stop, on_alert=report)
+    finally:
+        if predictive is not None:
+            predictive.close()
+        db.close()
+        print(f"Resumen: {collector.samples} muestras", flush=True)
+
+
+if __name__ == "__main__":
+    main()
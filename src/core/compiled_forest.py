@@ -0,0 +1,195 @@
+import copy
+import hashlib
+import os
+import numpy as np
+from typing import Dict, Optional, Union
+
+# Arrays que se guardan en el .npz (todos los árboles concatenados)
+_ARRAYS = ("feature", "threshold", "children", "missing_left", "leaf_value", "roots")
+
+
+def average_path_length(n_samples) -> np.ndarray:
+    """Longitud media de una búsqueda fallida en un BST de n muestras (c(n) del paper)."""
+    n = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    big = n > 2
+    result[big] = 2.0 * (np.log(n[big] - 1.0) + np.euler_gamma) - 2.0 * (n[big] - 1.0) / n[big]
+    return result
+
+
+def ks_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Estadístico de Kolmogorov-Smirnov entre dos muestras ya ordenadas."""
+    points = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, points, side='right') / len(a)
+    cdf_b = np.searchsorted(b, points, side='right') / len(b)
+    return float(np.abs(cdf_a - cdf_b).max())
+
+
+class CompiledForest:
+    """
+    IsolationForest aplanado en arrays numpy contiguos, sin dependencia de sklearn.
+    Los nodos de todos los árboles comparten índices globales y children guarda
+    (izquierdo, derecho) de cada nodo en posiciones 2i y 2i+1; en las hojas ambos
+    apuntan a la propia hoja, así que recorrer max_depth pasos deja cada muestra
+    en su hoja sin ramas especiales. leaf_value ya incluye la profundidad
+    del nodo más c(n_node_samples) - 1, como en score_samples de sklearn.
+    train_scores (ordenados) permite mover el umbral sin volver a entrenar.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], offset: float, denominator: float,
+                 contamination, n_features: int, max_depth: int,
+                 train_scores: Optional[np.ndarray] = None):
+        for name in _ARRAYS:
+            setattr(self, name, np.ascontiguousarray(arrays[name]))
+        self.offset_ = float(offset)
+        self.denominator = float(denominator)
+        self.contamination = contamination
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.train_scores = train_scores
+        self._fingerprint: Optional[str] = None
+
+    def fingerprint(self) -> str:
+        """Huella estable de los árboles y el umbral (identifica la versión del modelo)."""
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for name in ("feature", "threshold", "children", "leaf_value"):
+                digest.update(getattr(self, name).tobytes())
+            digest.update(np.float64(self.offset_).tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Exporta un IsolationForest ya entrenado (solo lee sus atributos)."""
+        features, thresholds, children, missing, values, roots = [], [], [], [], [], []
+        base = 0
+        max_depth = 0
+        for estimator, used in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            # sklearn solo indexa columnas cuando el árbol usa un subconjunto de ellas
+            feature = tree.feature.astype(np.int64)
+            if len(used) != model.n_features_in_:
+                feature = np.asarray(used)[np.where(is_leaf, 0, feature)]
+            own = np.arange(n_nodes)
+            left = np.where(is_leaf, own, tree.children_left)
+            right = np.where(is_leaf, own, tree.children_right)
+
+            depth = np.ones(n_nodes)  # La raíz cuenta como 1 (longitud del decision_path)
+            for node in range(n_nodes):  # Los hijos siempre tienen índice mayor que el padre
+                if not is_leaf[node]:
+                    depth[left[node]] = depth[right[node]] = depth[node] + 1
+
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(tree.threshold)
+            children.append(np.column_stack([left, right]).ravel() + base)
+            missing.append(getattr(tree, "missing_go_to_left", np.zeros(n_nodes, dtype=np.uint8)))
+            values.append(depth + average_path_length(tree.n_node_samples) - 1.0)
+            roots.append(base)
+            max_depth = max(max_depth, int(depth.max()) - 1)
+            base += n_nodes
+
+        arrays = {
+            "feature": np.concatenate(features).astype(np.int32),
+            "threshold": np.concatenate(thresholds).astype(np.float64),
+            "children": np.concatenate(children).astype(np.int32),
+            "missing_left": np.concatenate(missing).astype(bool),
+            "leaf_value": np.concatenate(values),
+            "roots": np.asarray(roots, dtype=np.int32),
+        }
+        denominator = len(model.estimators_) * average_path_length([model.max_samples_])[0]
+        return cls(arrays, model.offset_, denominator, model.contamination,
+                   model.n_features_in_, max_depth)
+
+    # ========== PERSISTENCIA ==========
+    def save(self, path: str) -> None:
+        """Guarda el bosque en un .npz sin comprimir (escritura atómica)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **{name: getattr(self, name) for name in _ARRAYS},
+                     meta=np.array([self.offset_, self.denominator, self.n_features, self.max_depth]),
+                     contamination=np.array(str(self.contamination)),
+                     **({} if self.train_scores is None else {"train_scores": self.train_scores}))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        """Carga un bosque exportado con save."""
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in _ARRAYS}
+            offset, denominator, n_features, max_depth = data["meta"].tolist()
+            contamination = str(data["contamination"])
+            train_scores = data["train_scores"] if "train_scores" in data.files else None
+        if contamination != "auto":
+            contamination = float(contamination)
+        return cls(arrays, offset, denominator, contamination, n_features, max_depth, train_scores)
+
+    # ========== UMBRAL ==========
+    def calibrate(self, X) -> None:
+        """Guarda la distribución (ordenada) de scores de los datos de entrenamiento."""
+        self.train_scores = np.sort(self.score_samples(X))
+
+    def threshold_for(self, contamination: Union[float, str]) -> float:
+        """
+        offset_ que sklearn habría calculado con esta contaminación: el percentil
+        de los scores de entrenamiento (interpolación lineal, como np.percentile).
+        """
+        if contamination == "auto":
+            return -0.5
+        if self.train_scores is None or not len(self.train_scores):
+            raise ValueError("El modelo no tiene scores de entrenamiento para recalibrar")
+        position = float(contamination) * (len(self.train_scores) - 1)
+        low = int(position)
+        high = min(low + 1, len(self.train_scores) - 1)
+        return float(self.train_scores[low] + (self.train_scores[high] - self.train_scores[low]) * (position - low))
+
+    def with_contamination(self, contamination: Union[float, str]) -> "CompiledForest":
+        """Copia que comparte los árboles y solo cambia el umbral (sin reentrenar)."""
+        clone = copy.copy(self)
+        clone.offset_ = self.threshold_for(contamination)
+        clone.contamination = contamination
+        clone._fingerprint = None
+        return clone
+
+    # ========== PUNTUACIÓN ==========
+    def score_samples(self, X, chunk_size: int = 512) -> np.ndarray:
+        """Equivalente a IsolationForest.score_samples (más bajo = más anómalo)."""
+        # Como sklearn: las muestras se comparan en float32 con umbrales float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Se esperaban {self.n_features} columnas, llegaron {X.shape[1]}")
+        depths = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            depths[start:start + chunk_size] = self._path_lengths(X[start:start + chunk_size])
+        if self.denominator == 0:
+            # Entrenado con una sola muestra por árbol: sklearn fija 2 ** -1 a todas
+            return np.full(len(X), -0.5)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def _path_lengths(self, X: np.ndarray) -> np.ndarray:
+        """Suma de longitudes de camino de cada muestra en todos los árboles."""
+        # Lotes pequeños (chunk_size) mantienen los temporales N×árboles en caché
+        flat = np.ascontiguousarray(X).ravel()
+        offsets = (np.arange(len(X), dtype=np.int32) * self.n_features)[:, None]
+        has_nan = bool(np.isnan(flat).any())
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            values = flat[offsets + self.feature[nodes]]
+            go_right = ~(values <= self.threshold[nodes])  # NaN va a la derecha...
+            if has_nan:  # ...salvo que el nodo aprendiera a mandarlos a la izquierda
+                go_right &= ~(np.isnan(values) & self.missing_left[nodes])
+            nodes = self.children[2 * nodes + go_right]
+        return self.leaf_value[nodes].sum(axis=1)
+
+    def decision_function(self, X) -> np.ndarray:
+        """score_samples - offset_ (negativo = anomalía)."""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        """1 normal / -1 anomalía, igual que IsolationForest.predict."""
+        return np.where(self.decision_function(X) < 0, -1, 1)
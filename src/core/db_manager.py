@@ -1,13 +1,167 @@
 import sqlite3
-from typing import List, Tuple, Optional  # NEW: Tipado para claridad
+import numpy as np
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Tuple, Optional, Dict, Iterator  # NEW: Tipado para claridad
+
+# Marcador interno para detener el hilo escritor
+_STOP = object()
+
+# Resoluciones de las tablas de agregados (segundos por intervalo)
+ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# Retención por defecto en días (None = sin límite)
+DEFAULT_RETENTION = {"raw": 30, "1m": 90, "1h": 730, "1d": None}
+
+_METRICS = ("cpu", "ram", "disk")
+
+# Formatos de almacenamiento de las muestras crudas
+LAYOUTS = ("legacy", "compact")
+
+# Escala de punto fijo del formato compacto (centésimas de punto porcentual)
+METRIC_SCALE = 100
+
+# Host de las muestras que toma este equipo; los demás llegan del agregador de flota
+LOCAL_HOST = 0
+LOCAL_HOST_NAME = "local"
+
+
+def _utc_text(epoch: float) -> str:
+    """Timestamp UTC con el mismo formato que CURRENT_TIMESTAMP de SQLite."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(epoch))
+
+
+def _utc_now() -> str:
+    """Timestamp UTC actual en formato SQLite."""
+    return _utc_text(time.time())
+
+
+class SlidingWindowCounter:
+    """Contador de eventos en una ventana deslizante con coste O(1) amortizado."""
+
+    def __init__(self, window_seconds: int, resolution: int = 1):
+        self.window_seconds = window_seconds
+        self.resolution = resolution
+        self._buckets = deque()  # [bucket, count] en orden cronológico
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def add(self, timestamp: Optional[float] = None, count: int = 1) -> None:
+        """Registra count eventos ocurridos en timestamp (por defecto, ahora)."""
+        bucket = int(timestamp if timestamp is not None else time.time()) // self.resolution
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] >= bucket:
+                # Mismo intervalo (o evento ligeramente desordenado)
+                self._buckets[-1][1] += count
+            else:
+                self._buckets.append([bucket, count])
+            self._total += count
+
+    def count(self, now: Optional[float] = None) -> int:
+        """Eventos dentro de la ventana que termina en now."""
+        oldest = (int(now if now is not None else time.time()) - self.window_seconds) // self.resolution
+        with self._lock:
+            while self._buckets and self._buckets[0][0] < oldest:
+                self._total -= self._buckets.popleft()[1]
+            return self._total
+
 
 class DataBase:
-    def __init__(self, db_path: str):
-        """Inicializa la conexión a la base de datos con validación de tipos."""
+    def __init__(self, db_path: str, write_behind: bool = False, batch_size: int = 100,
+                 flush_interval: float = 1.0, queue_size: int = 10000,
+                 retention: Optional[Dict[str, Optional[int]]] = None,
+                 retention_interval: float = 3600, error_window_hours: int = 1,
+                 pool_size: int = 4, layout: Optional[str] = None, migrate_on_open: bool = True,
+                 archive=None):
+        """
+        Inicializa la conexión a la base de datos con validación de tipos.
+        self.conn es la única conexión de escritura; las lecturas usan un pool de
+        hasta pool_size conexiones de solo lectura que trabajan en paralelo (WAL).
+        layout elige el formato de las muestras crudas: "legacy" (system_stats) o
+        "compact" (system_stats_compact); por defecto se usa el guardado en la base.
+        Con migrate_on_open, una base compacta copia al abrirse las filas antiguas pendientes.
+        Con write_behind=True las inserciones se encolan y un hilo escritor
+        las confirma por lotes (por tamaño o por tiempo) en una sola transacción.
+        retention fija los días que se conservan por resolución ("raw", "1m", "1h", "1d").
+        archive (ColumnarArchive) recibe las filas crudas que salen de la ventana de retención.
+        """
         self.db_path = db_path
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
         self.cursor = self.conn.cursor()
+        self._write_lock = threading.RLock()
+        self.layout = self._resolve_layout(layout)
         self.create_tables()
+        if self.layout == "compact" and migrate_on_open:
+            # Recupera filas escritas en el formato antiguo desde la última migración
+            self.migrate_legacy_rows()
+
+        # Pool de lectores: conexiones reutilizables, sin reconectar por consulta
+        self.pool_size = pool_size
+        self._readers = queue.LifoQueue()
+        self._reader_conns = []
+        self._pool_lock = threading.Lock()
+
+        # Contador en memoria de alertas recientes (evita consultar SQLite en cada análisis)
+        self.error_window = SlidingWindowCounter(error_window_hours * 3600)
+        self._seed_error_window()
+
+        # Política de retención (se aplica como mucho cada retention_interval segundos)
+        self.retention = dict(DEFAULT_RETENTION)
+        if retention:
+            self.retention.update(retention)
+        self.retention_interval = retention_interval
+        self._last_retention = None
+        self.archive = archive
+
+        # Escritura diferida (group commit)
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = None
+        self._writer = None
+        self._writer_stats = {"flushes": 0, "rows": 0, "last_flush_ms": 0.0,
+                              "max_flush_ms": 0.0, "total_flush_ms": 0.0,
+                              "failed_batches": 0, "failed_rows": 0}
+        if write_behind:
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer.start()
+
+    def _resolve_layout(self, layout: Optional[str]) -> str:
+        """Determina el formato de almacenamiento y lo registra en la tabla meta."""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        stored = self.get_meta("layout")
+        layout = layout or stored or "legacy"
+        if layout not in LAYOUTS:
+            raise ValueError(f"Formato desconocido: {layout}")
+        if stored == "compact" and layout == "legacy":
+            raise ValueError("La base ya fue migrada al formato compacto")
+        if layout == "compact" and stored != "compact":
+            self.set_meta("layout", layout)
+        return layout
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Lee un valor de la tabla meta."""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Guarda un valor en la tabla meta."""
+        with self._write_lock, self.conn:
+            self.conn.execute('''
+                INSERT INTO meta(key, value) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            ''', (key, str(value)))
 
     def create_tables(self) -> None:
         """Crea las tablas con restricciones de validación mejoradas."""
@@ -18,7 +172,8 @@ class DataBase:
                 ram REAL CHECK (ram >= 0 AND ram <= 100),  -- NEW: Validación de rango
                 disk REAL CHECK (disk >= 0 AND disk <= 100),  -- NEW: Validación de rango
                 error_count INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                host_id INTEGER NOT NULL DEFAULT 0  -- Equipo de origen (tabla hosts)
             )
         ''')
         self.cursor.execute('''
@@ -26,58 +181,755 @@ class DataBase:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 message TEXT,
                 severity TEXT CHECK (severity IN ("LOW", "MEDIUM", "HIGH")),  -- NEW: Niveles de alerta (comillas dobles)
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                host_id INTEGER NOT NULL DEFAULT 0
             )
         ''')
+        self._migrate_alert_severity()
+        self._migrate_host_columns()
+        self.create_hosts_table()
+        if self.layout == "compact":
+            self.create_compact_table()
+        self.create_rollup_tables()
+        self.create_metrics_table()
+        self.create_indexes()
         self.conn.commit()
 
+    def create_compact_table(self) -> None:
+        """
+        Formato compacto: epoch entero, métricas en punto fijo y clave agrupada por host y
+        tiempo. seq numera las muestras de un mismo host dentro del mismo segundo.
+        """
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(system_stats_compact)")]
+        schema = f'''
+            CREATE TABLE IF NOT EXISTS system_stats_compact (
+                host_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,  -- Epoch UTC en segundos
+                seq INTEGER NOT NULL DEFAULT 0,  -- Orden dentro del mismo segundo
+                cpu INTEGER NOT NULL CHECK (cpu BETWEEN 0 AND {100 * METRIC_SCALE}),
+                ram INTEGER NOT NULL CHECK (ram BETWEEN 0 AND {100 * METRIC_SCALE}),
+                disk INTEGER NOT NULL CHECK (disk BETWEEN 0 AND {100 * METRIC_SCALE}),
+                error_count INTEGER NOT NULL,
+                PRIMARY KEY (host_id, ts, seq)
+            ) STRICT, WITHOUT ROWID
+        '''
+        if columns and "seq" not in columns:
+            # Tabla anterior (clave ts o (host_id, ts), una fila por segundo): se reconstruye en una transacción
+            host = "host_id" if "host_id" in columns else str(LOCAL_HOST)
+            self.cursor.executescript(f'''
+                BEGIN;
+                ALTER TABLE system_stats_compact RENAME TO system_stats_compact_old;
+                {schema};
+                INSERT INTO system_stats_compact(host_id, ts, seq, cpu, ram, disk, error_count)
+                SELECT {host}, ts, 0, cpu, ram, disk, error_count FROM system_stats_compact_old;
+                DROP TABLE system_stats_compact_old;
+                COMMIT;
+            ''')
+        else:
+            self.cursor.execute(schema)
+
+    def create_hosts_table(self) -> None:
+        """Equipos conocidos y su grupo (los modelos de la flota se entrenan por host o por grupo)."""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hosts (
+                host_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                host_group TEXT,  -- Clase de equipo con un perfil de carga parecido
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL
+            )
+        ''')
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(hosts)")]
+        if 'host_group' not in columns:
+            self.cursor.execute("ALTER TABLE hosts ADD COLUMN host_group TEXT")
+        now = int(time.time())
+        self.cursor.execute('''
+            INSERT OR IGNORE INTO hosts(host_id, name, first_seen, last_seen) VALUES (?, ?, ?, ?)
+        ''', (LOCAL_HOST, LOCAL_HOST_NAME, now, now))
+        self._host_ids = dict(self.cursor.execute("SELECT name, host_id FROM hosts"))
+
+    def _migrate_alert_severity(self) -> None:
+        """Agrega la columna severity a bases antiguas de alerts (antes add_severity_column.py)."""
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(alerts)")]
+        if 'severity' not in columns:
+            self.cursor.execute("ALTER TABLE alerts ADD COLUMN severity TEXT")
+
+    def _migrate_host_columns(self) -> None:
+        """Agrega host_id a bases anteriores: todas sus filas son del equipo local."""
+        for table in ("system_stats", "alerts"):
+            columns = [row[1] for row in self.cursor.execute(f"PRAGMA table_info({table})")]
+            if 'host_id' not in columns:
+                self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN host_id INTEGER NOT NULL DEFAULT {LOCAL_HOST}")
+
+    def create_indexes(self) -> None:
+        """Crea (o migra en bases existentes) los índices por timestamp."""
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_system_stats_timestamp ON system_stats(timestamp)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_system_stats_host_timestamp ON system_stats(host_id, timestamp)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)
+        ''')
+
+    def create_rollup_tables(self) -> None:
+        """Crea las tablas de agregados (min/avg/max/count) y las rellena si están vacías."""
+        source_layout = self.layout
+        if source_layout == "compact" and self.cursor.execute(
+                f"SELECT 1 FROM system_stats_compact WHERE host_id = {LOCAL_HOST} LIMIT 1").fetchone() is None:
+            # Base recién pasada a compacto: el histórico sigue en system_stats
+            source_layout = "legacy"
+        for name, seconds in ROLLUP_RESOLUTIONS.items():
+            table = f"system_stats_{name}"
+            columns = ", ".join(f"{m}_min REAL, {m}_max REAL, {m}_sum REAL" for m in _METRICS)
+            self.cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    bucket INTEGER PRIMARY KEY,  -- Epoch UTC de inicio del intervalo
+                    samples INTEGER NOT NULL,
+                    {columns}
+                )
+            ''')
+            # Migración: agregar el histórico existente la primera vez
+            if self.cursor.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None:
+                aggregates = ", ".join(f"MIN({m}), MAX({m}), SUM({m})" for m in _METRICS)
+                self.cursor.execute(f'''
+                    INSERT INTO {table}
+                    SELECT ts / {seconds} * {seconds}, COUNT(*), {aggregates}
+                    FROM ({self._raw_source(source_layout)})
+                    GROUP BY 1
+                ''')
+
+    def create_metrics_table(self) -> None:
+        """Agregados de predicciones por modelo, hora, intervalo de score, predicción y realidad."""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_bins (
+                model TEXT NOT NULL,  -- Huella del modelo que puntuó las filas
+                hour INTEGER NOT NULL,  -- Epoch UTC de inicio de la hora
+                bin INTEGER NOT NULL,  -- Intervalo del score de anomalía
+                pred INTEGER NOT NULL,  -- 1 si el modelo la marcó como anomalía
+                truth INTEGER NOT NULL,  -- 1 si la muestra tenía errores
+                samples INTEGER NOT NULL,
+                PRIMARY KEY (model, hour, bin, pred, truth)
+            ) WITHOUT ROWID
+        ''')
+
+    @staticmethod
+    def _raw_source(layout: str) -> str:
+        """Subconsulta (ts, cpu, ram, disk, error_count) sobre las muestras crudas locales de un formato."""
+        if layout == "compact":
+            scaled = ", ".join(f"{m} / {float(METRIC_SCALE)} AS {m}" for m in _METRICS)
+            return f"SELECT ts, {scaled}, error_count FROM system_stats_compact WHERE host_id = {LOCAL_HOST}"
+        return f'''
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER) AS ts, cpu, ram, disk, error_count
+            FROM system_stats WHERE host_id = {LOCAL_HOST} AND timestamp IS NOT NULL
+        '''
+
     def insert_system_stats(self, cpu: float, ram: float, disk: float, error_count: int) -> None:
         """Inserta estadísticas del sistema con validación de datos."""
         if not all(0 <= x <= 100 for x in (cpu, ram, disk)):  # NEW: Validación adicional
             raise ValueError("Los valores de CPU, RAM y DISK deben estar entre 0 y 100")
-        self.cursor.execute('''
-            INSERT INTO system_stats(cpu, ram, disk, error_count)
-            VALUES (?, ?, ?, ?)
-        ''', (cpu, ram, disk, error_count))
-        self.conn.commit()
+        row = (cpu, ram, disk, error_count, time.time())
+        if self.write_behind:
+            self._queue.put(("stats", row))
+            return
+        with self._write_lock:
+            with self.conn:
+                self._write_stats(self.conn, [row])
+            self._maybe_apply_retention()
 
     def insert_alert(self, message: str, severity: str = 'MEDIUM') -> None:  # NEW: Parámetro severity
         """Inserta una alerta con nivel de severidad."""
-        self.cursor.execute('''
-            INSERT INTO alerts(message, severity) VALUES (?, ?)
-        ''', (message, severity))  # NEW: Ahora incluye severity
-        self.conn.commit()
+        self.error_window.add()
+        if self.write_behind:
+            self._queue.put(("alert", (message, severity, _utc_now())))
+            return
+        with self._write_lock:
+            self.cursor.execute('''
+                INSERT INTO alerts(message, severity) VALUES (?, ?)
+            ''', (message, severity))  # NEW: Ahora incluye severity
+            self.conn.commit()
+
+    def insert_alerts(self, alerts: List[Tuple[str, str]]) -> None:
+        """Inserta varias alertas (mensaje, severidad) en una sola transacción."""
+        self.error_window.add(count=len(alerts))
+        if self.write_behind:
+            timestamp = _utc_now()
+            for message, severity in alerts:
+                self._queue.put(("alert", (message, severity, timestamp)))
+            return
+        with self._write_lock, self.conn:
+            self.cursor.executemany('''
+                INSERT INTO alerts(message, severity) VALUES (?, ?)
+            ''', alerts)
 
     def count_recent_errors(self, hours: int = 1) -> int:  # NEW: Parámetro flexible
         """Cuenta alertas recientes (por defecto, últimas 1 hora)."""
-        self.cursor.execute('''
-            SELECT COUNT(*) FROM alerts 
-            WHERE timestamp >= datetime("now", ?)
-        ''', (f'-{hours} hours',))  # NEW: Horas personalizadas
-        return self.cursor.fetchone()[0]
+        if hours * 3600 == self.error_window.window_seconds:
+            return self.error_window.count()
+        return self._read('''
+            SELECT COUNT(*) FROM alerts
+            WHERE host_id = ? AND timestamp >= datetime("now", ?)
+        ''', (LOCAL_HOST, f'-{hours} hours'))[0][0]  # NEW: Horas personalizadas
+
+    def _seed_error_window(self) -> None:
+        """Carga en el contador las alertas ya registradas dentro de la ventana."""
+        rows = self._read('''
+            SELECT CAST(strftime('%s', timestamp) AS INTEGER), COUNT(*) FROM alerts
+            WHERE host_id = ? AND timestamp >= datetime("now", ?)
+            GROUP BY 1 ORDER BY 1
+        ''', (LOCAL_HOST, f'-{self.error_window.window_seconds} seconds'))
+        for epoch, count in rows:
+            self.error_window.add(epoch, count)
 
     def get_all_alerts(self, limit: Optional[int] = None) -> List[Tuple]:  # NEW: Límite opcional
         """Obtiene todas las alertas, con límite opcional."""
         query = '''
             SELECT timestamp, message, severity FROM alerts  -- NEW: Incluye severity
+            WHERE host_id = ?
             ORDER BY timestamp DESC
         '''
         if limit:
             query += f' LIMIT {limit}'  # NEW: Soporte para límite
-        self.cursor.execute(query)
-        return self.cursor.fetchall()
+        return self._read(query, (LOCAL_HOST,))
 
     def close(self) -> None:
-        """Cierra la conexión a la base de datos."""
+        """Vacía la cola de escritura pendiente y cierra todas las conexiones."""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+        with self._pool_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns = []
         self.conn.close()
 
+    # ========== POOL DE LECTURA ==========
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Presta una conexión de solo lectura del pool (bloquea si están todas en uso)."""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if len(self._reader_conns) < self.pool_size:
+                    conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    conn.execute('PRAGMA query_only=ON')
+                    self._reader_conns.append(conn)
+            if conn is None:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _read(self, query: str, params: Tuple = ()) -> List[Tuple]:
+        """Ejecuta una consulta de lectura en una conexión del pool."""
+        with self.reader() as conn:
+            return conn.execute(query, params).fetchall()
+
     # NEW: Métodos adicionales para gráficos (sin afectar lo existente)
-    def get_historical_stats(self, days: int = 7) -> List[Tuple]:
-        """Obtiene datos históricos para gráficos."""
-        self.cursor.execute('''
-            SELECT timestamp, cpu, ram, disk 
-            FROM system_stats 
-            WHERE timestamp >= datetime("now", ?)
+    def get_historical_stats(self, days: int = 7, points: Optional[int] = None) -> List[Tuple]:
+        """Obtiene datos históricos para gráficos (agregados si se indica points)."""
+        if points:
+            return self.get_stats_range(days, points)
+        if self.layout == "compact":
+            scaled = ", ".join(f"{m} / {float(METRIC_SCALE)}" for m in _METRICS)
+            return self._read(f'''
+                SELECT datetime(ts, 'unixepoch'), {scaled}
+                FROM system_stats_compact
+                WHERE host_id = ? AND ts >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+                ORDER BY ts
+            ''', (LOCAL_HOST, int(days * 86400)))
+        return self._read('''
+            SELECT timestamp, cpu, ram, disk
+            FROM system_stats
+            WHERE host_id = ? AND timestamp >= datetime("now", ?)
             ORDER BY timestamp
-        ''', (f'-{days} days',))
-        return self.cursor.fetchall()
\ No newline at end of file
+        ''', (LOCAL_HOST, f'-{days} days'))
+
+    def get_stats_arrays(self, days: Optional[float] = None, since: Optional[int] = None,
+                         until: Optional[int] = None, host_id: int = LOCAL_HOST) -> Dict[str, np.ndarray]:
+        """
+        Devuelve las muestras crudas de un host como arrays numpy: ts (epoch int64),
+        cpu/ram/disk (float64) y error_count (int64), en orden cronológico.
+        El rango se indica con days (últimos días) o con epochs since <= ts < until.
+        """
+        if days is not None:
+            since = int(time.time() - days * 86400)
+        query, params = self._stats_query(since, until, host_id)
+        return self._rows_to_arrays(self._read(query, params))
+
+    def iter_stats_chunks(self, chunk_size: int = 50000, since: Optional[int] = None,
+                          until: Optional[int] = None, host_id: int = LOCAL_HOST) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Recorre las muestras crudas en bloques de chunk_size filas (mismo formato
+        que get_stats_arrays) sin cargar la tabla entera en memoria.
+        """
+        query, params = self._stats_query(since, until, host_id)
+        with self.reader() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield self._rows_to_arrays(rows)
+
+    def _stats_query(self, since: Optional[int], until: Optional[int],
+                     host_id: int = LOCAL_HOST) -> Tuple[str, Tuple]:
+        """Consulta de muestras crudas (ts, cpu, ram, disk, error_count) de un host en orden cronológico."""
+        conditions, params = ["host_id = ?"], [int(host_id)]
+        if self.layout == "compact":
+            query = "SELECT ts, cpu, ram, disk, error_count FROM system_stats_compact"
+            if since is not None:
+                conditions.append("ts >= ?")
+                params.append(int(since))
+            if until is not None:
+                conditions.append("ts < ?")
+                params.append(int(until))
+            order = " ORDER BY ts"
+        else:
+            query = '''
+                SELECT CAST(strftime('%s', timestamp) AS INTEGER), cpu, ram, disk, error_count
+                FROM system_stats
+            '''
+            conditions.append("timestamp IS NOT NULL")
+            if since is not None:
+                conditions.append("timestamp >= datetime(?, 'unixepoch')")
+                params.append(int(since))
+            if until is not None:
+                conditions.append("timestamp < datetime(?, 'unixepoch')")
+                params.append(int(until))
+            order = " ORDER BY timestamp"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return query + order, tuple(params)
+
+    def _rows_to_arrays(self, rows: List[Tuple]) -> Dict[str, np.ndarray]:
+        """Convierte filas (ts, cpu, ram, disk, error_count) en columnas numpy."""
+        dtype = np.int64 if self.layout == "compact" else np.float64
+        data = np.array(rows, dtype=dtype).reshape(len(rows), 5)
+        arrays = {"ts": data[:, 0].astype(np.int64), "error_count": data[:, 4].astype(np.int64)}
+        for i, metric in enumerate(_METRICS, start=1):
+            column = data[:, i].astype(np.float64)
+            arrays[metric] = column / METRIC_SCALE if self.layout == "compact" else column
+        return arrays
+
+    def get_stats_bounds(self, host_id: int = LOCAL_HOST) -> Optional[Tuple[int, int]]:
+        """Epoch de la muestra cruda más antigua y de la más reciente de un host (None si no hay datos)."""
+        if self.layout == "compact":
+            query = "SELECT MIN(ts), MAX(ts) FROM system_stats_compact WHERE host_id = ?"
+        else:
+            query = '''
+                SELECT CAST(strftime('%s', MIN(timestamp)) AS INTEGER),
+                       CAST(strftime('%s', MAX(timestamp)) AS INTEGER)
+                FROM system_stats WHERE host_id = ?
+            '''
+        first, last = self._read(query, (int(host_id),))[0]
+        return None if first is None else (first, last)
+
+    def delete_stats_before(self, epoch: int) -> int:
+        """Elimina las muestras crudas anteriores a epoch de todos los hosts."""
+        with self._write_lock, self.conn:
+            if self.layout == "compact":
+                # host_id IN (...) permite recorrer la clave (host_id, ts) host a host
+                return self.conn.execute('''
+                    DELETE FROM system_stats_compact
+                    WHERE host_id IN (SELECT host_id FROM hosts) AND ts < ?
+                ''', (int(epoch),)).rowcount
+            return self.conn.execute(
+                "DELETE FROM system_stats WHERE timestamp < datetime(?, 'unixepoch')", (int(epoch),)
+            ).rowcount
+
+    def migrate_legacy_rows(self, batch_size: int = 5000, max_batches: Optional[int] = None) -> int:
+        """
+        Copia al formato compacto las filas de system_stats aún no migradas y devuelve
+        cuántas leyó. Trabaja en transacciones cortas y guarda el avance en meta, de modo
+        que se puede ejecutar con la aplicación en marcha y reanudar si se interrumpe.
+        Las filas que de verdad llegaron y las que no (incompletas) quedan en
+        migration_counts(); purge_migrated_legacy_rows se niega a borrar si falta alguna.
+        """
+        if self.layout != "compact":
+            raise ValueError("La migración requiere layout='compact'")
+        copied = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            with self._write_lock, self.conn:
+                watermark = int(self.get_meta("compact_migrated_id") or 0)
+                rows = self.conn.execute('''
+                    SELECT id, CAST(strftime('%s', timestamp) AS INTEGER), cpu, ram, disk, error_count, host_id
+                    FROM system_stats WHERE id > ? ORDER BY id LIMIT ?
+                ''', (watermark, batch_size)).fetchall()
+                if not rows:
+                    break
+                by_host = {}
+                for _, ts, cpu, ram, disk, errors, host_id in rows:
+                    if ts is not None and None not in (cpu, ram, disk):
+                        by_host.setdefault(host_id, []).append((cpu, ram, disk, errors or 0, ts))
+                landed = sum(self._write_compact(self.conn, host_rows, host_id)
+                             for host_id, host_rows in by_host.items())
+                total_landed, total_lost = self.migration_counts()
+                self.conn.executemany('''
+                    INSERT INTO meta(key, value) VALUES (?, ?)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value
+                ''', [("compact_migrated_id", str(rows[-1][0])),
+                      ("compact_migrated_rows", str(total_landed + landed)),
+                      ("compact_migration_lost", str(total_lost + len(rows) - landed))])
+            copied += len(rows)
+            batches += 1
+        return copied
+
+    def migration_counts(self) -> Tuple[int, int]:
+        """(filas copiadas al formato compacto, filas antiguas que no llegaron a copiarse)."""
+        return (int(self.get_meta("compact_migrated_rows") or 0),
+                int(self.get_meta("compact_migration_lost") or 0))
+
+    def purge_migrated_legacy_rows(self, batch_size: int = 5000, force: bool = False) -> int:
+        """
+        Borra de system_stats, por lotes, las filas ya copiadas al formato compacto.
+        Si alguna fila migrada no llegó a la tabla compacta lanza ValueError sin borrar
+        nada (force=True borra igualmente).
+        """
+        landed, lost = self.migration_counts()
+        if lost and not force:
+            raise ValueError(f"{lost} filas antiguas no se copiaron al formato compacto "
+                             f"({landed} sí); no se borra nada")
+        watermark = int(self.get_meta("compact_migrated_id") or 0)
+        deleted = 0
+        while True:
+            with self._write_lock, self.conn:
+                count = self.conn.execute('''
+                    DELETE FROM system_stats WHERE id IN (
+                        SELECT id FROM system_stats WHERE id <= ? LIMIT ?
+                    )
+                ''', (watermark, batch_size)).rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+
+    # ========== AGREGADOS Y RETENCIÓN ==========
+    def choose_resolution(self, days: float, points: int) -> str:
+        """
+        Elige la resolución más gruesa que aún llena points puntos en el rango
+        y cuya retención lo cubre. Devuelve "raw", "1m", "1h" o "1d".
+        """
+        span = days * 86400
+
+        def covers(level: str) -> bool:
+            keep = self.retention.get(level)
+            return keep is None or keep >= days
+
+        ordered = sorted(ROLLUP_RESOLUTIONS.items(), key=lambda item: -item[1])
+        for name, seconds in ordered:
+            if covers(name) and span / seconds >= points:
+                return name
+        if covers("raw"):
+            return "raw"
+        # Ninguna resolución llena los puntos: la más fina que conserve el rango
+        for name, _ in reversed(ordered):
+            if covers(name):
+                return name
+        return ordered[0][0]
+
+    def get_stats_range(self, days: float = 7, points: int = 300) -> List[Tuple]:
+        """Obtiene (timestamp, cpu, ram, disk) del rango con la resolución adecuada."""
+        resolution = self.choose_resolution(days, points)
+        if resolution == "raw":
+            return self.get_historical_stats(days)
+        averages = ", ".join(f"{m}_sum / samples" for m in _METRICS)
+        return self._read(f'''
+            SELECT datetime(bucket, 'unixepoch'), {averages}
+            FROM system_stats_{resolution}
+            WHERE bucket >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+            ORDER BY bucket
+        ''', (int(days * 86400),))
+
+    def get_rollups(self, resolution: str, days: float = 7) -> List[Tuple]:
+        """Devuelve (bucket, samples, min/avg/max por métrica) de una tabla de agregados."""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Resolución desconocida: {resolution}")
+        columns = ", ".join(f"{m}_min, {m}_sum / samples, {m}_max" for m in _METRICS)
+        return self._read(f'''
+            SELECT bucket, samples, {columns}
+            FROM system_stats_{resolution}
+            WHERE bucket >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+            ORDER BY bucket
+        ''', (int(days * 86400),))
+
+    # ========== HOSTS DE LA FLOTA ==========
+    def register_host(self, name: str, group: Optional[str] = None) -> int:
+        """Devuelve el host_id de name, dándolo de alta si es nuevo (group solo se usa al crearlo)."""
+        host_id = self._host_ids.get(name)
+        if host_id is not None:
+            return host_id
+        now = int(time.time())
+        with self._write_lock, self.conn:
+            self.conn.execute('''
+                INSERT OR IGNORE INTO hosts(name, host_group, first_seen, last_seen) VALUES (?, ?, ?, ?)
+            ''', (name, group, now, now))
+            host_id = self.conn.execute("SELECT host_id FROM hosts WHERE name = ?", (name,)).fetchone()[0]
+        self._host_ids[name] = host_id
+        return host_id
+
+    def set_host_group(self, name: str, group: Optional[str]) -> None:
+        """Asigna un host a un grupo (None lo deja con modelo propio)."""
+        host_id = self.register_host(name)
+        with self._write_lock, self.conn:
+            self.conn.execute("UPDATE hosts SET host_group = ? WHERE host_id = ?", (group, host_id))
+
+    def get_hosts(self) -> List[Tuple[int, str, Optional[str]]]:
+        """(host_id, nombre, grupo) de todos los hosts conocidos."""
+        return self._read("SELECT host_id, name, host_group FROM hosts ORDER BY host_id")
+
+    def write_host_batch(self, stats: Dict[int, List[Tuple]], alerts: List[Tuple] = ()) -> int:
+        """
+        Escribe en una sola transacción muestras {host_id: [(cpu, ram, disk, error_count, ts)]}
+        y alertas (host_id, ts, mensaje, severidad) de varios hosts. Devuelve las filas escritas.
+        Una muestra idéntica a otra ya guardada en el mismo segundo (reintento del agente) no se repite.
+        """
+        now = int(time.time())
+        with self._write_lock, self.conn:
+            for host_id, rows in stats.items():
+                self._write_stats(self.conn, rows, host_id, skip_resent=True)
+            self.conn.executemany('''
+                INSERT INTO alerts(host_id, timestamp, message, severity) VALUES (?, ?, ?, ?)
+            ''', [(host_id, _utc_text(ts), message, severity) for host_id, ts, message, severity in alerts])
+            seen = set(stats) | {alert[0] for alert in alerts}
+            self.conn.executemany("UPDATE hosts SET last_seen = ? WHERE host_id = ?",
+                                  [(now, host_id) for host_id in seen])
+        self._maybe_apply_retention()
+        return sum(len(rows) for rows in stats.values()) + len(alerts)
+
+    # ========== MÉTRICAS DEL MODELO ==========
+    def add_prediction_bins(self, model: str, rows: List[Tuple[int, int, int, int, int]]) -> None:
+        """Suma (hour, bin, pred, truth, samples) a los agregados de un modelo."""
+        with self._write_lock, self.conn:
+            self.conn.executemany('''
+                INSERT INTO prediction_bins(model, hour, bin, pred, truth, samples)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(model, hour, bin, pred, truth) DO UPDATE SET samples = samples + excluded.samples
+            ''', [(model, *row) for row in rows])
+
+    def get_prediction_bins(self, model: str) -> List[Tuple]:
+        """Agregados (hour, bin, pred, truth, samples) guardados para un modelo."""
+        return self._read('''
+            SELECT hour, bin, pred, truth, samples FROM prediction_bins WHERE model = ?
+        ''', (model,))
+
+    def delete_prediction_bins(self, keep_model: str, keep_recent: int = 0) -> int:
+        """
+        Borra los agregados de los modelos distintos de keep_model, salvo los keep_recent
+        con puntuaciones más recientes (p. ej. las versiones recalibradas de los mismos árboles).
+        """
+        with self._write_lock, self.conn:
+            return self.conn.execute('''
+                DELETE FROM prediction_bins WHERE model != ? AND model NOT IN (
+                    SELECT model FROM prediction_bins GROUP BY model ORDER BY MAX(hour) DESC LIMIT ?
+                )
+            ''', (keep_model, keep_recent)).rowcount
+
+    def apply_retention(self) -> Dict[str, int]:
+        """
+        Elimina filas crudas y agregados más antiguos que la política de retención.
+        Si hay un archivo frío configurado, las filas crudas se exportan antes de borrarse
+        (el archivo solo guarda el host local; las de otros hosts se descartan).
+        """
+        conn = self.conn
+        deleted = {}
+        now = int(time.time())
+        keep = self.retention.get("raw")
+        if keep is not None:
+            cutoff = now - keep * 86400
+            if self.archive is not None:
+                self.archive.export_from(self, cutoff)
+            deleted["raw"] = self.delete_stats_before(cutoff)
+        with self._write_lock, conn:
+            for name in ROLLUP_RESOLUTIONS:
+                keep = self.retention.get(name)
+                if keep is not None:
+                    deleted[name] = conn.execute(
+                        f"DELETE FROM system_stats_{name} WHERE bucket < ?",
+                        (now - keep * 86400,)
+                    ).rowcount
+            # Los agregados de predicciones son horarios: siguen la retención de "1h"
+            keep = self.retention.get("1h")
+            if keep is not None:
+                deleted["prediction_bins"] = conn.execute(
+                    "DELETE FROM prediction_bins WHERE hour < ?", (now - keep * 86400,)
+                ).rowcount
+        self._last_retention = time.monotonic()
+        return deleted
+
+    def _maybe_apply_retention(self) -> None:
+        """
+        Aplica la retención si ha pasado retention_interval desde la última vez.
+        Un fallo (de SQLite o del archivo frío) se informa y se reintenta en el siguiente intervalo.
+        """
+        last = self._last_retention
+        if last is None or time.monotonic() - last >= self.retention_interval:
+            try:
+                self.apply_retention()
+            except Exception as e:
+                self._last_retention = time.monotonic()
+                print(f"❌ Error aplicando la retención: {str(e)}")
+
+    def _write_stats(self, conn: sqlite3.Connection, rows: List[Tuple], host_id: int = LOCAL_HOST,
+                     skip_resent: bool = False) -> None:
+        """
+        Inserta muestras crudas de un host (dentro de la transacción abierta).
+        Los agregados de los gráficos solo se mantienen para el host local.
+        """
+        if self.layout == "compact":
+            self._write_compact(conn, rows, host_id, skip_resent)
+        else:
+            conn.executemany('''
+                INSERT INTO system_stats(cpu, ram, disk, error_count, timestamp, host_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(cpu, ram, disk, errors, _utc_text(ts), host_id) for cpu, ram, disk, errors, ts in rows])
+        if host_id != LOCAL_HOST:
+            return
+
+        for name, seconds in ROLLUP_RESOLUTIONS.items():
+            # Pre-agrega el lote en memoria: una fila por intervalo
+            buckets = {}
+            for cpu, ram, disk, _, ts in rows:
+                key = int(ts) // seconds * seconds
+                values = (cpu, ram, disk)
+                agg = buckets.get(key)
+                if agg is None:
+                    buckets[key] = [1] + [v for value in values for v in (value, value, value)]
+                    continue
+                agg[0] += 1
+                for i, value in enumerate(values):
+                    base = 1 + i * 3
+                    agg[base] = min(agg[base], value)
+                    agg[base + 1] = max(agg[base + 1], value)
+                    agg[base + 2] += value
+
+            updates = ", ".join(
+                f"{m}_min = min({m}_min, excluded.{m}_min), "
+                f"{m}_max = max({m}_max, excluded.{m}_max), "
+                f"{m}_sum = {m}_sum + excluded.{m}_sum"
+                for m in _METRICS
+            )
+            conn.executemany(f'''
+                INSERT INTO system_stats_{name} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(bucket) DO UPDATE SET samples = samples + excluded.samples, {updates}
+            ''', [(key, *agg) for key, agg in buckets.items()])
+
+    @staticmethod
+    def _write_compact(conn: sqlite3.Connection, rows: List[Tuple], host_id: int = LOCAL_HOST,
+                       skip_resent: bool = False) -> int:
+        """
+        Inserta (cpu, ram, disk, error_count, ts) de un host en el formato compacto y
+        devuelve cuántas filas se escribieron. Varias muestras del mismo host en el mismo
+        segundo se guardan todas, con seq consecutivos (nunca se sobrescriben). Con
+        skip_resent se omite la que repite exactamente otra de ese segundo (reenvío).
+        """
+        resent = '''
+            WHERE NOT EXISTS (SELECT 1 FROM system_stats_compact WHERE host_id = ?1 AND ts = ?2
+                              AND cpu = ?3 AND ram = ?4 AND disk = ?5 AND error_count = ?6)
+        ''' if skip_resent else ""
+        return conn.executemany(f'''
+            INSERT INTO system_stats_compact(host_id, ts, seq, cpu, ram, disk, error_count)
+            SELECT ?1, ?2, (SELECT COALESCE(MAX(seq) + 1, 0) FROM system_stats_compact
+                            WHERE host_id = ?1 AND ts = ?2), ?3, ?4, ?5, ?6
+            {resent}
+        ''', [(host_id, int(ts), round(cpu * METRIC_SCALE), round(ram * METRIC_SCALE),
+               round(disk * METRIC_SCALE), int(errors))
+              for cpu, ram, disk, errors, ts in rows]).rowcount
+
+    # ========== ESCRITURA DIFERIDA ==========
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Fuerza el volcado de la cola y espera a que se confirme (False si vence timeout).
+        Si algún lote encolado antes no se pudo escribir, lanza el error de ese lote.
+        """
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        done.error = None
+        self._queue.put(done)
+        if not done.wait(timeout):
+            return False
+        if done.error is not None:
+            raise done.error
+        return True
+
+    def get_writer_stats(self) -> Dict[str, float]:
+        """Profundidad de la cola y latencias de volcado del hilo escritor."""
+        stats = dict(self._writer_stats)
+        total_ms = stats.pop("total_flush_ms")
+        stats["avg_flush_ms"] = total_ms / stats["flushes"] if stats["flushes"] else 0.0
+        stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        return stats
+
+    def _writer_loop(self) -> None:
+        """Agrupa las inserciones encoladas y las confirma por tamaño o por tiempo."""
+        pending = []
+        waiters = []
+        deadline = None
+        stop = False
+        error = None  # Último lote fallido aún no comunicado a ningún flush()
+        while not stop:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending and (stop or waiters or due or len(pending) >= self.batch_size):
+                error = self._flush_batch(pending) or error
+                pending = []
+                deadline = None
+            for event in waiters:
+                event.error = error
+                event.set()
+            if waiters:
+                error = None
+            waiters = []
+            if not pending and not stop:
+                # Fuera del camino de cada lote: solo con la cola al día (y protegida aparte)
+                self._maybe_apply_retention()
+
+    def _flush_batch(self, batch: List[Tuple]) -> Optional[Exception]:
+        """
+        Escribe un lote con executemany dentro de una única transacción.
+        Si falla, el lote se descarta y se devuelve el error (el hilo escritor sigue vivo).
+        """
+        conn = self.conn
+        stats = [row for kind, row in batch if kind == "stats"]
+        alerts = [row for kind, row in batch if kind == "alert"]
+        start = time.perf_counter()
+        try:
+            with self._write_lock, conn:
+                if stats:
+                    self._write_stats(conn, stats)
+                if alerts:
+                    conn.executemany('''
+                        INSERT INTO alerts(message, severity, timestamp) VALUES (?, ?, ?)
+                    ''', alerts)
+        except Exception as e:
+            print(f"❌ Error volcando lote de {len(batch)} filas: {str(e)}")
+            self._writer_stats["failed_batches"] += 1
+            self._writer_stats["failed_rows"] += len(batch)
+            return e
+        elapsed = (time.perf_counter() - start) * 1000
+        self._writer_stats["flushes"] += 1
+        self._writer_stats["rows"] += len(batch)
+        self._writer_stats["last_flush_ms"] = elapsed
+        self._writer_stats["total_flush_ms"] += elapsed
+        self._writer_stats["max_flush_ms"] = max(self._writer_stats["max_flush_ms"], elapsed)
+        return None
@@ -0,0 +1,206 @@
+"""
+Buscador de archivos duplicados por etapas: agrupa por tamaño, descarta por el hash
+de los primeros y últimos 64 KB y solo entonces calcula el hash completo (con mmap)
+de los grupos que siguen coincidiendo. Los hashes se reparten en un pool de procesos.
+
+Uso (desde src/):
+    python -m core.duplicates RUTA [RUTA ...] [--workers N] [--min-size 1] [--delete]
+"""
+import argparse
+import hashlib
+import mmap
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from core.clean_engine import iter_candidates
+from core.path_matcher import PathMatcher
+
+EDGE = 64 * 1024  # Bytes de cabeza y de cola del hash parcial
+BATCH = 256  # Archivos por tarea del pool
+
+
+class DuplicateGroup(NamedTuple):
+    """Archivos con el mismo contenido; keep es el que se conserva (el de mtime más antiguo)."""
+    size: int
+    digest: str
+    keep: str
+    copies: List[str]
+
+    @property
+    def reclaimable(self) -> int:
+        return self.size * len(self.copies)
+
+
+class DuplicateReport(NamedTuple):
+    groups: List[DuplicateGroup]
+    scanned: int
+    partial_hashed: int
+    full_hashed: int
+    hashed_bytes: int
+    seconds: float
+
+    @property
+    def reclaimable(self) -> int:
+        return sum(group.reclaimable for group in self.groups)
+
+    def manifest(self) -> List[Tuple[str, int, str]]:
+        """(copia, bytes, original que se conserva) de todo lo que se puede borrar."""
+        return [(copy, group.size, group.keep) for group in self.groups for copy in group.copies]
+
+
+# ========== HASHES (se ejecutan en los procesos del pool) ==========
+def _partial_digest(path: str, size: int) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(EDGE))
+        if size > EDGE:
+            f.seek(max(EDGE, size - EDGE))
+            h.update(f.read(EDGE))
+    return h.digest()
+
+
+def _full_digest(path: str, size: int) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        h.update(view)
+    return h.digest()
+
+
+def _hash_batch(items: List[Tuple[str, int]], full: bool) -> List[Tuple[str, Optional[bytes]]]:
+    """Hash parcial o completo de un lote; None si el archivo ya no se puede leer."""
+    digest = _full_digest if full else _partial_digest
+    results = []
+    for path, size in items:
+        try:
+            results.append((path, digest(path, size)))
+        except (OSError, ValueError):
+            results.append((path, None))
+    return results
+
+
+# ========== PIPELINE ==========
+def _collisions(groups: Iterable[List[Tuple[str, int]]]) -> List[List[Tuple[str, int]]]:
+    return [group for group in groups if len(group) > 1]
+
+
+def _hash_groups(groups: List[List[Tuple[str, int]]], full: bool,
+                 pool: Optional[ProcessPoolExecutor]) -> List[Tuple[bytes, List[Tuple[str, int]]]]:
+    """Parte cada grupo por hash y devuelve (hash, subgrupo) de los que aún tienen más de un archivo."""
+    items = [item for group in groups for item in group]
+    sizes = dict(items)
+    batches = [items[i:i + BATCH] for i in range(0, len(items), BATCH)]
+    if pool is None:
+        results = (_hash_batch(batch, full) for batch in batches)
+    else:
+        results = pool.map(_hash_batch, batches, [full] * len(batches))
+    buckets: Dict[Tuple[int, bytes], List[Tuple[str, int]]] = {}
+    for batch in results:
+        for path, digest in batch:
+            if digest is not None:
+                buckets.setdefault((sizes[path], digest), []).append((path, sizes[path]))
+    return [(digest, group) for (_, digest), group in buckets.items() if len(group) > 1]
+
+
+def find_duplicates(roots: Iterable[str], matcher: PathMatcher, min_size: int = 1,
+                    max_workers: Optional[int] = None,
+                    is_locked: Optional[Callable[[str], bool]] = None) -> DuplicateReport:
+    """
+    Busca duplicados bajo roots respetando las exclusiones de matcher. Los enlaces duros
+    a un mismo archivo cuentan una sola vez (borrarlos no libera nada).
+    """
+    start = time.perf_counter()
+    by_size: Dict[int, List[Tuple[str, int]]] = {}
+    mtimes: Dict[str, float] = {}
+    inodes = set()
+    scanned = 0
+    for root in roots:
+        for path, st in iter_candidates(matcher, root, is_locked):
+            scanned += 1
+            if st.st_size < min_size:
+                continue
+            inode = (st.st_dev, st.st_ino)
+            if st.st_ino and inode in inodes:
+                continue
+            inodes.add(inode)
+            by_size.setdefault(st.st_size, []).append((path, st.st_size))
+            mtimes[path] = st.st_mtime
+    groups = _collisions(by_size.values())
+    del by_size, inodes
+
+    max_workers = max_workers or os.cpu_count() or 1
+    pool = None
+    if max_workers > 1 and groups:
+        pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        partial_hashed = sum(len(group) for group in groups)
+        hashed_bytes = sum(min(size, 2 * EDGE) for group in groups for _, size in group)
+        partial = _hash_groups(groups, False, pool)
+        # Hasta 2 * EDGE bytes el hash parcial ya cubre el archivo entero
+        confirmed = [item for item in partial if item[1][0][1] <= 2 * EDGE]
+        pending = [group for _, group in partial if group[0][1] > 2 * EDGE]
+        full_hashed = sum(len(group) for group in pending)
+        hashed_bytes += sum(size for group in pending for _, size in group)
+        confirmed += _hash_groups(pending, True, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    duplicates = []
+    for digest, group in confirmed:
+        paths = sorted((path for path, _ in group), key=lambda path: (mtimes[path], path))
+        duplicates.append(DuplicateGroup(group[0][1], digest.hex(), paths[0], paths[1:]))
+    duplicates.sort(key=lambda group: group.reclaimable, reverse=True)
+    return DuplicateReport(duplicates, scanned, partial_hashed, full_hashed, hashed_bytes,
+                           time.perf_counter() - start)
+
+
+def delete_duplicates(report: DuplicateReport) -> Tuple[int, int, List[str]]:
+    """
+    Borra las copias del manifiesto (nunca el original que se conserva) si siguen
+    teniendo el tamaño con el que se detectaron. Devuelve (archivos, bytes, errores).
+    """
+    files = freed = 0
+    errors = []
+    for copy, size, _ in report.manifest():
+        try:
+            if os.stat(copy).st_size != size:
+                errors.append(f"{copy}: cambió desde la búsqueda")
+                continue
+            os.unlink(copy)
+        except OSError as e:
+            errors.append(f"{copy}: {e.strerror or e}")
+            continue
+        files += 1
+        freed += size
+    return files, freed, errors
+
+
+def main() -> None:
+    from core.cleaner import Cleaner
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-size", type=int, default=1, help="Ignorar archivos más pequeños (bytes)")
+    parser.add_argument("--delete", action="store_true", help="Borrar las copias (por defecto solo se listan)")
+    args = parser.parse_args()
+
+    cleaner = Cleaner()
+    report = cleaner.find_duplicates(args.paths, min_size=args.min_size, max_workers=args.workers)
+    for group in report.groups:
+        print(f"{group.size / 2 ** 20:9.2f} MB x{len(group.copies) + 1}  {group.keep}")
+        for copy in group.copies:
+            print(f"{'':17}{copy}")
+    print(f"\n{len(report.groups)} grupos, {report.reclaimable / 2 ** 20:.1f} MB recuperables "
+          f"({report.scanned} archivos en {report.seconds:.2f} s)")
+    if args.delete:
+        files, freed, errors = cleaner.delete_duplicates(report)
+        for message in errors:
+            print(f"❌ No se pudo eliminar: {message}")
+        print(f"✅ {files} copias eliminadas, {freed / 2 ** 20:.1f} MB liberados")
+
+
+if __name__ == "__main__":
+    main()
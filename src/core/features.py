@@ -0,0 +1,157 @@
+from collections import deque
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+BASE_FEATURES = ("cpu", "ram", "disk", "error_count")
+WINDOW_STATS = ("mean", "max", "slope", "roc")
+
+
+def _slope(n, s, t):
+    """
+    Pendiente por mínimos cuadrados de y frente a k = 0..n-1 a partir de
+    n, S = Σy y T = Σk·y (sirve tanto para escalares como para arrays).
+    """
+    n = np.asarray(n, dtype=np.float64)
+    sum_k = n * (n - 1) / 2
+    denominator = n * (n - 1) * (2 * n - 1) / 6 * n - sum_k ** 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * t - sum_k * s) / denominator
+    return np.where(n > 1, slope, 0.0)
+
+
+class RollingWindow:
+    """
+    Ventana deslizante de una métrica con actualización O(1): búfer circular,
+    sumas S y T para media y pendiente, y una cola monótona para el máximo.
+    """
+
+    def __init__(self, size: int, resync_every: Optional[int] = None):
+        self.size = size
+        # El error de redondeo de S se integra en T; recalcular ambas sumas cada
+        # max(size, 64) muestras lo acota y mantiene el coste amortizado en O(1)
+        self.resync_every = resync_every or max(size, 64)
+        self._buffer = [0.0] * size
+        self._maxima = deque()  # (posición, valor) con valores decrecientes
+        self.reset()
+
+    def reset(self) -> None:
+        self._count = 0
+        self._seq = 0
+        self._sum = 0.0
+        self._weighted = 0.0
+        self._last: Optional[float] = None
+        self._maxima.clear()
+
+    def update(self, value: float) -> List[float]:
+        """Añade una muestra y devuelve [media, máximo, pendiente, variación]."""
+        n = self._count
+        slot = self._seq % self.size
+        if n < self.size:
+            self._weighted += n * value
+            self._sum += value
+            n += 1
+        else:
+            oldest = self._buffer[slot]
+            # Al desplazar la ventana cada índice k baja en uno
+            self._weighted += -(self._sum - oldest) + (n - 1) * value
+            self._sum += value - oldest
+        self._buffer[slot] = value
+        self._count = n
+        self._seq += 1
+        if self._seq % self.resync_every == 0:
+            self._resync()
+
+        while self._maxima and self._maxima[-1][1] <= value:
+            self._maxima.pop()
+        self._maxima.append((self._seq, value))
+        while self._maxima[0][0] <= self._seq - self.size:
+            self._maxima.popleft()
+
+        roc = 0.0 if self._last is None else value - self._last
+        self._last = value
+        # Misma fórmula que _slope, en aritmética escalar de Python (numpy es lento con escalares)
+        sum_k = n * (n - 1) / 2
+        denominator = n * (n - 1) * (2 * n - 1) / 6 * n - sum_k ** 2
+        slope = (n * self._weighted - sum_k * self._sum) / denominator if n > 1 else 0.0
+        return [self._sum / n, self._maxima[0][1], slope, roc]
+
+    def _resync(self) -> None:
+        ordered = [self._buffer[(self._seq - self._count + k) % self.size] for k in range(self._count)]
+        self._sum = sum(ordered)
+        self._weighted = sum(k * y for k, y in enumerate(ordered))
+
+
+class FeaturePipeline:
+    """
+    Variables de ventana (media, máximo, pendiente y variación respecto a la muestra
+    anterior) sobre las últimas window muestras de cada métrica, además de los
+    valores instantáneos. update() las calcula en línea al puntuar; transform()
+    calcula exactamente lo mismo vectorizado sobre el histórico para entrenar.
+    La ventana se mide en muestras, no en segundos.
+    """
+
+    def __init__(self, window: int = 10, metrics: Sequence[str] = ("cpu", "ram", "disk")):
+        self.window = window
+        self.metrics = tuple(metrics)
+        self.feature_names = list(BASE_FEATURES) + [f"{m}_{stat}" for m in self.metrics for stat in WINDOW_STATS]
+        self._positions = [BASE_FEATURES.index(m) for m in self.metrics]
+        self._windows = [RollingWindow(window) for _ in self.metrics]
+
+    def reset(self) -> None:
+        """Olvida el estado en línea (p. ej. tras un hueco largo sin muestras)."""
+        for rolling in self._windows:
+            rolling.reset()
+
+    def update(self, sample: Sequence[float]) -> np.ndarray:
+        """Incorpora una muestra (cpu, ram, disk, error_count) y devuelve su vector de variables."""
+        values = [float(x) for x in sample]
+        for position, rolling in zip(self._positions, self._windows):
+            values.extend(rolling.update(values[position]))
+        return np.array(values)
+
+    def transform(self, arrays: Dict[str, np.ndarray],
+                  context: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        Variables de un bloque {métrica: array}. context son las muestras anteriores
+        al bloque (al menos window - 1) para que sus primeras ventanas estén completas.
+        """
+        out = {name: np.asarray(arrays[name], dtype=np.float64) for name in BASE_FEATURES}
+        if "ts" in arrays:
+            out["ts"] = arrays["ts"]
+        pad = self.window - 1
+        for metric in self.metrics:
+            y = out[metric]
+            before = np.asarray(context[metric], dtype=np.float64) if context else np.empty(0)
+            prev = before[max(len(before) - pad, 0):] if pad else np.empty(0)
+            # Relleno con NaN: así las primeras ventanas del histórico son parciales, como en línea
+            full = np.concatenate([np.full(pad - len(prev), np.nan), prev, y])
+            windows = np.lib.stride_tricks.sliding_window_view(full, self.window)
+            valid = ~np.isnan(windows)
+            n = valid.sum(axis=1)
+            values = np.where(valid, windows, 0.0)
+            s = values.sum(axis=1)
+            # k = posición dentro de la parte válida (las válidas son siempre las últimas)
+            t = values @ np.arange(self.window, dtype=np.float64) - (self.window - n) * s
+            out[f"{metric}_mean"] = s / n
+            out[f"{metric}_max"] = np.where(valid, windows, -np.inf).max(axis=1)
+            out[f"{metric}_slope"] = _slope(n, s, t)
+            previous = np.concatenate([before[-1:] if len(before) else y[:1], y[:-1]])
+            out[f"{metric}_roc"] = y - previous
+        return out
+
+    def transform_chunks(self, chunks: Iterable[Dict[str, np.ndarray]]) -> Iterator[Dict[str, np.ndarray]]:
+        """transform() sobre bloques consecutivos, arrastrando la cola de cada uno como contexto."""
+        keep = max(self.window - 1, 1)  # Al menos una muestra para la variación
+        context = None
+        for chunk in chunks:
+            if not len(chunk[BASE_FEATURES[0]]):
+                continue
+            yield self.transform(chunk, context)
+            # Con bloques más cortos que la ventana el contexto se encadena con el anterior
+            context = {m: np.concatenate([context[m] if context else np.empty(0),
+                                          np.asarray(chunk[m], dtype=np.float64)])[-keep:]
+                       for m in self.metrics}
+
+    def matrix(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Matriz N×len(feature_names) de un resultado de transform()."""
+        return np.column_stack([arrays[name] for name in self.feature_names])
@@ -0,0 +1,332 @@
+"""
+Agregador de flota: recibe muestras y alertas de muchos equipos por TCP en JSON
+delimitado por saltos de línea y las guarda en una base SQLite con su host_id.
+
+Protocolo (una petición y una respuesta por línea):
+    -> {"host": "PC-042", "samples": [[ts, cpu, ram, disk, error_count], ...],
+        "alerts": [[ts, "mensaje", "HIGH"], ...]}
+    <- {"ok": true, "rows": 12}
+    <- {"ok": false, "error": "overloaded", "retry_after": 0.5}
+
+La respuesta llega cuando el lote ya está confirmado en disco. Si hay más de
+max_pending_rows filas sin confirmar, las subidas nuevas se rechazan con
+retry_after en vez de encolarse sin límite.
+
+Uso (desde src/):
+    python -m core.fleet_server [--db fleet.db] [--host 0.0.0.0] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import math
+import queue
+import signal
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from core.db_manager import LOCAL_HOST, METRIC_SCALE, DataBase
+
+DEFAULT_DB = "fleet.db"
+DEFAULT_PORT = 8765
+SEVERITIES = ("LOW", "MEDIUM", "HIGH")
+MAX_TS = 4102444800  # 2100-01-01 UTC: un epoch mayor es un reloj o un cliente roto
+MAX_ERRORS = 2 ** 63 - 1  # INTEGER de SQLite
+
+
+class Upload(NamedTuple):
+    """Subida ya validada de un host, pendiente de escribir."""
+    host: str
+    samples: List[Tuple]
+    alerts: List[Tuple]
+    done: "asyncio.Future"
+
+    @property
+    def rows(self) -> int:
+        return len(self.samples) + len(self.alerts)
+
+
+def _bounded_int(value, low: int, high: int, name: str) -> int:
+    """Entero finito entre low y high; lanza ValueError si no (también con 1e400 o 10**20)."""
+    try:
+        number = float(value)
+    except OverflowError:
+        raise ValueError(f"{name} fuera de rango")
+    if not math.isfinite(number) or not low <= number <= high:
+        raise ValueError(f"{name} fuera de rango")
+    return int(value) if isinstance(value, int) else int(number)
+
+
+def parse_upload(line: bytes) -> Tuple[str, List[Tuple], List[Tuple]]:
+    """Valida una línea del protocolo; lanza ValueError con el motivo si no es válida."""
+    try:
+        message = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON inválido: {e.msg}")
+    if not isinstance(message, dict) or not isinstance(message.get("host"), str) or not message["host"]:
+        raise ValueError("Falta el campo host")
+    samples = []
+    for row in message.get("samples", []):
+        if len(row) != 5:
+            raise ValueError("Cada muestra es [ts, cpu, ram, disk, error_count]")
+        ts, cpu, ram, disk, errors = row
+        if not all(0 <= float(x) <= 100 for x in (cpu, ram, disk)):
+            raise ValueError("Los valores de CPU, RAM y DISK deben estar entre 0 y 100")
+        samples.append((_bounded_int(ts, 0, MAX_TS, "ts"), float(cpu), float(ram), float(disk),
+                        _bounded_int(errors, 0, MAX_ERRORS, "error_count")))
+    alerts = []
+    for row in message.get("alerts", []):
+        if len(row) != 3 or row[2] not in SEVERITIES:
+            raise ValueError("Cada alerta es [ts, mensaje, LOW|MEDIUM|HIGH]")
+        alerts.append((_bounded_int(row[0], 0, MAX_TS, "ts"), str(row[1]), row[2]))
+    return message["host"], samples, alerts
+
+
+class FleetStore:
+    """
+    Almacén de la flota sobre DataBase en formato compacto: las muestras de cada
+    equipo van a system_stats_compact con su host_id, así que el entrenamiento por
+    host (core.host_training) lee la misma base que escribe el agregador.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        # Retención sin archivo frío: las filas de la flota se descartan al caducar
+        self.db = DataBase(db_path, layout="compact", pool_size=2)
+        self.db.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate_fleet_tables()
+
+    def _migrate_fleet_tables(self) -> None:
+        """Pasa a system_stats_compact y alerts las tablas fleet_* de versiones anteriores."""
+        conn = self.db.conn
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "fleet_stats" not in tables:
+            return
+        scaled = ", ".join(f"CAST(round(f.{m} * {METRIC_SCALE}) AS INTEGER)" for m in ("cpu", "ram", "disk"))
+        with self.db._write_lock, conn:
+            # Muestras repetidas en el mismo segundo: seq consecutivos tras los ya guardados
+            conn.execute(f'''
+                INSERT INTO system_stats_compact(host_id, ts, seq, cpu, ram, disk, error_count)
+                SELECT f.host_id, f.ts,
+                       (SELECT COALESCE(MAX(c.seq) + 1, 0) FROM system_stats_compact c
+                        WHERE c.host_id = f.host_id AND c.ts = f.ts)
+                       + ROW_NUMBER() OVER (PARTITION BY f.host_id, f.ts) - 1,
+                       {scaled}, f.error_count
+                FROM fleet_stats f
+            ''')
+            conn.execute('''
+                INSERT INTO alerts(host_id, timestamp, message, severity)
+                SELECT host_id, datetime(ts, 'unixepoch'), message, severity FROM fleet_alerts
+            ''')
+            conn.execute("DROP TABLE fleet_stats")
+            conn.execute("DROP TABLE fleet_alerts")
+
+    def write(self, uploads: Sequence[Upload]) -> int:
+        """Escribe varias subidas en una sola transacción y devuelve las filas escritas."""
+        stats: Dict[int, List[Tuple]] = {}
+        alerts = []
+        for upload in uploads:
+            host_id = self.db.register_host(upload.host)
+            # Reenvíos de la misma muestra (reintentos del agente) no se duplican
+            stats.setdefault(host_id, []).extend(
+                (cpu, ram, disk, errors, ts) for ts, cpu, ram, disk, errors in upload.samples)
+            alerts.extend((host_id, *row) for row in upload.alerts)
+        return self.db.write_host_batch(stats, alerts)
+
+    def host_summary(self) -> List[Tuple]:
+        """(host, muestras, última muestra, cpu media) por host."""
+        return self.db._read(f'''
+            SELECT h.name, COUNT(s.ts), MAX(s.ts), AVG(s.cpu) / {float(METRIC_SCALE)}
+            FROM hosts h LEFT JOIN system_stats_compact s ON s.host_id = h.host_id
+            WHERE h.host_id != {LOCAL_HOST}
+            GROUP BY h.host_id ORDER BY h.name
+        ''')
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class FleetServer:
+    """
+    Servidor asyncio de ingesta. Las subidas se agrupan en un hilo escritor que
+    confirma un lote cuando junta batch_rows filas o pasan flush_interval segundos,
+    y entonces responde a todas las subidas del lote.
+    """
+
+    def __init__(self, store: FleetStore, host: str = "0.0.0.0", port: int = DEFAULT_PORT,
+                 batch_rows: int = 5000, flush_interval: float = 0.05,
+                 max_pending_rows: int = 200000, max_line: int = 1 << 20):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.max_pending_rows = max_pending_rows
+        self.max_line = max_line
+        self.stats = {"connections": 0, "uploads": 0, "rows": 0, "rejected": 0, "invalid": 0,
+                      "commits": 0, "commit_ms": 0.0}
+        self._pending_rows = 0
+        self._queue: "queue.Queue[Optional[Upload]]" = queue.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writer: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        """Abre el socket y arranca el hilo escritor."""
+        self._loop = asyncio.get_running_loop()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=self.max_line)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Atiende conexiones hasta que se cancele la tarea; al salir vacía lo pendiente."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """Deja de aceptar conexiones y vacía lo pendiente."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._writer.join)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._reply(writer, {"ok": False, "error": "line too long"})
+                    break
+                if not line:
+                    break
+                # Una petición en vuelo por conexión: si el escritor va lento, se deja de
+                # leer el socket y la ventana TCP frena al agente
+                await self._reply(writer, await self._ingest(line))
+        except ConnectionError:
+            pass
+        finally:
+            self.stats["connections"] -= 1
+            writer.close()
+
+    async def _ingest(self, line: bytes) -> Dict:
+        try:
+            host, samples, alerts = parse_upload(line)
+        except (ValueError, TypeError, OverflowError) as e:
+            self.stats["invalid"] += 1
+            return {"ok": False, "error": str(e)}
+        rows = len(samples) + len(alerts)
+        if self._pending_rows + rows > self.max_pending_rows:
+            self.stats["rejected"] += 1
+            return {"ok": False, "error": "overloaded", "retry_after": self._retry_after()}
+        upload = Upload(host, samples, alerts, self._loop.create_future())
+        self._pending_rows += rows
+        self._queue.put(upload)
+        try:
+            return await upload.done
+        finally:
+            self._pending_rows -= rows
+
+    def _retry_after(self) -> float:
+        """Tiempo estimado para vaciar lo pendiente según el ritmo de confirmación."""
+        commits = self.stats["commits"]
+        per_row_ms = self.stats["commit_ms"] / max(self.stats["rows"], 1) if commits else 0.01
+        return round(min(5.0, max(0.1, self._pending_rows * per_row_ms / 1000)), 2)
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, response: Dict) -> None:
+        writer.write(json.dumps(response).encode() + b"\n")
+        await writer.drain()
+
+    def _writer_loop(self) -> None:
+        """Agrupa subidas y las confirma por tamaño o por tiempo (hilo escritor)."""
+        stop = False
+        while not stop:
+            batch = []
+            rows = 0
+            deadline = None
+            while rows < self.batch_rows:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    upload = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if upload is None:
+                    stop = True
+                    break
+                batch.append(upload)
+                rows += upload.rows
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: List[Upload]) -> None:
+        """Confirma un lote; si falla, sus subidas reciben el error y el hilo escritor sigue."""
+        start = time.perf_counter()
+        try:
+            written = self.store.write(batch)
+            error = None
+        except Exception as e:
+            print(f"❌ Error escribiendo lote de {len(batch)} subidas: {str(e)}")
+            written, error = 0, str(e)
+        self.stats["commits"] += 1
+        self.stats["commit_ms"] += (time.perf_counter() - start) * 1000
+        self.stats["uploads"] += len(batch)
+        self.stats["rows"] += written
+        for upload in batch:
+            response = {"ok": True, "rows": upload.rows} if error is None else {"ok": False, "error": error}
+            self._loop.call_soon_threadsafe(_resolve, upload.done, response)
+
+
+def _resolve(future: "asyncio.Future", response: Dict) -> None:
+    if not future.done():
+        future.set_result(response)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--batch-rows", type=int, default=5000, help="Filas por transacción")
+    parser.add_argument("--max-pending", type=int, default=200000,
+                        help="Filas sin confirmar a partir de las que se rechazan subidas")
+    args = parser.parse_args()
+
+    store = FleetStore(args.db)
+    server = FleetServer(store, args.host, args.port, batch_rows=args.batch_rows,
+                         max_pending_rows=args.max_pending)
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, task.cancel)  # Parada ordenada como servicio
+            except NotImplementedError:
+                pass  # Windows: queda Ctrl+C (KeyboardInterrupt)
+        await server.start()
+        print(f"🛰️ Agregador escuchando en {args.host}:{server.port} (base {args.db})", flush=True)
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+        print(f"Resumen: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
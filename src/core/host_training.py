@@ -0,0 +1,148 @@
+"""
+Reentrenamiento de los modelos de la flota: un IsolationForest por host o por grupo
+de hosts, repartidos entre procesos con ProcessPoolExecutor. Las matrices de
+entrenamiento viajan a los procesos en memoria compartida (multiprocessing.shared_memory)
+en vez de serializarse, y cada proceso deja el bosque compilado en el registro.
+
+Uso (desde src/):
+    python -m core.host_training [--db fleet.db] [--models models] [--workers N] [--sample-size 20000]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from core.compiled_forest import CompiledForest
+from core.db_manager import DataBase
+from core.features import BASE_FEATURES, FeaturePipeline
+from core.model_registry import HostModelRegistry, model_key
+from core.training_data import iter_training_chunks, sample_stream
+
+
+def group_hosts(hosts: Iterable[Tuple[int, str, Optional[str]]]) -> Dict[str, List[int]]:
+    """Agrupa (host_id, nombre, grupo) por clave de modelo."""
+    groups: Dict[str, List[int]] = {}
+    for host_id, name, group in hosts:
+        groups.setdefault(model_key(name, group), []).append(host_id)
+    return groups
+
+
+def build_matrix(db: DataBase, host_ids: Sequence[int], sample_size: int,
+                 features: Optional[FeaturePipeline] = None, since: Optional[int] = None,
+                 chunk_size: int = 50000, seed: int = 42) -> np.ndarray:
+    """Muestra de entrenamiento (a lo sumo sample_size filas) de uno o varios hosts."""
+    columns = features.feature_names if features is not None else list(BASE_FEATURES)
+
+    def chunks():
+        for host_id in host_ids:
+            host_chunks = iter_training_chunks(db, chunk_size, since, host_id)
+            # Las ventanas se calculan por host: no deben cruzar de un equipo a otro
+            yield from features.transform_chunks(host_chunks) if features is not None else host_chunks
+
+    return sample_stream(chunks(), columns, sample_size, seed=seed).sample()
+
+
+def _fit(X: np.ndarray, path: str, contamination: float, n_estimators: int, seed: int) -> Dict:
+    from sklearn.ensemble import IsolationForest
+
+    start = time.perf_counter()
+    model = IsolationForest(contamination=contamination, n_estimators=n_estimators, random_state=seed)
+    model.fit(X)
+    compiled = CompiledForest.from_sklearn(model)
+    compiled.calibrate(X)
+    compiled.save(path)
+    return {"samples": len(X), "fit_s": round(time.perf_counter() - start, 3),
+            "fingerprint": compiled.fingerprint(), "pid": os.getpid()}
+
+
+def _fit_shared(shm_name: str, shape: Tuple[int, int], dtype: str, path: str,
+                contamination: float, n_estimators: int, seed: int) -> Dict:
+    """Tarea del proceso hijo: entrena sobre la matriz en memoria compartida, sin copiarla."""
+    # Los hijos del pool comparten el resource_tracker del padre: abrir el bloque no
+    # lo duplica y el padre lo libera (unlink) cuando termina la tarea
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _fit(np.ndarray(shape, dtype=dtype, buffer=shm.buf), path, contamination, n_estimators, seed)
+    finally:
+        shm.close()
+
+
+def train_host_models(db: DataBase, registry: HostModelRegistry, contamination: float = 0.05,
+                      sample_size: int = 20000, max_workers: Optional[int] = None,
+                      features: Optional[FeaturePipeline] = None, since: Optional[int] = None,
+                      n_estimators: int = 100, min_samples: int = 256, seed: int = 42) -> Dict[str, Dict]:
+    """
+    Reentrena todos los modelos de la flota y devuelve un resumen por clave.
+    El proceso padre lee SQLite y prepara las matrices mientras los hijos entrenan;
+    como mucho hay max_workers + 1 matrices en memoria compartida a la vez.
+    Las claves con menos de min_samples filas se omiten.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    todo = iter(group_hosts(db.get_hosts()).items())
+    results: Dict[str, Dict] = {}
+    pending: Dict[Future, Tuple[str, shared_memory.SharedMemory]] = {}
+
+    def submit_next(pool: ProcessPoolExecutor) -> bool:
+        for key, host_ids in todo:
+            X = build_matrix(db, host_ids, sample_size, features, since, seed=seed)
+            if len(X) < min_samples:
+                results[key] = {"samples": len(X), "skipped": True}
+                continue
+            shm = shared_memory.SharedMemory(create=True, size=X.nbytes)
+            np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[:] = X
+            future = pool.submit(_fit_shared, shm.name, X.shape, X.dtype.str, registry.path_for(key),
+                                 contamination, n_estimators, seed)
+            pending[future] = (key, shm)
+            return True
+        return False
+
+    # spawn en todas las plataformas: el llamante puede tener hilos vivos (agregador,
+    # escritor diferido) y hacer fork con ellos es frágil
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while len(pending) <= max_workers and submit_next(pool):
+            pass
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, shm = pending.pop(future)
+                shm.close()
+                shm.unlink()
+                try:
+                    results[key] = future.result()
+                    registry.invalidate(key)
+                except Exception as e:
+                    print(f"❌ Error entrenando el modelo {key}: {str(e)}")
+                    results[key] = {"error": str(e)}
+                submit_next(pool)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="fleet.db")
+    parser.add_argument("--models", default="models", help="Carpeta del registro de modelos")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument("--sample-size", type=int, default=20000, help="Filas por modelo")
+    parser.add_argument("--contamination", type=float, default=0.05)
+    parser.add_argument("--window", type=int, default=0, help="Ventana de variables (0 = solo valores instantáneos)")
+    args = parser.parse_args()
+
+    db = DataBase(args.db)
+    registry = HostModelRegistry(args.models)
+    features = FeaturePipeline(args.window) if args.window else None
+    start = time.perf_counter()
+    try:
+        results = train_host_models(db, registry, args.contamination, args.sample_size, args.workers, features)
+    finally:
+        db.close()
+    for key, summary in sorted(results.items()):
+        print(f"{key}: {summary}")
+    trained = sum(1 for summary in results.values() if "fingerprint" in summary)
+    print(f"✅ {trained}/{len(results)} modelos entrenados en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
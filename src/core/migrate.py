@@ -0,0 +1,136 @@
+"""
+Herramienta de migración de la base de datos.
+Reemplaza a los scripts add_severity_column.py y recrear_db.py.
+
+Uso (desde src/):
+    python -m core.migrate status  [--db RUTA]
+    python -m core.migrate compact [--db RUTA] [--batch-size N] [--pause S] [--purge-legacy] [--vacuum]
+    python -m core.migrate reset   [--db RUTA] [--layout legacy|compact] --yes
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Optional
+from core.db_manager import DataBase
+
+DEFAULT_DB = "system_monitor.db"
+
+
+def database_status(db_path: str) -> Dict[str, Optional[str]]:
+    """Resume el formato, las filas por tabla y el avance de la migración."""
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def scalar(query: str) -> Optional[str]:
+        row = conn.execute(query).fetchone()
+        return row[0] if row else None
+
+    status = {
+        "layout": scalar("SELECT value FROM meta WHERE key = 'layout'") if "meta" in tables else None,
+        "migrated_id": scalar("SELECT value FROM meta WHERE key = 'compact_migrated_id'") if "meta" in tables else None,
+        "legacy_rows": scalar("SELECT COUNT(*) FROM system_stats") if "system_stats" in tables else 0,
+        "compact_rows": scalar("SELECT COUNT(*) FROM system_stats_compact") if "system_stats_compact" in tables else 0,
+        "migrated_rows": scalar("SELECT value FROM meta WHERE key = 'compact_migrated_rows'") if "meta" in tables else None,
+        "migration_lost": scalar("SELECT value FROM meta WHERE key = 'compact_migration_lost'") if "meta" in tables else None,
+        "size_bytes": os.path.getsize(db_path),
+    }
+    conn.close()
+    status["layout"] = status["layout"] or "legacy"
+    return status
+
+
+def migrate_to_compact(db_path: str, batch_size: int = 5000, pause: float = 0.05,
+                       purge_legacy: bool = False, vacuum: bool = False) -> int:
+    """
+    Migra en línea system_stats al formato compacto.
+    Copia por lotes en transacciones cortas con una pausa entre lotes para no
+    bloquear a la aplicación, que puede seguir escribiendo mientras tanto.
+    """
+    db = DataBase(db_path, layout="compact", migrate_on_open=False)
+    landed_before, lost_before = db.migration_counts()
+    read = 0
+    try:
+        while True:
+            count = db.migrate_legacy_rows(batch_size=batch_size, max_batches=1)
+            if not count:
+                break
+            read += count
+            print(f"🔄 Leídas {read} filas...", end="\r")
+            time.sleep(pause)
+        landed, lost = db.migration_counts()
+        copied = landed - landed_before
+        print(f"\n✅ Migración completada: {read} filas leídas, {copied} copiadas al formato compacto.")
+        if lost - lost_before:
+            print(f"⚠️ {lost - lost_before} filas incompletas no se pudieron copiar.")
+        if purge_legacy:
+            try:
+                deleted = db.purge_migrated_legacy_rows(batch_size=batch_size)
+                print(f"🗑️ Eliminadas {deleted} filas del formato antiguo.")
+            except ValueError as e:
+                print(f"❌ No se borra el formato antiguo: {str(e)}")
+    finally:
+        db.close()
+
+    if vacuum:
+        conn = sqlite3.connect(db_path)
+        conn.execute("VACUUM")
+        conn.close()
+        print("🧹 Base de datos compactada (VACUUM).")
+    return copied
+
+
+def reset_database(db_path: str, layout: str = "legacy") -> None:
+    """Elimina la base de datos y la recrea vacía con el esquema actual."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    folder = os.path.dirname(db_path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
+        print(f"📁 Carpeta '{folder}' creada.")
+    DataBase(db_path, layout=layout).close()
+    print(f"✅ Base de datos '{db_path}' creada correctamente (formato {layout}).")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Migraciones de la base de datos de Optimizer AI")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Ruta de la base de datos")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status", help="Muestra el formato y el avance de la migración")
+
+    compact = commands.add_parser("compact", help="Migra las muestras al formato compacto")
+    compact.add_argument("--batch-size", type=int, default=5000)
+    compact.add_argument("--pause", type=float, default=0.05, help="Segundos de pausa entre lotes")
+    compact.add_argument("--purge-legacy", action="store_true", help="Borra las filas antiguas ya copiadas")
+    compact.add_argument("--vacuum", action="store_true", help="Ejecuta VACUUM al terminar")
+
+    reset = commands.add_parser("reset", help="Elimina y recrea la base de datos")
+    reset.add_argument("--layout", choices=("legacy", "compact"), default="legacy")
+    reset.add_argument("--yes", action="store_true", help="Confirma la eliminación de los datos")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "reset":
+        if not args.yes:
+            print("⚠️ Esta operación borra todos los datos. Repite con --yes para confirmar.")
+            return 1
+        reset_database(args.db, args.layout)
+        return 0
+
+    if not os.path.exists(args.db):
+        print(f"⚠️ Base de datos no encontrada: {args.db}")
+        return 1
+
+    if args.command == "status":
+        for key, value in database_status(args.db).items():
+            print(f"{key}: {value}")
+    elif args.command == "compact":
+        migrate_to_compact(args.db, args.batch_size, args.pause, args.purge_legacy, args.vacuum)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Intervalos del score de anomalía (score_samples está en [-1, 0])
+SCORE_BINS = 100
+# Intervalo de las muestras que el prefiltro dio por normales sin puntuarlas
+PREFILTERED_BIN = -1
+
+
+def score_bins(scores: np.ndarray) -> np.ndarray:
+    """Intervalo (0..SCORE_BINS-1) de cada score."""
+    return np.clip(((np.asarray(scores) + 1.0) * SCORE_BINS).astype(np.int64), 0, SCORE_BINS - 1)
+
+
+class MetricsEngine:
+    """
+    Métricas de calidad del modelo mantenidas de forma incremental: cada lote puntuado
+    actualiza una matriz de confusión, un histograma de scores y la tasa de anomalías
+    por hora, y se acumula en prediction_bins. Las consultas cuestan O(intervalos + horas),
+    no O(histórico). Los agregados en memoria son de un único modelo: al cambiar de versión
+    se empieza de cero, o desde lo guardado si esa versión ya se vio. En la base se
+    conservan los de las keep_models versiones usadas más recientemente, así que mover la
+    contaminación y volver atrás no pierde lo acumulado.
+    """
+
+    def __init__(self, db=None, flush_rows: int = 500, flush_interval: float = 60.0, keep_models: int = 20):
+        self.db = db
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.keep_models = keep_models
+        self.model_key: Optional[str] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.confusion = np.zeros((2, 2), dtype=np.int64)  # [pred, truth]
+        self.histogram = np.zeros((2, SCORE_BINS), dtype=np.int64)  # [truth, bin]
+        self.hourly: Dict[int, List[int]] = {}  # hora -> [muestras, anomalías predichas]
+        self.prefiltered = np.zeros(2, dtype=np.int64)  # [truth]: normales sin pasar por el modelo
+        self._pending: Dict[Tuple[int, int, int, int], int] = {}
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+
+    def bind(self, model_key: str) -> None:
+        """Apunta los agregados a una versión del modelo (y poda las versiones antiguas de la base)."""
+        with self._lock:
+            if model_key == self.model_key:
+                return
+            # Lo pendiente de la versión anterior se guarda antes de empezar con la nueva
+            pending, previous = self._pending, self.model_key
+            self.model_key = model_key
+            self._reset()
+            if self.db is None:
+                return
+            self._save(previous, pending)
+            self.db.delete_prediction_bins(keep_model=model_key, keep_recent=self.keep_models)
+            rows = self.db.get_prediction_bins(model_key)
+            if rows:
+                self._accumulate(np.asarray(rows, dtype=np.int64))
+
+    def record(self, model_key: str, scores: np.ndarray, labels: np.ndarray, truth: np.ndarray,
+               timestamp: Optional[float] = None) -> None:
+        """Suma un lote puntuado: scores, labels (-1 anomalía) y truth (True si hubo errores)."""
+        self.bind(model_key)
+        hour = int(timestamp if timestamp is not None else time.time()) // 3600 * 3600
+        pred = (np.asarray(labels) == -1).astype(np.int64)
+        columns = np.column_stack([np.full(len(pred), hour), score_bins(scores), pred,
+                                   np.asarray(truth, dtype=np.int64)])
+        # Un lote se reduce a unas pocas combinaciones (hora, intervalo, pred, truth)
+        keys, counts = np.unique(columns, axis=0, return_counts=True)
+        grouped = np.column_stack([keys, counts])
+        with self._lock:
+            if model_key != self.model_key:
+                return  # Otra versión se enlazó mientras tanto: el lote ya no cuenta
+            self._accumulate(grouped)
+            for h, b, p, t, n in grouped.tolist():
+                self._pending[(h, b, p, t)] = self._pending.get((h, b, p, t), 0) + n
+            self._pending_rows += len(pred)
+            due = (self._pending_rows >= self.flush_rows or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def record_prefiltered(self, model_key: str, truth: bool, timestamp: Optional[float] = None) -> None:
+        """
+        Suma una muestra que el prefiltro dio por normal sin puntuarla: cuenta como
+        predicción normal (así el recall no ignora los fallos que el prefiltro deja pasar)
+        pero no entra en el histograma de scores.
+        """
+        self.bind(model_key)
+        hour = int(timestamp if timestamp is not None else time.time()) // 3600 * 3600
+        key = (hour, PREFILTERED_BIN, 0, int(bool(truth)))
+        with self._lock:
+            if model_key != self.model_key:
+                return
+            self._accumulate(np.array([[*key, 1]], dtype=np.int64))
+            self._pending[key] = self._pending.get(key, 0) + 1
+            self._pending_rows += 1
+            due = (self._pending_rows >= self.flush_rows or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def _accumulate(self, grouped: np.ndarray) -> None:
+        """Suma filas (hour, bin, pred, truth, samples) a los agregados en memoria."""
+        hours, bins, pred, truth, samples = grouped.T
+        np.add.at(self.confusion, (pred, truth), samples)
+        scored = bins != PREFILTERED_BIN
+        np.add.at(self.histogram, (truth[scored], bins[scored]), samples[scored])
+        np.add.at(self.prefiltered, truth[~scored], samples[~scored])
+        for h, p, n in zip(hours.tolist(), pred.tolist(), samples.tolist()):
+            entry = self.hourly.setdefault(h, [0, 0])
+            entry[0] += n
+            entry[1] += n * p
+
+    def flush(self) -> None:
+        """Guarda en la base los agregados pendientes."""
+        with self._lock:
+            pending, model_key = self._pending, self.model_key
+            self._pending, self._pending_rows = {}, 0
+            self._last_flush = time.monotonic()
+        self._save(model_key, pending)
+
+    def _save(self, model_key: Optional[str], pending: Dict[Tuple[int, int, int, int], int]) -> None:
+        """Suma en la base los agregados pendientes de una versión."""
+        if self.db is None or model_key is None or not pending:
+            return
+        try:
+            self.db.add_prediction_bins(model_key, [(*key, n) for key, n in pending.items()])
+        except Exception as e:
+            print(f"❌ Error guardando métricas del modelo: {str(e)}")
+
+    # ========== CONSULTAS ==========
+    def summary(self) -> Dict[str, float]:
+        """Precisión, recall y tasa de anomalías a partir de la matriz de confusión."""
+        (tn, fn), (fp, tp) = self.confusion.tolist()
+        total = tn + fn + fp + tp
+        return {
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+            "samples": total,
+            "anomaly_rate": (tp + fp) / total if total else 0.0,
+            "prefiltered": int(self.prefiltered.sum()),  # Incluidas en samples como normales
+            "prefiltered_faulty": int(self.prefiltered[1]),  # Fallos que el prefiltro no escaló
+        }
+
+    def score_histogram(self) -> Dict[str, np.ndarray]:
+        """Histograma de scores separado por muestras con y sin errores."""
+        return {"edges": np.linspace(-1.0, 0.0, SCORE_BINS + 1),
+                "normal": self.histogram[0].copy(), "faulty": self.histogram[1].copy()}
+
+    def anomaly_rate_over_time(self, hours: Optional[int] = None) -> List[Tuple[int, int, int, float]]:
+        """(hora, muestras, anomalías, tasa) por hora, en orden cronológico."""
+        with self._lock:
+            items = sorted(self.hourly.items())
+        if hours is not None:
+            items = items[-hours:]
+        return [(h, n, a, a / n) for h, (n, a) in items]
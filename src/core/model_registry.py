@@ -0,0 +1,202 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from core.compiled_forest import CompiledForest
+
+
+class ModelVersion(NamedTuple):
+    """Modelo publicado junto con sus metadatos (inmutable)."""
+    version: int
+    model: Any
+    published_at: float
+    params: Dict[str, Any]
+
+
+class ModelRegistry:
+    """
+    Registro versionado de modelos. Publicar sustituye la referencia al modelo vivo
+    en una sola asignación, de modo que quien puntúa ve siempre un modelo completo.
+    """
+
+    def __init__(self, history: int = 5):
+        self.history = history
+        self._current: Optional[ModelVersion] = None
+        self._versions: List[ModelVersion] = []
+        self._lock = threading.Lock()
+
+    def publish(self, model: Any, **params) -> ModelVersion:
+        """Registra un modelo ya entrenado y lo convierte en el modelo vivo."""
+        with self._lock:
+            return self._append(model, params)
+
+    def publish_if_current(self, expected: Optional[ModelVersion], model: Any, **params) -> Optional[ModelVersion]:
+        """
+        Publica solo si el modelo vivo sigue siendo expected (comparar e intercambiar);
+        devuelve None si otra publicación se adelantó.
+        """
+        with self._lock:
+            if self._current is not expected:
+                return None
+            return self._append(model, params)
+
+    def _append(self, model: Any, params: Dict[str, Any]) -> ModelVersion:
+        """Añade una versión y la hace viva (con el cerrojo tomado)."""
+        version = self._versions[-1].version + 1 if self._versions else 1
+        entry = ModelVersion(version, model, time.time(), params)
+        self._versions = (self._versions + [entry])[-self.history:]
+        self._current = entry  # Intercambio atómico de la referencia
+        return entry
+
+    def current(self) -> Optional[ModelVersion]:
+        """Modelo vivo (lectura sin bloqueo)."""
+        return self._current
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Metadatos de las últimas versiones publicadas."""
+        return [{"version": v.version, "published_at": v.published_at, **v.params}
+                for v in self._versions]
+
+
+def model_key(host: str, group: Optional[str] = None) -> str:
+    """Clave del modelo de un host: la de su grupo si tiene uno, si no la del propio host."""
+    return f"group-{group}" if group else f"host-{host}"
+
+
+class HostModelRegistry:
+    """
+    Modelos de la flota por host o grupo de hosts, guardados en model_dir como
+    <clave>.npz y cargados bajo demanda. En memoria solo quedan los capacity
+    modelos usados más recientemente (LRU), así que puntuar una flota grande no
+    mantiene todos los bosques cargados a la vez.
+    """
+
+    def __init__(self, model_dir: str, capacity: int = 32,
+                 loader: Callable[[str], Any] = CompiledForest.load):
+        self.model_dir = model_dir
+        self.capacity = capacity
+        self.loader = loader
+        self.stats = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0}
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(model_dir, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        """Archivo del modelo de una clave (los caracteres no válidos en rutas se sustituyen)."""
+        return os.path.join(self.model_dir, re.sub(r"[^\w.-]", "_", key) + ".npz")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Modelo de una clave (None si aún no se ha entrenado)."""
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.stats["hits"] += 1
+                return model
+            self.stats["misses"] += 1
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        model = self.loader(path)  # Fuera del cerrojo: cargar un host no frena a los demás
+        with self._lock:
+            self.stats["loads"] += 1
+            self._insert(key, model)
+        return model
+
+    def put(self, key: str, model: Any) -> None:
+        """Guarda un modelo nuevo y lo deja en memoria como el más reciente."""
+        model.save(self.path_for(key))
+        with self._lock:
+            self._insert(key, model)
+
+    def _insert(self, key: str, model: Any) -> None:
+        """Inserta como más reciente y expulsa los menos usados (con el cerrojo tomado)."""
+        self._models[key] = model
+        self._models.move_to_end(key)
+        while len(self._models) > self.capacity:
+            self._models.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key: str) -> None:
+        """Olvida la copia en memoria (p. ej. tras reescribir su archivo desde otro proceso)."""
+        with self._lock:
+            self._models.pop(key, None)
+
+    def keys(self) -> List[str]:
+        """Claves (nombres de archivo) con un modelo guardado en disco."""
+        return sorted(name[:-4] for name in os.listdir(self.model_dir) if name.endswith(".npz"))
+
+    def loaded(self) -> List[str]:
+        """Claves en memoria, de la menos a la más usada recientemente."""
+        with self._lock:
+            return list(self._models)
+
+
+class BackgroundTrainer:
+    """
+    Hilo de entrenamiento con peticiones agrupadas: las peticiones que llegan
+    mientras no pasen debounce segundos sin cambios se fusionan en una sola,
+    con los parámetros más recientes.
+    """
+
+    def __init__(self, train_fn: Callable[..., Any], debounce: float = 0.5):
+        self.train_fn = train_fn
+        self.debounce = debounce
+        self._params: Optional[Dict[str, Any]] = None
+        self._last_request = 0.0
+        self._busy = False
+        self._running = True
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def request(self, **params) -> None:
+        """Pide un reentrenamiento; no bloquea al llamante."""
+        with self._cond:
+            self._params = {**(self._params or {}), **params}
+            self._last_request = time.monotonic()
+            self._cond.notify_all()
+
+    def idle(self) -> bool:
+        """True si no hay peticiones pendientes ni un entrenamiento en curso."""
+        with self._cond:
+            return self._params is None and not self._busy
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que no queden peticiones pendientes ni entrenamientos en curso."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._params is None and not self._busy, timeout)
+
+    def stop(self) -> None:
+        """Detiene el hilo (descarta peticiones pendientes)."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._params is not None or not self._running)
+                if not self._running:
+                    return
+                # Espera a que el usuario deje de mover el control
+                while self._running:
+                    remaining = self._last_request + self.debounce - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._running:
+                    return
+                params, self._params = self._params, None
+                self._busy = True
+            try:
+                self.train_fn(**params)
+            except Exception as e:
+                print(f"❌ Error en el entrenamiento en segundo plano: {str(e)}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,89 @@
+import os
+import sys
+import threading
+import time
+from typing import FrozenSet, Optional
+
+_PROC = "/proc"
+
+
+def _normalize(path: str) -> str:
+    """Forma de comparación de una ruta (en Windows, sin distinguir mayúsculas)."""
+    return os.path.normcase(path)
+
+
+def _scan_proc() -> set:
+    """Rutas abiertas según /proc/<pid>/fd (solo de los procesos que se pueden inspeccionar)."""
+    paths = set()
+    with os.scandir(_PROC) as processes:
+        for process in processes:
+            if not process.name.isdigit():
+                continue
+            fd_dir = f"{_PROC}/{process.name}/fd"
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:  # Proceso terminado o de otro usuario
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(f"{fd_dir}/{fd}")
+                except OSError:
+                    continue
+                # Descarta sockets, tuberías y anon_inode; los borrados ya no importan
+                if target.startswith("/") and not target.endswith(" (deleted)"):
+                    paths.add(target)
+    return paths
+
+
+def _scan_psutil() -> set:
+    """Rutas abiertas según psutil (Windows, macOS...)."""
+    import psutil
+
+    paths = set()
+    for process in psutil.process_iter():
+        try:
+            paths.update(_normalize(f.path) for f in process.open_files())
+        except (psutil.Error, OSError):
+            continue
+    return paths
+
+
+class OpenFileIndex:
+    """
+    Oráculo de archivos en uso: un conjunto con las rutas que algún proceso tiene
+    abiertas, construido de una vez (en Linux desde /proc/*/fd, en el resto con psutil)
+    y reutilizado durante ttl segundos. Consultarlo es O(1) por archivo en lugar de
+    abrir un handle por candidato. Solo ve los procesos que el usuario puede inspeccionar.
+    """
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self._paths: FrozenSet[str] = frozenset()
+        self._built_at: Optional[float] = None
+        self.build_ms = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> FrozenSet[str]:
+        """Reconstruye el conjunto si ha caducado (o si force) y lo devuelve."""
+        with self._lock:
+            now = time.monotonic()
+            if force or self._built_at is None or now - self._built_at >= self.ttl:
+                start = time.perf_counter()
+                try:
+                    paths = _scan_proc() if sys.platform.startswith("linux") else _scan_psutil()
+                except (ImportError, OSError) as e:
+                    print(f"❌ Error listando archivos abiertos: {str(e)}")
+                    paths = set()
+                self._paths = frozenset(paths)
+                self._built_at = now
+                self.build_ms = (time.perf_counter() - start) * 1000
+            return self._paths
+
+    def is_open(self, path: str) -> bool:
+        """True si algún proceso tiene path abierto."""
+        if self._built_at is None or time.monotonic() - self._built_at >= self.ttl:
+            self.refresh()
+        return _normalize(path) in self._paths
+
+    def __len__(self) -> int:
+        return len(self._paths)
@@ -0,0 +1,74 @@
+import fnmatch
+import hashlib
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Marca de fin de ruta excluida dentro del trie
+_END = object()
+
+# Separadores que se aceptan en las rutas (en Windows, también "/")
+_ALT_SEP = os.altsep
+
+
+def split_path(path: str) -> List[str]:
+    """Componentes de una ruta en minúsculas y con separadores unificados."""
+    path = path.lower()
+    if _ALT_SEP:
+        path = path.replace(_ALT_SEP, os.sep)
+    return path.split(os.sep)
+
+
+def _normalize_dir(path: str) -> List[str]:
+    """Componentes de un directorio excluido: sin separadores repetidos ni finales."""
+    parts = split_path(os.path.normpath(path))
+    while len(parts) > 1 and not parts[-1]:
+        parts.pop()
+    return parts
+
+
+class PathMatcher:
+    """
+    Reglas de exclusión de la limpieza compiladas una sola vez: los patrones de
+    nombre en una única expresión regular y los directorios excluidos en un trie
+    de componentes normalizados. Un directorio excluye todo lo que cuelga de él;
+    la comparación no distingue mayúsculas, como las rutas de Windows.
+    """
+
+    def __init__(self, excluded_dirs: Iterable[str], patterns: Iterable[str]):
+        self.excluded_dirs = list(excluded_dirs)
+        self.patterns = list(patterns)
+        self._trie: Dict = {}
+        for path in self.excluded_dirs:
+            node = self._trie
+            for part in _normalize_dir(path):
+                node = node.setdefault(part, {})
+            node[_END] = True
+        # fnmatch.translate ya ancla cada patrón al final; la alternancia los prueba todos de una vez
+        regex = "|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in self.patterns)
+        self._name_re = re.compile(regex, re.IGNORECASE) if self.patterns else None
+
+    def fingerprint(self) -> str:
+        """Huella de las reglas (cambia si cambia cualquier directorio o patrón)."""
+        rules = repr((sorted(os.sep.join(_normalize_dir(path)) for path in self.excluded_dirs),
+                      sorted(pattern.lower() for pattern in self.patterns)))
+        return hashlib.sha1(rules.encode()).hexdigest()[:16]
+
+    def dir_excluded(self, path: str) -> bool:
+        """True si path es un directorio excluido o está dentro de uno."""
+        node = self._trie
+        for part in split_path(path):
+            node = node.get(part)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+    def name_excluded(self, name: str) -> bool:
+        """True si el nombre (sin directorio) coincide con algún patrón excluido."""
+        return self._name_re is not None and self._name_re.match(name) is not None
+
+    def excluded(self, path: str, name: Optional[str] = None) -> bool:
+        """Aplica ambas reglas; name evita volver a separar el nombre si ya se conoce."""
+        return self.name_excluded(os.path.basename(path) if name is None else name) or self.dir_excluded(path)
@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple, Optional, Set
+
+
+class DirRecord(NamedTuple):
+    """Estado de un directorio tras la última limpieza."""
+    parent: Optional[str]
+    mtime_ns: int
+    kept: int  # Entradas que se conservaron (excluidas, en uso o con error)
+    dirty: bool  # Hay que volver a listarlo aunque su mtime no cambie
+
+
+class ScanIndex:
+    """
+    Índice persistente (tabla SQLite) de los directorios ya limpiados: su mtime y
+    cuántas entradas conservan. Crear, borrar o renombrar una entrada cambia el mtime
+    del directorio que la contiene, así que un directorio con el mismo mtime no se
+    vuelve a listar y solo se baja a sus subdirectorios conocidos. Se carga entero en
+    memoria al abrirlo y los cambios se guardan en una transacción con save().
+    """
+
+    def __init__(self, path: str, rules_key: str = ""):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS scan_index (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT,
+                    mtime_ns INTEGER NOT NULL,
+                    kept INTEGER NOT NULL,
+                    dirty INTEGER NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self.conn.execute("CREATE TABLE IF NOT EXISTS scan_meta (key TEXT PRIMARY KEY, value TEXT)")
+            stored = self.conn.execute("SELECT value FROM scan_meta WHERE key = 'rules'").fetchone()
+            if stored is None or stored[0] != rules_key:
+                # Con otras reglas de exclusión lo conservado ya no significa lo mismo
+                self.conn.execute("DELETE FROM scan_index")
+                self.conn.execute("INSERT OR REPLACE INTO scan_meta VALUES ('rules', ?)", (rules_key,))
+        self._records: Dict[str, DirRecord] = {}
+        self._children: Dict[str, Set[str]] = {}
+        for path, parent, mtime_ns, kept, dirty in self.conn.execute("SELECT * FROM scan_index"):
+            self._records[path] = DirRecord(parent, mtime_ns, kept, bool(dirty))
+            self._children.setdefault(parent, set()).add(path)
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def lookup(self, path: str) -> Optional[DirRecord]:
+        return self._records.get(path)
+
+    def children(self, path: str) -> List[str]:
+        """Subdirectorios conservados en la última limpieza de path."""
+        with self._lock:
+            return list(self._children.get(path, ()))
+
+    def update(self, path: str, parent: Optional[str], mtime_ns: int, kept: int, dirty: bool) -> None:
+        with self._lock:
+            old = self._records.get(path)
+            if old is not None and old.parent != parent:
+                self._children.get(old.parent, set()).discard(path)
+            self._records[path] = DirRecord(parent, mtime_ns, kept, dirty)
+            self._children.setdefault(parent, set()).add(path)
+            self._changed.add(path)
+
+    def forget(self, path: str) -> None:
+        """Olvida path y todo lo que colgaba de él (borrado o desaparecido)."""
+        with self._lock:
+            stack = [path]
+            while stack:
+                current = stack.pop()
+                record = self._records.pop(current, None)
+                if record is not None:
+                    self._children.get(record.parent, set()).discard(current)
+                    self._changed.add(current)
+                stack.extend(self._children.pop(current, ()))
+
+    def save(self) -> int:
+        """Escribe los cambios pendientes y devuelve cuántas filas se tocaron."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            upserts = [(path, *self._records[path]) for path in changed if path in self._records]
+            deletes = [(path,) for path in changed if path not in self._records]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO scan_index VALUES (?, ?, ?, ?, ?)", upserts)
+            self.conn.executemany("DELETE FROM scan_index WHERE path = ?", deletes)
+        return len(changed)
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import math
+import os
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Puntuación de un candidato (más alta = se borra antes) a partir de su stat y el instante actual
+Policy = Callable[[os.stat_result, float], float]
+
+_DAY = 86400.0
+
+
+def _largest(st: os.stat_result, now: float) -> float:
+    return float(st.st_size)
+
+
+def _oldest(st: os.stat_result, now: float) -> float:
+    return now - st.st_atime
+
+
+def _weighted(st: os.stat_result, now: float) -> float:
+    # Tamaño en escala logarítmica por días sin acceso: un archivo grande y olvidado va primero
+    return math.log2(st.st_size + 1) * (1 + max(0.0, now - st.st_atime) / _DAY)
+
+
+POLICIES: Dict[str, Policy] = {
+    "largest": _largest,
+    "oldest": _oldest,
+    "weighted": _weighted,
+}
+
+
+class GoalReport(NamedTuple):
+    """Resultado de una limpieza con objetivo de espacio (en simulación, lo que se habría liberado)."""
+    target: int
+    freed: int
+    files: int
+    scanned: int
+    errors: List[str]
+    seconds: float
+    selected: List[Tuple[str, int]]
+
+    @property
+    def met(self) -> bool:
+        return self.freed >= self.target
+
+    @property
+    def bytes_per_s(self) -> float:
+        return self.freed / self.seconds if self.seconds else 0.0
+
+
+def bytes_needed(path: str, free_bytes: Optional[int] = None, max_used_percent: Optional[float] = None) -> int:
+    """
+    Bytes a liberar: free_bytes tal cual, o lo necesario para que el disco de path
+    baje a max_used_percent de uso según psutil.disk_usage (0 si ya está por debajo)
+    """
+    if free_bytes is not None:
+        return max(0, int(free_bytes))
+    if max_used_percent is None:
+        raise ValueError("Indica free_bytes o max_used_percent")
+    import psutil
+
+    usage = psutil.disk_usage(path)
+    # Mismo criterio que usage.percent: used / (used + free), sin el espacio reservado
+    return max(0, int(usage.used - (usage.used + usage.free) * max_used_percent / 100))
+
+
+class GoalHeap:
+    """
+    Selección acotada de los mejores candidatos para liberar target bytes: un montículo
+    de mínimos por puntuación que solo guarda el prefijo (en orden de política) que
+    cubre el objetivo. Cada candidato nuevo entra si mejora al peor y los peores salen
+    mientras el resto siga cubriendo target, así la memoria depende de cuántos archivos
+    hacen falta y no de cuántos hay en el árbol.
+    """
+
+    def __init__(self, target: int):
+        self.target = target
+        self.total = 0
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._order = itertools.count()  # Desempate estable sin comparar rutas
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, score: float, path: str, size: int) -> None:
+        heap = self._heap
+        if self.total >= self.target and heap and score <= heap[0][0]:
+            return  # No mejora la selección actual
+        heapq.heappush(heap, (score, next(self._order), path, size))
+        self.total += size
+        while heap and self.total - heap[0][3] >= self.target:
+            self.total -= heapq.heappop(heap)[3]
+
+    def best_first(self) -> List[Tuple[str, int]]:
+        """(ruta, bytes) seleccionados, de mayor a menor puntuación."""
+        return [(path, size) for _, _, path, size in sorted(self._heap, reverse=True)]
+
+
+def free_space(candidates: Iterable[Tuple[str, os.stat_result]], target: int, policy: str = "largest",
+               dry_run: bool = False, max_errors: int = 100) -> GoalReport:
+    """
+    Libera al menos target bytes borrando primero los candidatos mejor puntuados por
+    policy y se detiene en cuanto lo consigue. candidates se consume en streaming
+    (por ejemplo, de clean_engine.iter_candidates).
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Política desconocida: {policy} (opciones: {', '.join(POLICIES)})")
+    score = POLICIES[policy]
+    start = time.perf_counter()
+    now = time.time()
+    selection = GoalHeap(target)
+    scanned = 0
+    if target > 0:
+        for path, st in candidates:
+            scanned += 1
+            selection.push(score(st, now), path, st.st_size)
+
+    freed = files = 0
+    errors: List[str] = []
+    selected = []
+    for path, size in selection.best_first():
+        if freed >= target:
+            break
+        if not dry_run:
+            try:
+                os.unlink(path)
+            except OSError as e:
+                if len(errors) < max_errors:
+                    errors.append(f"{path}: {e.strerror or e}")
+                continue
+        selected.append((path, size))
+        freed += size
+        files += 1
+    return GoalReport(target, freed, files, scanned, errors, time.perf_counter() - start, selected)
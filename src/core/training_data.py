@@ -0,0 +1,96 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+from core.db_manager import LOCAL_HOST
+
+
+class ReservoirSampler:
+    """
+    Muestra de tamaño fijo sobre un flujo de bloques de filas.
+    - uniform: Algorithm R vectorizado (todas las filas con la misma probabilidad).
+    - time: A-Res ponderado por antigüedad; el peso de una fila se duplica cada
+      half_life segundos, así que las muestras recientes dominan la muestra.
+    La memoria es O(size) sin importar cuántas filas pasen por el flujo.
+    """
+
+    def __init__(self, size: int, n_features: int, weighting: str = "uniform",
+                 half_life: float = 7 * 86400, seed: int = 42):
+        if weighting not in ("uniform", "time"):
+            raise ValueError(f"Ponderación desconocida: {weighting}")
+        self.size = size
+        self.weighting = weighting
+        self.half_life = half_life
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self._filled = 0
+        self._rows = np.empty((size, n_features), dtype=np.float64)
+        self._keys = np.empty(size, dtype=np.float64)  # Solo para la variante ponderada
+        self._t0: Optional[float] = None
+
+    def add(self, X: np.ndarray, ts: Optional[np.ndarray] = None) -> None:
+        """Añade un bloque de filas (ts es obligatorio con weighting='time')."""
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return
+        if self.weighting == "time":
+            self._add_weighted(X, np.asarray(ts, dtype=np.float64))
+        else:
+            self._add_uniform(X)
+        self.seen += len(X)
+
+    def _add_uniform(self, X: np.ndarray) -> None:
+        # Fase de llenado
+        take = min(self.size - self._filled, len(X))
+        if take:
+            self._rows[self._filled:self._filled + take] = X[:take]
+            self._filled += take
+        rest = X[take:]
+        if not len(rest):
+            return
+        # Fila global n reemplaza una posición al azar con probabilidad size / (n + 1)
+        positions = np.arange(self.seen + take, self.seen + len(X)) + 1
+        slots = (self.rng.random(len(rest)) * positions).astype(np.int64)
+        accepted = slots < self.size
+        # Con índices repetidos gana la última asignación, como en el algoritmo secuencial
+        self._rows[slots[accepted]] = rest[accepted]
+
+    def _add_weighted(self, X: np.ndarray, ts: np.ndarray) -> None:
+        if self._t0 is None:
+            self._t0 = float(ts[0])
+        # Clave A-Res en escala logarítmica: se conservan las size claves menores
+        log_weight = np.log(2) * (ts - self._t0) / self.half_life
+        keys = np.log(-np.log(self.rng.random(len(X)))) - log_weight
+        rows = np.concatenate([self._rows[:self._filled], X])
+        keys = np.concatenate([self._keys[:self._filled], keys])
+        if len(keys) > self.size:
+            keep = np.argpartition(keys, self.size - 1)[:self.size]
+            rows, keys = rows[keep], keys[keep]
+        self._filled = len(keys)
+        self._rows[:self._filled] = rows
+        self._keys[:self._filled] = keys
+
+    def sample(self) -> np.ndarray:
+        """Copia de la muestra actual (hasta size filas)."""
+        return self._rows[:self._filled].copy()
+
+
+def sample_stream(chunks: Iterable[Dict[str, np.ndarray]], columns: Sequence[str], size: int,
+                  weighting: str = "uniform", half_life: float = 7 * 86400,
+                  seed: int = 42) -> ReservoirSampler:
+    """Consume bloques {columna: array} y devuelve el muestreador con la muestra final."""
+    sampler = ReservoirSampler(size, len(columns), weighting, half_life, seed)
+    for chunk in chunks:
+        X = np.column_stack([np.asarray(chunk[name], dtype=np.float64) for name in columns])
+        sampler.add(X, chunk.get("ts"))
+    return sampler
+
+
+def iter_training_chunks(db, chunk_size: int = 50000, since: Optional[int] = None,
+                         host_id: int = LOCAL_HOST) -> Iterator[Dict[str, np.ndarray]]:
+    """Bloques cronológicos de entrenamiento de un host: primero el archivo frío (solo local) y luego SQLite."""
+    if db.archive is not None and host_id == LOCAL_HOST:
+        bounds = db.get_stats_bounds()
+        hot_start = bounds[0] if bounds else None
+        for part in db.archive.iter_partitions(since, hot_start):
+            for start in range(0, len(part["ts"]), chunk_size):
+                yield {name: column[start:start + chunk_size] for name, column in part.items()}
+    yield from db.iter_stats_chunks(chunk_size, since=since, host_id=host_id)
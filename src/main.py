@@ -11,12 +11,16 @@ import ctypes
 from ctypes import wintypes
 from PIL import Image, ImageTk
 import wmi
-import sqlite3
 import pandas as pd
 from core.db_manager import DataBase
 from core.ai_predictive import PredictiveAI
 from core.notifier import Notifier
+from core.collector import Collector
 from core.cleaner import Cleaner
+from core.clean_events import CleanProgress, TargetDone
+from core.archive import ColumnarArchive
+from core.prefilter import StreamingPrefilter
+from core.features import FeaturePipeline
 import tempfile
 import sys
 import fnmatch
@@ -53,11 +57,13 @@ class OptimizerApp:
         self.setup_tabs()
         
         # Sistema y modelos
-        self.db = DataBase("system_monitor.db")
-        self.predictive_ai = PredictiveAI(self.db.db_path)
+        self.db = DataBase("system_monitor.db", write_behind=True, archive=ColumnarArchive("archive"))
+        self.predictive_ai = PredictiveAI(self.db.db_path, db=self.db, prefilter=StreamingPrefilter(),
+                                         features=FeaturePipeline())
         self.notifier = Notifier()
-        self.cleaner = Cleaner()
-        self.db_lock = threading.Lock()
+        # Muestreo sin bloquear, reglas de alerta y guardado (lo mismo que python -m core.collector)
+        self.collector = Collector(self.db, self.predictive_ai, self.notifier, disk_path='/')
+        self.cleaner = Cleaner(scan_index="scan_index.db")
         
         # Estado UI para el parpadeo
         self.blinking = False
@@ -295,6 +301,8 @@ class OptimizerApp:
         self.running = False
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=1)
+        self.predictive_ai.close()
+        self.db.close()
         self.root.destroy()
 
     # ========== MÉTODOS DE ANÁLISIS ==========
@@ -303,44 +311,22 @@ class OptimizerApp:
         threading.Thread(target=self.analyze_system, daemon=True).start()
 
     def analyze_system(self):
-        """Realiza el análisis completo del sistema"""
+        """Realiza el análisis completo del sistema (muestreo, alertas y guardado en core.collector)"""
         try:
-            # Obtener métricas del sistema
-            cpu = psutil.cpu_percent(interval=1)
-            ram = psutil.virtual_memory().percent
-            disk = psutil.disk_usage('/').percent
-            
-            # Actualizar UI
-            self.cpu_var.set(f"CPU: {cpu:.1f}%")
-            self.ram_var.set(f"RAM: {ram:.1f}%")
-            self.disk_var.set(f"Disco: {disk:.1f}%")
-            self.status_bar.config(text=f"CPU: {cpu:.1f}% | RAM: {ram:.1f}% | Disco: {disk:.1f}%")
-            
-            # Guardar en base de datos
-            with self.db_lock:
-                errors = self.db.count_recent_errors()
-                self.db.insert_system_stats(cpu, ram, disk, errors)
-            
-            # Generar alertas
-            alerts = []
-            if cpu > 80:
-                alerts.append({"message": f"CPU alta ({cpu:.1f}%)", "severity": "HIGH" if cpu > 90 else "MEDIUM"})
-            if ram > 85:
-                alerts.append({"message": f"RAM alta ({ram:.1f}%)", "severity": "HIGH" if ram > 90 else "MEDIUM"})
-            if disk > 90:
-                alerts.append({"message": f"Disco lleno ({disk:.1f}%)", "severity": "HIGH"})
-            
-            # Análisis predictivo
-            predictive_alerts = self.predictive_ai.analyze_predictive(cpu, ram, disk, errors)
-            alerts.extend(predictive_alerts)
-            
-            # Mostrar alertas
-            self.show_alerts(alerts)
-            
+            sample, alerts = self.collector.step()
+            self.root.after(0, self.show_sample, sample, alerts)
         except Exception as e:
-            messagebox.showerror("Error", f"Error en análisis: {str(e)}")
+            self.root.after(0, messagebox.showerror, "Error", f"Error en análisis: {str(e)}")
         finally:
-            self.stop_blinking_alien()
+            self.root.after(0, self.stop_blinking_alien)
+
+    def show_sample(self, sample, alerts):
+        """Muestra una muestra del recolector (en el hilo de Tk)"""
+        self.cpu_var.set(f"CPU: {sample.cpu:.1f}%")
+        self.ram_var.set(f"RAM: {sample.ram:.1f}%")
+        self.disk_var.set(f"Disco: {sample.disk:.1f}%")
+        self.status_bar.config(text=f"CPU: {sample.cpu:.1f}% | RAM: {sample.ram:.1f}% | Disco: {sample.disk:.1f}%")
+        self.show_alerts(alerts)
 
     def show_alerts(self, alerts):
         """Muestra las alertas en el área de texto"""
@@ -355,13 +341,6 @@ class OptimizerApp:
             color = "#FF5555" if alert.get("severity") == "HIGH" else "#FFB86C"
             self.alerts_text.insert(tk.END, f"⚠️ {alert['message']}\n", alert["severity"])
             self.alerts_text.tag_config(alert["severity"], foreground=color)
-            
-            # Enviar notificación
-            self.notifier.send_notification("Alerta del Sistema", alert["message"])
-            
-            # Registrar en base de datos
-            with self.db_lock:
-                self.db.insert_alert(alert["message"], alert.get("severity", "MEDIUM"))
         
         # Cambiar color del alien si hay alertas graves
         if any(a.get("severity") == "HIGH" for a in alerts):
@@ -382,44 +361,59 @@ class OptimizerApp:
         status = ttk.Label(progress_win, text="Preparando...")
         status.pack()
 
-        def do_clean():
+        # Las variables de Tk se leen aquí, en el hilo de la interfaz, y el hilo de limpieza recibe bools
+        clean_prefetch = self.clean_prefetch.get()
+        clean_logs = self.clean_logs.get()
+
+        def do_clean(clean_prefetch: bool, clean_logs: bool):
             """Función que realiza la limpieza en segundo plano"""
             targets = [tempfile.gettempdir()]
             
             # Agregar prefetch si está habilitado
-            if self.clean_prefetch.get():
+            if clean_prefetch:
                 prefetch = os.path.join(os.environ.get('SystemRoot', r'C:\Windows'), 'Prefetch')
                 if os.path.exists(prefetch):
                     targets.append(prefetch)
             
             # Agregar logs si está habilitado
-            if self.clean_logs.get():
+            if clean_logs:
                 logs = os.path.join(os.environ.get('SystemRoot', r'C:\Windows'), 'Logs')
                 if os.path.exists(logs):
                     targets.append(logs)
             
             total = len(targets)
             deleted = 0
-            
-            # Procesar cada objetivo
-            for i, target in enumerate(targets):
-                status.config(text=f"Limpiando: {os.path.basename(target)}...")
-                progress['value'] = (i / total) * 50
-                progress_win.update()
-                
-                deleted += self.cleaner.clean_directory(target)
-                progress['value'] = 50 + (i / total) * 50
-                progress_win.update()
-            
+
+            # Los eventos llegan como mucho cada 0.2 s y los widgets solo se tocan desde el hilo de Tk
+            def show(text, value):
+                status.config(text=text)
+                progress['value'] = value
+
+            def finish():
+                show(f"✅ Listo! Eliminados {deleted} archivos", 100)
+                self.root.after(1500, progress_win.destroy)
+                self.stop_blinking_alien()
+
+            index = 0
+            for event in self.cleaner.iter_clean(targets, interval=0.2):
+                name = os.path.basename(event.target) or event.target
+                if isinstance(event, CleanProgress):
+                    fraction = event.fraction if event.fraction is not None else 0.5
+                    eta = f", quedan ~{event.eta:.0f} s" if event.eta is not None else ""
+                    text = (f"Limpiando: {name}... {event.deleted} eliminados "
+                            f"({event.bytes_freed / 2 ** 20:.1f} MB{eta})")
+                    self.root.after(0, show, text, (index + fraction) / total * 100)
+                elif isinstance(event, TargetDone):
+                    index += 1
+                    if event.report is not None:
+                        deleted += event.report.deleted
+
             # Finalizar
-            status.config(text=f"✅ Listo! Eliminados {deleted} archivos")
             self.notifier.send_notification("Optimizer AI", "Limpieza completada")
-            time.sleep(1.5)
-            progress_win.destroy()
-            self.stop_blinking_alien()
+            self.root.after(0, finish)
 
         # Ejecutar en un hilo separado
-        threading.Thread(target=do_clean, daemon=True).start()
+        threading.Thread(target=do_clean, args=(clean_prefetch, clean_logs), daemon=True).start()
 
     # ========== MÉTODOS DE VISUALIZACIÓN ==========
     def update_graph(self):
@@ -427,16 +421,10 @@ class OptimizerApp:
         metric = self.graph_var.get()
         
         try:
-            # Obtener datos de la base de datos
-            conn = sqlite3.connect(self.db.db_path)
-            query = f"""
-                SELECT timestamp, {metric} 
-                FROM system_stats 
-                WHERE timestamp >= datetime('now', '-7 days')
-                ORDER BY timestamp
-            """
-            df = pd.read_sql_query(query, conn)
-            conn.close()
+            # Obtener datos agregados (la resolución se elige según los puntos)
+            rows = self.db.get_stats_range(days=7, points=150)
+            columns = ['timestamp', 'cpu', 'ram', 'disk']
+            df = pd.DataFrame(rows, columns=columns)[['timestamp', metric]]
             
             if not df.empty:
                 # Procesar datos
@@ -530,8 +518,9 @@ class OptimizerApp:
             
             # Ejecutar análisis y limpieza después de 2 horas de inactividad
             if idle_time > 7200:  
-                self.run_analysis_thread()
-                self.advanced_clean()
+                # Este hilo no toca Tk: el análisis y la limpieza arrancan desde el hilo de la interfaz
+                self.root.after(0, self.run_analysis_thread)
+                self.root.after(0, self.advanced_clean)
                 
             time.sleep(600)
 